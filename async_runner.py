@@ -0,0 +1,202 @@
+"""Асинхронный цикл опроса и отправки уведомлений.
+
+Блокирующие функции из homework.py остаются как есть и выполняются в
+пуле потоков, размер которого равен лимиту одновременных запросов.
+Один event loop при этом перекрывает сетевые задержки многих подписок.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+from exceptions import BudgetExceeded
+import homework
+from homework import fetch_homework_statuses, make_headers
+from log_setup import setup_logging
+from metrics import LOOP_LAG
+from response_cache import ResponseCache
+from tenants import (
+    alert_message, commit_response, handle_response, make_parser,
+    save_state, start_service,
+)
+
+DEFAULT_CONCURRENCY = 20
+
+
+class AsyncRunner:
+    """Асинхронный опрос подписок с ограничением параллельности."""
+
+    def __init__(self, bot, scheduler, concurrency=DEFAULT_CONCURRENCY,
+                 cache=None, store=None):
+        self.bot = bot
+        self.scheduler = scheduler
+        self.cache = cache
+        self.store = store
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='homework-io')
+        self._semaphore = None
+        self._woken = None
+        self._in_flight = set()
+
+    async def _blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args))
+
+    async def fetch_homework_statuses(self, current_timestamp, headers,
+                                      budget=None):
+        """корутина запроса статусов домашек."""
+        return await self._blocking(
+            fetch_homework_statuses, current_timestamp, headers, self.cache,
+            budget)
+
+    async def send_message(self, chat_id, message, budget=None):
+        """ставит сообщение в очередь доставки DeliveryQueue.
+        Постановка в очередь не блокирует, поэтому пул потоков не нужен.
+        """
+        self.bot.send_message(chat_id, message, budget=budget)
+
+    def _reschedule(self, subscription, due, deferred=False):
+        """планирует следующий опрос и будит цикл run().
+        Цикл спит до ближайшего опроса в куче, а подписки в работе в
+        ней отсутствуют, поэтому без пробуждения он проспал бы короткий
+        интервал ревью или Retry-After. Отложенный из-за бюджета опрос
+        возвращается в очередь с прежним сроком.
+        """
+        self._in_flight.discard(subscription.chat_id)
+        if deferred:
+            self.scheduler.requeue(subscription, due)
+        else:
+            self.scheduler.reschedule(subscription, due)
+        if self._woken is not None:
+            self._woken.set()
+
+    async def _poll(self, subscription, budget):
+        try:
+            response = await self.fetch_homework_statuses(
+                subscription.current_date,
+                make_headers(subscription.token), budget)
+            changes = handle_response(subscription, response)
+            for name, status, message in changes:
+                await self.send_message(
+                    subscription.chat_id, message, budget)
+                subscription.statuses[name] = status
+                subscription.remember(message)
+            summary = commit_response(subscription, response, changes)
+            if summary:
+                await self.send_message(subscription.chat_id, summary, budget)
+        except BudgetExceeded:
+            raise
+        except Exception as error:
+            message = alert_message(subscription, error)
+            if message:
+                await self.send_message(subscription.chat_id, message, budget)
+        save_state(self.store, subscription)
+
+    async def poll_subscription(self, subscription, due):
+        """опрашивает API для подписки и отправляет уведомления.
+        Бюджет цикла отсчитывается с момента, когда опрос получил место
+        среди concurrency одновременных запросов: время ожидания в
+        очереди семафора на запрос не расходуется.
+        """
+        if subscription.paused:
+            self._reschedule(subscription, due)
+            return
+        deferred = False
+        try:
+            async with self._semaphore:
+                await self._poll(subscription, homework.TIMEOUTS.budget())
+        except BudgetExceeded as error:
+            deferred = True
+            logging.warning(
+                f'{subscription.chat_id}: {error}',
+                extra={'chat_id': subscription.chat_id})
+        except Exception as error:
+            logging.error(
+                f'{subscription.chat_id}: {error}',
+                extra={'chat_id': subscription.chat_id})
+        finally:
+            self._reschedule(subscription, due, deferred)
+
+    def dispatch_due(self, now=None):
+        """запускает задачи опроса для подписок, срок которых наступил.
+        Подписка, чей предыдущий опрос ещё не завершён, пропускается.
+        Следующий опрос планируется по завершении текущего.
+        """
+        now = time.time() if now is None else now
+        tasks = []
+        for due, subscription in self.scheduler.pop_due(now):
+            LOOP_LAG.set(max(now - due, 0))
+            if subscription.chat_id in self._in_flight:
+                logging.warning(
+                    f'{subscription.chat_id}: предыдущий опрос не завершён')
+                self.scheduler.reschedule(subscription, due, now)
+                continue
+            self._in_flight.add(subscription.chat_id)
+            tasks.append(asyncio.create_task(
+                self.poll_subscription(subscription, due)))
+        return tasks
+
+    async def run(self, lifecycle=None, reloader=None):
+        """цикл асинхронного опроса.
+        С lifecycle цикл завершается после запроса остановки; начатые
+        опросы доводятся до конца в пределах общего срока остановки, а
+        остаток срока достаётся обработчикам lifecycle.shutdown(). С
+        reloader перечитанные настройки применяются в цикле событий.
+        """
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        woken = self._woken = asyncio.Event()
+        if lifecycle is not None:
+            loop = asyncio.get_running_loop()
+
+            def wake():
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(woken.set)
+
+            lifecycle.on_wake(wake)
+        pending = set()
+        try:
+            while lifecycle is None or not lifecycle.stopping:
+                if reloader is not None:
+                    reloader.apply()
+                pending.update(self.dispatch_due())
+                pending = {task for task in pending if not task.done()}
+                next_due = self.scheduler.next_due()
+                delay = homework.RETRY_TIME if next_due is None else (
+                    next_due - time.time())
+                try:
+                    await asyncio.wait_for(woken.wait(), max(delay, 0))
+                except asyncio.TimeoutError:
+                    pass
+                woken.clear()
+            if pending:
+                await asyncio.wait(pending, timeout=lifecycle.remaining())
+        finally:
+            for task in pending:
+                task.cancel()
+            self._executor.shutdown(wait=False)
+
+
+def main(argv=None):
+    """Точка входа асинхронного мультитенантного режима."""
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument(
+        '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+        help='максимум одновременных запросов')
+    args = parser.parse_args(argv)
+    service = start_service(args, pool_maxsize=args.concurrency)
+    runner = AsyncRunner(
+        service.bot, service.scheduler, args.concurrency,
+        cache=ResponseCache(), store=service.store)
+    try:
+        asyncio.run(runner.run(service.lifecycle, service.reloader))
+    finally:
+        service.lifecycle.shutdown()
+
+
+if __name__ == '__main__':
+    setup_logging()
+    main()
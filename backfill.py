@@ -0,0 +1,118 @@
+"""Догоняющий режим: восстановление состояния чата по истории домашек.
+
+API отдаёт все домашки, изменившиеся после from_date, одним ответом без
+страниц, поэтому тело читается потоком и разбирается HomeworkStream по
+кускам: в памяти одновременно только одна домашка и статусы чата.
+Статусы сверяются с хранилищем состояния, новые записываются в него,
+а с --replay по ним ещё и отправляются уведомления — от старых к новым,
+как в цикле опроса.
+
+    python homework.py backfill --from-date 0 --replay
+"""
+import argparse
+import logging
+import sys
+from contextlib import contextmanager
+from http import HTTPStatus
+
+import requests
+
+import homework
+from delivery import DeliveryQueue
+from exceptions import StatusCodeException
+from schema import CHUNK_SIZE, HomeworkStream
+from state_store import open_state_store
+
+REPLAY_DRAIN_TIMEOUT = 60
+
+
+@contextmanager
+def stream_history(from_date, headers):
+    """открывает потоковый запрос истории домашек с from_date.
+    Отдаёт HomeworkStream; соединение закрывается при выходе.
+    """
+    get = requests.get if homework.HTTP_POOL is None else (
+        homework.HTTP_POOL.get)
+    response = homework.request_api(get, {
+        'url': homework.ENDPOINT, 'headers': headers,
+        'params': {'from_date': from_date}, 'stream': True,
+    })
+    try:
+        if response.status_code != HTTPStatus.OK:
+            raise StatusCodeException(
+                f'История с from_date={from_date} не получена, '
+                f'код ответа: {response.status_code}',
+                status_code=response.status_code,
+                retry_after=response.headers.get('Retry-After'),
+            )
+        yield HomeworkStream(
+            response.iter_content(CHUNK_SIZE), homework.TEMPLATES.fields)
+    finally:
+        response.close()
+
+
+def backfill(bot, chat_id, headers, store, from_date=0, replay=False):
+    """сверяет историю домашек с хранилищем и дописывает новые статусы.
+    История идёт от новых к старым: от каждой домашки остаётся первая,
+    самая свежая запись, так что памяти нужно по записи на домашку, а не
+    на всю историю. Изменения ищет detect_changes от старых записей к
+    новым, и с replay уведомления уходят в том же порядке, что и в цикле
+    опроса. Возвращает словарь счётчиков seen, changed, skipped.
+    """
+    counts = {'seen': 0, 'changed': 0, 'skipped': 0}
+    state = store.load(chat_id)
+    current_date, saved_report = (0, None) if state is None else state
+    statuses = homework.restore_report(saved_report)['statuses']
+    latest = {}
+    with stream_history(from_date, headers) as stream:
+        for index, item in enumerate(stream):
+            counts['seen'] += 1
+            name = item.get('homework_name')
+            latest.setdefault((None, index) if name is None else name, item)
+        current_date = max(current_date, stream.current_date)
+    for name, status, message in homework.detect_changes(
+            reversed(latest.values()), statuses, counts=counts):
+        statuses[name] = status
+        counts['changed'] += 1
+        if replay:
+            bot.send_message(chat_id, message)
+    store.save(chat_id, current_date, {'statuses': statuses})
+    store.flush()
+    return counts
+
+
+def main(argv=None):
+    """Точка входа догоняющего режима."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--from-date', type=int, default=0,
+        help='с какого момента (unix time) запрашивать историю')
+    parser.add_argument(
+        '--replay', action='store_true',
+        help='отправить уведомления о найденных новых статусах')
+    parser.add_argument(
+        '--chat-id', default=homework.TELEGRAM_CHAT_ID,
+        help='чат, состояние которого восстанавливается')
+    args = parser.parse_args(argv)
+    if not homework.PRACTICUM_TOKEN or not args.chat_id or (
+            args.replay and not homework.TELEGRAM_TOKEN):
+        logging.critical('отсутствуют обязательные переменные окружения')
+        sys.exit('отсутствуют обязательные переменные окружения')
+    store = open_state_store()
+    bot = None
+    if args.replay:
+        bot = DeliveryQueue(
+            homework.make_bot(homework.TELEGRAM_TOKEN),
+            homework.send_message_to).start()
+    try:
+        counts = backfill(
+            bot, args.chat_id, homework.HEADERS, store,
+            args.from_date, args.replay)
+        logging.info(
+            f'история с {args.from_date}: домашек {counts["seen"]}, '
+            f'новых статусов {counts["changed"]}, '
+            f'пропущено {counts["skipped"]}')
+    finally:
+        if bot is not None and not bot.stop(timeout=REPLAY_DRAIN_TIMEOUT):
+            logging.error('не все уведомления истории отправлены')
+        store.close()
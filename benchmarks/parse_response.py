@@ -0,0 +1,112 @@
+"""Сравнение разбора ответа API: json + check_response против schema.
+
+Запуск из корня репозитория:
+
+    python benchmarks/parse_response.py --homeworks 20000
+
+Для каждого размера истории печатает время разбора тела ответа и
+пиковую память (tracemalloc) обоих способов.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+from schema import (  # noqa: E402
+    HomeworkStream, chunked, parse_homework_statuses,
+)
+
+
+def make_body(count):
+    """тело ответа API с историей из count домашек."""
+    homeworks = [
+        {
+            'id': index,
+            'status': ('approved', 'rejected', 'reviewing')[index % 3],
+            'homework_name': f'student__hw{index:05d}.zip',
+            'reviewer_comment': 'Всё хорошо, но можно лучше. ' * 4,
+            'date_updated': '2022-01-01T12:00:00Z',
+            'lesson_name': f'Спринт {index % 20}',
+        }
+        for index in range(count)
+    ]
+    return json.dumps(
+        {'homeworks': homeworks, 'current_date': 1640995200},
+        ensure_ascii=False).encode('utf-8')
+
+
+def current_path(body):
+    """как раньше: json.loads целиком и проверка check_response."""
+    response = json.loads(body)
+    return [
+        (item.get('homework_name'), item.get('status'))
+        for item in homework.check_response(response)
+    ]
+
+
+def streaming_path(body):
+    """потоковый разбор по кускам с проверкой схемы."""
+    return [
+        (item.get('homework_name'), item.get('status'))
+        for item in HomeworkStream(chunked(body))
+    ]
+
+
+def buffered_path(body):
+    """разбор тела, уже прочитанного целиком, как в get_api_answer."""
+    response = parse_homework_statuses(body)
+    return [
+        (item.get('homework_name'), item.get('status'))
+        for item in homework.check_response(response)
+    ]
+
+
+def streaming_count(body):
+    """потоковый разбор без накопления результата."""
+    return sum(1 for _ in HomeworkStream(chunked(body)))
+
+
+def peak_memory(function, body):
+    """пиковая память вызова в байтах, без учёта самого тела."""
+    tracemalloc.start()
+    try:
+        function(body)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--homeworks', type=int, nargs='+', default=[100, 2000, 20000],
+        help='размеры истории домашек')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    paths = (
+        ('json + check_response', current_path),
+        ('schema, тело целиком', buffered_path),
+        ('schema, по кускам', streaming_path),
+        ('schema, без списка', streaming_count),
+    )
+    for count in args.homeworks:
+        body = make_body(count)
+        assert current_path(body) == streaming_path(body)
+        print(f'{count} домашек, {len(body) / 1024:.0f} КиБ')
+        for name, function in paths:
+            seconds = min(timeit.repeat(
+                lambda: function(body), number=1, repeat=args.repeat))
+            memory = peak_memory(function, body)
+            print(
+                f'  {name:<24} {seconds * 1000:8.2f} мс '
+                f'{memory / 1024:10.0f} КиБ')
+
+
+if __name__ == '__main__':
+    main()
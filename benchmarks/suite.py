@@ -0,0 +1,197 @@
+"""Бенчмарки горячего пути одного цикла опроса.
+
+Каждый бенчмарк замеряется timeit: число повторов подбирается
+автоматически, из нескольких серий берётся лучшее время одного вызова.
+Результаты сравниваются с сохранённой базой (baseline.json рядом с
+этим файлом); замедление сильнее порога считается регрессией, и
+скрипт завершается с кодом 1. Абсолютные времена зависят от машины,
+поэтому база не хранится в репозитории: её создаёт --save на той же
+машине, где потом идёт сравнение.
+
+    python benchmarks/suite.py --save      # создать или обновить базу
+    python benchmarks/suite.py             # сравнить с базой
+    python benchmarks/suite.py parse_status check_response
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+from loadtest.fake_servers import FakePracticum  # noqa: E402
+from schema import parse_homework_statuses  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baseline.json')
+DEFAULT_THRESHOLD = 1.25
+DEFAULT_REPEAT = 5
+
+BENCHMARKS = {}
+
+
+def benchmark(function):
+    """регистрирует фабрику бенчмарка.
+    Фабрика готовит данные и возвращает пару (замеряемая функция,
+    функция очистки или None).
+    """
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def make_homeworks(count, status='approved'):
+    """список домашек в формате ответа API."""
+    return [
+        {
+            'id': index,
+            'status': status,
+            'homework_name': f'student__hw{index:05d}.zip',
+            'reviewer_comment': 'Всё хорошо, но можно лучше.',
+            'date_updated': '2022-01-01T12:00:00Z',
+            'lesson_name': f'Спринт {index % 20}',
+        }
+        for index in range(count)
+    ]
+
+
+class FakeBot:
+    """Бот, который ничего не отправляет."""
+
+    def send_message(self, chat_id, text, **kwargs):
+        """ничего не делает."""
+        return None
+
+
+@benchmark
+def get_api_answer():
+    """запрос к локальному заменителю API с разбором ответа."""
+    server = FakePracticum(step=0.0, started=0).start()
+    endpoint = homework.ENDPOINT
+    homework.ENDPOINT = server.endpoint
+
+    def cleanup():
+        homework.ENDPOINT = endpoint
+        server.stop()
+
+    return (lambda: homework.get_api_answer(1)), cleanup
+
+
+@benchmark
+def check_response():
+    """проверка структуры ответа с 20 домашками."""
+    response = {'homeworks': make_homeworks(20), 'current_date': 1}
+    return (lambda: homework.check_response(response)), None
+
+
+@benchmark
+def parse_status():
+    """сообщение о статусе одной домашки."""
+    item = make_homeworks(1)[0]
+    return (lambda: homework.parse_status(item)), None
+
+
+@benchmark
+def status_changes():
+    """сравнение 20 домашек с отчётом, где изменилась одна."""
+    homeworks = make_homeworks(20)
+    statuses = {item['homework_name']: item['status'] for item in homeworks}
+    statuses[homeworks[0]['homework_name']] = 'reviewing'
+    return (
+        lambda: list(homework.status_changes(homeworks, statuses)), None)
+
+
+@benchmark
+def parse_large_body():
+    """потоковый разбор ответа с историей из 2000 домашек."""
+    body = json.dumps(
+        {'homeworks': make_homeworks(2000), 'current_date': 1},
+        ensure_ascii=False).encode('utf-8')
+    return (lambda: parse_homework_statuses(body)), None
+
+
+@benchmark
+def send_message():
+    """отправка сообщения фиктивному боту."""
+    bot = FakeBot()
+    return (lambda: homework.send_message(bot, 'Статус изменился')), None
+
+
+def measure(name, repeat=DEFAULT_REPEAT):
+    """лучшее время одного вызова бенчмарка в секундах."""
+    function, cleanup = BENCHMARKS[name]()
+    try:
+        timer = timeit.Timer(function)
+        number, _ = timer.autorange()
+        return min(timer.repeat(repeat=repeat, number=number)) / number
+    finally:
+        if cleanup is not None:
+            cleanup()
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """строки отчёта и список бенчмарков, замедлившихся сильнее порога."""
+    lines, regressions = [], []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f'{name:<20} {seconds * 1e6:10.2f} мкс   (нет базы)')
+            continue
+        ratio = seconds / base
+        mark = ''
+        if ratio > threshold:
+            regressions.append(name)
+            mark = '  РЕГРЕССИЯ'
+        lines.append(
+            f'{name:<20} {seconds * 1e6:10.2f} мкс   '
+            f'база {base * 1e6:10.2f} мкс   x{ratio:.2f}{mark}')
+    return lines, regressions
+
+
+def load_baseline(path=BASELINE):
+    """сохранённая база или пустой словарь."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def main(argv=None):
+    """Точка входа набора бенчмарков."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'names', nargs='*', metavar='name',
+        help='какие бенчмарки запускать (по умолчанию все): '
+        + ', '.join(sorted(BENCHMARKS)))
+    parser.add_argument(
+        '--save', action='store_true', help='записать результаты как базу')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='допустимое замедление относительно базы, раз')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--baseline', default=BASELINE)
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'неизвестные бенчмарки: {", ".join(sorted(unknown))}')
+    names = args.names or sorted(BENCHMARKS)
+    results = {name: measure(name, args.repeat) for name in names}
+    baseline = load_baseline(args.baseline)
+    lines, regressions = compare(results, baseline, args.threshold)
+    print('\n'.join(lines))
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+            file.write('\n')
+        print(f'база сохранена в {args.baseline}')
+        return 0
+    if regressions:
+        print(f'регрессии (порог x{args.threshold}): {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
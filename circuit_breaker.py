@@ -0,0 +1,129 @@
+"""Предохранители для запросов к API Практикума и Telegram.
+
+Пока внешний сервис недоступен, каждый опрос всё равно ждёт таймаута и
+собирает длинный текст ошибки. Предохранитель считает сбои подряд и
+после failure_threshold размыкается: вызовы сразу получают CircuitOpen,
+не обращаясь к сервису. Через reset_timeout он становится полуоткрытым
+и пропускает probes пробных запросов; успех пробы замыкает его, сбой —
+снова размыкает. Экземпляры общие для всех опросов процесса.
+
+Переменные окружения: BREAKER_FAILURES, BREAKER_RESET_TIMEOUT,
+BREAKER_PROBES.
+"""
+import logging
+import os
+import threading
+import time
+
+from exceptions import CircuitOpen
+from metrics import BREAKER_REJECTIONS, BREAKER_STATE
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60
+DEFAULT_PROBES = 1
+
+
+class CircuitBreaker:
+    """Предохранитель одного внешнего сервиса.
+
+    Перед запросом вызывается allow(), после — success() или failure().
+    Ошибки, не говорящие о недоступности сервиса (например 401 на
+    чужой токен), нужно отмечать как success().
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT, probes=DEFAULT_PROBES,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._in_probe = 0
+        self._set_state(CLOSED)
+
+    @classmethod
+    def from_env(cls, name, **overrides):
+        """создаёт предохранитель по переменным окружения BREAKER_*."""
+        options = {
+            'failure_threshold': int(os.getenv(
+                'BREAKER_FAILURES', DEFAULT_FAILURE_THRESHOLD)),
+            'reset_timeout': float(os.getenv(
+                'BREAKER_RESET_TIMEOUT', DEFAULT_RESET_TIMEOUT)),
+            'probes': int(os.getenv('BREAKER_PROBES', DEFAULT_PROBES)),
+        }
+        options.update(overrides)
+        return cls(name, **options)
+
+    def allow(self):
+        """пропускает запрос или бросает CircuitOpen.
+        retry_after исключения — секунды до пробного запроса.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - (
+                    self._clock())
+                if remaining > 0:
+                    BREAKER_REJECTIONS.labels(self.name).inc()
+                    raise CircuitOpen(
+                        f'{self.name} недоступен, запросы приостановлены',
+                        retry_after=remaining)
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._in_probe >= self.probes:
+                    BREAKER_REJECTIONS.labels(self.name).inc()
+                    raise CircuitOpen(
+                        f'{self.name}: ждём результата пробного запроса',
+                        retry_after=self.reset_timeout)
+                self._in_probe += 1
+
+    def success(self):
+        """отмечает запрос, на который сервис ответил."""
+        with self._lock:
+            self._failures = 0
+            self._in_probe = 0
+            if self.state != CLOSED:
+                logging.info(f'предохранитель {self.name} замкнут')
+                self._set_state(CLOSED)
+
+    def release(self):
+        """отмечает запрос, прерванный не по вине сервиса.
+        Пробный слот освобождается, счётчик сбоев не меняется.
+        """
+        with self._lock:
+            if self._in_probe:
+                self._in_probe -= 1
+
+    def failure(self):
+        """отмечает сбой сервиса: таймаут, обрыв связи, 5xx или 429."""
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or (
+                    self._failures >= self.failure_threshold):
+                if self.state != OPEN:
+                    logging.warning(
+                        f'предохранитель {self.name} разомкнут после '
+                        f'{self._failures} сбоев подряд')
+                self._in_probe = 0
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+    def reset(self):
+        """замыкает предохранитель и забывает накопленные сбои."""
+        with self._lock:
+            self._failures = 0
+            self._in_probe = 0
+            self._opened_at = None
+            self._set_state(CLOSED)
+
+    def _set_state(self, state):
+        self.state = state
+        BREAKER_STATE.labels(self.name).set(STATE_VALUES[state])
@@ -0,0 +1,175 @@
+"""Команды бота: /status, /history, /pause и /resume.
+
+Ответы собираются только из состояния чатов в памяти процесса, без
+запросов к API Практикума. Входящие сообщения читаются long polling'ом
+(getUpdates) в отдельном потоке, поэтому цикл опроса не блокируется.
+Включается переменной окружения TELEGRAM_COMMANDS=1.
+"""
+import logging
+import os
+import threading
+from collections import deque
+
+from lazy_import import lazy_import
+
+telegram = lazy_import('telegram')
+
+HISTORY_SIZE = 10
+POLL_TIMEOUT = 30
+
+
+class ChatState:
+    """Состояние чата в памяти: статусы, история уведомлений, пауза."""
+
+    __slots__ = ('statuses', 'history', 'paused')
+
+    def __init__(self, statuses=None):
+        self.statuses = {} if statuses is None else statuses
+        self.history = None
+        self.paused = False
+
+    def remember(self, message):
+        """добавляет отправленное уведомление в короткую историю."""
+        if self.history is None:
+            self.history = deque(maxlen=HISTORY_SIZE)
+        self.history.append(message)
+
+
+class CommandHandler:
+    """Формирует ответы на команды по состоянию чата.
+
+    lookup — функция, возвращающая ChatState по id чата или None,
+    verdicts — описания статусов, как HOMEWORK_STATUSES.
+    """
+
+    def __init__(self, lookup, verdicts):
+        self.lookup = lookup
+        self.verdicts = verdicts
+        self._commands = {
+            '/status': self.status,
+            '/history': self.history,
+            '/pause': self.pause,
+            '/resume': self.resume,
+        }
+
+    def handle(self, chat_id, text):
+        """возвращает ответ на команду или None, если это не команда."""
+        if not text or not text.startswith('/'):
+            return None
+        command = text.split()[0].split('@')[0].lower()
+        action = self._commands.get(command)
+        if action is None:
+            return 'Доступные команды: ' + ', '.join(self._commands)
+        chat = self.lookup(chat_id)
+        if chat is None:
+            return 'Этот чат не подписан на уведомления.'
+        return action(chat)
+
+    def status(self, chat):
+        """последние известные статусы работ.
+        Поток опроса меняет статусы одновременно с ответом, поэтому
+        перебирается их снимок.
+        """
+        statuses = list(chat.statuses.items())
+        if not statuses:
+            return 'Статусов пока нет.'
+        lines = [
+            f'"{name}": {self.verdicts.get(status, status)}'
+            for name, status in statuses
+        ]
+        if chat.paused:
+            lines.append('Уведомления приостановлены.')
+        return '\n'.join(lines)
+
+    def history(self, chat):
+        """последние отправленные уведомления."""
+        if not chat.history:
+            return 'Уведомлений пока не было.'
+        return '\n\n'.join(chat.history)
+
+    def pause(self, chat):
+        """приостанавливает опрос API для чата."""
+        chat.paused = True
+        return 'Уведомления приостановлены. Продолжить: /resume'
+
+    def resume(self, chat):
+        """возобновляет опрос API для чата."""
+        chat.paused = False
+        return 'Уведомления возобновлены.'
+
+
+class CommandListener:
+    """Поток, читающий входящие сообщения через getUpdates.
+
+    reply — функция отправки ответа вида reply(chat_id, text); обычно это
+    send_message очереди доставки, чтобы ответы не ждали Telegram.
+    """
+
+    def __init__(self, telegram_bot, handler, reply,
+                 poll_timeout=POLL_TIMEOUT):
+        self.telegram_bot = telegram_bot
+        self.handler = handler
+        self.reply = reply
+        self.poll_timeout = poll_timeout
+        self.offset = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """запускает поток чтения команд."""
+        self._thread = threading.Thread(
+            target=self._run, name='telegram-commands', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """останавливает поток после текущего запроса getUpdates."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def process(self, updates):
+        """отвечает на команды из пачки обновлений."""
+        for update in updates:
+            self.offset = update.update_id + 1
+            message = update.message
+            if message is None:
+                continue
+            answer = self.handler.handle(message.chat_id, message.text)
+            if answer:
+                self.reply(message.chat_id, answer)
+
+    def _run(self):
+        failures = 0
+        while not self._stopped.is_set():
+            try:
+                updates = self.telegram_bot.get_updates(
+                    offset=self.offset, timeout=self.poll_timeout,
+                    allowed_updates=['message'])
+            except telegram.error.TelegramError as error:
+                failures += 1
+                delay = min(2 ** failures, 60)
+                logging.warning(f'getUpdates не удался: {error}')
+                self._stopped.wait(delay)
+                continue
+            failures = 0
+            try:
+                self.process(updates)
+            except Exception as error:
+                logging.error(f'сбой обработки команды: {error}')
+
+
+def start_command_listener(telegram_bot, reply, lookup, verdicts,
+                           lifecycle=None):
+    """запускает обработку команд, если TELEGRAM_COMMANDS=1.
+    Возвращает запущенный CommandListener или None. С lifecycle поток
+    останавливается вместе с процессом.
+    """
+    if os.getenv('TELEGRAM_COMMANDS', '0') != '1':
+        return None
+    logging.info('включены команды бота')
+    listener = CommandListener(
+        telegram_bot, CommandHandler(lookup, verdicts), reply).start()
+    if lifecycle is not None:
+        lifecycle.on_stop(lambda: listener.stop(timeout=0))
+    return listener
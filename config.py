@@ -0,0 +1,183 @@
+"""Настройки бота, которые можно перечитать без перезапуска.
+
+Настройки собираются из переменных окружения (после load_dotenv) и из
+файла CONFIG_FILE в формате .env. Значения файла важнее окружения: у
+работающего процесса поменять можно только файл.
+
+Перечитывание запрашивается сигналом SIGHUP или изменением одного из
+отслеживаемых файлов — настроек и таблицы подписок. Сам запрос только
+будит цикл опроса, а настройки перечитываются в нём между опросами,
+поэтому планировщик не меняется из чужого потока, а кэши ответов,
+курсоры и статусы подписок остаются на месте.
+
+Переменные окружения: CONFIG_FILE, CONFIG_WATCH_INTERVAL (секунд между
+проверками файлов, 0 отключает слежение).
+"""
+import logging
+import os
+import signal
+import threading
+import time
+
+from dotenv import dotenv_values
+
+from lifecycle import SignalRelay
+
+DEFAULT_RETRY_TIME = 600
+DEFAULT_ENDPOINT = (
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/')
+DEFAULT_WATCH_INTERVAL = 5
+RELOAD_SIGNALS = (signal.SIGHUP,)
+
+
+class Settings:
+    """Снимок настроек: токены, чат, интервал опроса и адрес API."""
+
+    __slots__ = (
+        'practicum_token', 'telegram_token', 'telegram_chat_id',
+        'retry_time', 'endpoint')
+
+    def __init__(self, practicum_token=None, telegram_token=None,
+                 telegram_chat_id=None, retry_time=DEFAULT_RETRY_TIME,
+                 endpoint=DEFAULT_ENDPOINT):
+        self.practicum_token = practicum_token
+        self.telegram_token = telegram_token
+        self.telegram_chat_id = telegram_chat_id
+        self.retry_time = retry_time
+        self.endpoint = endpoint
+
+    @classmethod
+    def load(cls, path=None, environ=None):
+        """собирает настройки из окружения и файла path.
+        Без path берётся файл из CONFIG_FILE.
+        """
+        environ = os.environ if environ is None else environ
+        path = environ.get('CONFIG_FILE') if path is None else path
+        values = dict(environ)
+        if path:
+            values.update(
+                (name, value)
+                for name, value in dotenv_values(path).items()
+                if value is not None
+            )
+        return cls(
+            values.get('PRACTICUM_TOKEN'),
+            values.get('TELEGRAM_TOKEN'),
+            values.get('TELEGRAM_CHAT_ID'),
+            int(values.get('RETRY_TIME') or DEFAULT_RETRY_TIME),
+            values.get('ENDPOINT') or DEFAULT_ENDPOINT,
+        )
+
+    def changes(self, other):
+        """названия настроек, отличающихся от other."""
+        return [
+            name for name in self.__slots__
+            if getattr(self, name) != getattr(other, name)
+        ]
+
+
+class ConfigReloader:
+    """Перечитывает настройки по запросу и сообщает об этом слушателям.
+
+    path — файл настроек (по умолчанию CONFIG_FILE), watch — другие
+    файлы, изменение которых тоже запрашивает перечитывание, interval —
+    период проверки файлов. Запрос только взводит флаг и будит цикл
+    через lifecycle; перечитывание и вызов слушателей on_reload(old, new)
+    выполняет apply(), который цикл вызывает между опросами.
+    """
+
+    def __init__(self, path=None, watch=(), interval=None, settings=None):
+        self.path = os.getenv('CONFIG_FILE') if path is None else path
+        if interval is None:
+            interval = float(os.getenv(
+                'CONFIG_WATCH_INTERVAL', DEFAULT_WATCH_INTERVAL))
+        self.interval = interval
+        self.settings = settings or Settings.load(self.path)
+        self._files = {
+            file: self._mtime(file)
+            for file in (self.path, *watch) if file
+        }
+        self._requested = threading.Event()
+        self._stopped = threading.Event()
+        self._listeners = []
+        self._lifecycle = None
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def install(self, lifecycle=None, signals=RELOAD_SIGNALS):
+        """перехватывает SIGHUP и запускает слежение за файлами.
+        lifecycle будится при каждом запросе и останавливает слежение.
+        """
+        self._lifecycle = lifecycle
+        if threading.current_thread() is threading.main_thread():
+            SignalRelay(self.request, 'config-signals').install(signals)
+        if self.interval and self._files:
+            threading.Thread(
+                target=self._watch, name='config-watch', daemon=True).start()
+        if lifecycle is not None:
+            lifecycle.on_stop(self._stopped.set)
+        return self
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            self.check_files()
+
+    def on_reload(self, listener):
+        """вызывает listener(old, new) после каждого перечитывания."""
+        self._listeners.append(listener)
+        return listener
+
+    def request(self, reason='request'):
+        """запрашивает перечитывание и будит цикл опроса."""
+        logging.info(f'запрошено перечитывание настроек: {reason}')
+        self._requested.set()
+        if self._lifecycle is not None:
+            self._lifecycle.wake()
+
+    def check_files(self):
+        """запрашивает перечитывание, если отслеживаемый файл изменился."""
+        for path, seen in self._files.items():
+            mtime = self._mtime(path)
+            if mtime != seen:
+                self._files[path] = mtime
+                self.request(f'изменился {path}')
+
+    def apply(self):
+        """перечитывает настройки, если это запрошено.
+        Ошибка чтения или слушателя оставляет прежние настройки.
+        Возвращает True, если настройки перечитаны.
+        """
+        if not self._requested.is_set():
+            return False
+        self._requested.clear()
+        old = self.settings
+        try:
+            new = Settings.load(self.path)
+            for listener in self._listeners:
+                listener(old, new)
+        except Exception as error:
+            logging.error(f'настройки не перечитаны: {error}')
+            return False
+        self.settings = new
+        changed = new.changes(old)
+        logging.info(
+            'настройки перечитаны, изменились: '
+            f'{", ".join(changed) or "только отслеживаемые файлы"}')
+        return True
+
+    def sleep(self, lifecycle, timeout):
+        """ждёт как lifecycle.wait, перечитывая настройки по запросу.
+        Перечитывание не прерывает ожидание, поэтому опрос не сдвигается.
+        Возвращает True, если запрошена остановка.
+        """
+        deadline = time.monotonic() + timeout
+        while not lifecycle.wait(deadline - time.monotonic()):
+            self.apply()
+            if time.monotonic() >= deadline:
+                return False
+        return True
@@ -0,0 +1,232 @@
+"""Очередь исходящих сообщений в Telegram.
+
+Опрос API кладёт сообщения в очередь и сразу продолжает работу, а
+отдельный поток-отправитель доставляет их: склеивает несколько
+сообщений одному чату в одно, соблюдает лимиты Telegram на чат и на
+бота целиком и повторяет отправку с отступом при временных ошибках
+API. Сообщения, которые Telegram отклонил или не принял за
+max_attempts попыток, отбрасываются и учитываются в MESSAGES_DROPPED.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from exceptions import BudgetExceeded, CircuitOpen, TelegramRejected
+from metrics import MESSAGES_DROPPED, TELEGRAM_LATENCY
+from polling import retry_after_of
+
+MAX_MESSAGE_LENGTH = 4096
+TELEGRAM_GLOBAL_RATE = 30
+SEPARATOR = '\n\n'
+
+
+class BudgetedQueue:
+    """Очередь DeliveryQueue, привязанная к бюджету одного цикла опроса.
+
+    Повторяет send_message у telegram.Bot, поэтому передаётся туда же,
+    куда и сама очередь.
+    """
+
+    __slots__ = ('queue', 'budget')
+
+    def __init__(self, queue, budget):
+        self.queue = queue
+        self.budget = budget
+
+    def send_message(self, chat_id, text, **kwargs):
+        """ставит сообщение в очередь на бюджет цикла."""
+        self.queue.send_message(chat_id, text, budget=self.budget, **kwargs)
+
+
+class DeliveryQueue:
+    """Очередь с потоком-отправителем.
+
+    Объект повторяет метод send_message у telegram.Bot, поэтому циклы
+    опроса передают его вместо бота; предохранитель и таймауты Telegram
+    срабатывают только при настоящей отправке в потоке очереди. Бюджет
+    цикла опроса, переданный с сообщением, урезает таймаут его доставки,
+    пока цикл не закончился; после этого доставка идёт с обычным
+    таймаутом, чтобы уведомления не терялись.
+
+    send — функция доставки вида send_message_to(bot, chat_id, text),
+    per_chat_interval — минимальный промежуток между сообщениями в чат,
+    global_rate — максимум сообщений в секунду на всего бота; процессы,
+    делящие токен бота, получают свою долю TELEGRAM_GLOBAL_RATE,
+    max_attempts — число попыток доставки, retry_delay — начальный
+    отступ между попытками.
+    """
+
+    def __init__(self, bot, send, per_chat_interval=1.0,
+                 global_rate=TELEGRAM_GLOBAL_RATE, max_attempts=5,
+                 retry_delay=1.0):
+        self.bot = bot
+        self.send = send
+        self.per_chat_interval = per_chat_interval
+        self.global_interval = 1 / global_rate
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.dropped = 0
+        self._pending = OrderedDict()
+        self._budgets = {}
+        self._attempts = {}
+        self._not_before = {}
+        self._next_global = 0.0
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def __len__(self):
+        with self._condition:
+            return sum(len(messages) for messages in self._pending.values())
+
+    def send_message(self, chat_id, text, budget=None, **kwargs):
+        """ставит сообщение в очередь на доставку в чат.
+        budget — бюджет цикла опроса, который ставит сообщение.
+        """
+        with self._condition:
+            self._pending.setdefault(chat_id, []).append(text)
+            if budget is not None:
+                self._budgets[chat_id] = budget
+            self._condition.notify()
+
+    def with_budget(self, budget):
+        """вид очереди, ставящий сообщения на бюджет цикла budget."""
+        return BudgetedQueue(self, budget)
+
+    def set_global_rate(self, global_rate):
+        """меняет лимит сообщений в секунду на всего бота."""
+        with self._condition:
+            self.global_interval = 1 / global_rate
+            self._condition.notify()
+
+    def start(self):
+        """запускает поток-отправитель."""
+        self._thread = threading.Thread(
+            target=self._run, name='telegram-delivery', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """дожидается доставки очереди и останавливает поток.
+        Возвращает True, если очередь опустела до истечения timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._in_flight:
+                remaining = (
+                    None if deadline is None
+                    else deadline - time.monotonic())
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            drained = not (self._pending or self._in_flight)
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return drained
+
+    def _take(self, now):
+        """выбирает чат, которому уже можно писать, и склеивает сообщения.
+        Возвращает (chat_id, список сообщений, бюджет) или задержку.
+        """
+        if self._next_global > now:
+            return self._next_global - now
+        wait = None
+        for chat_id, messages in self._pending.items():
+            ready_at = max(self._not_before.get(chat_id, 0), self._next_global)
+            if ready_at > now:
+                delay = ready_at - now
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            count, length = 0, 0
+            for message in messages:
+                length += len(message) + (len(SEPARATOR) if count else 0)
+                if count and length > MAX_MESSAGE_LENGTH:
+                    break
+                count += 1
+            taken = messages[:count]
+            del messages[:count]
+            budget = self._budgets.get(chat_id)
+            if not messages:
+                del self._pending[chat_id]
+                self._budgets.pop(chat_id, None)
+            return chat_id, taken, budget
+        return wait
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping:
+                        return
+                    taken = self._take(time.monotonic())
+                    if isinstance(taken, tuple):
+                        break
+                    self._condition.wait(taken)
+                chat_id, messages, budget = taken
+                self._in_flight += 1
+            try:
+                self._deliver(chat_id, messages, budget)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    def _deliver(self, chat_id, messages, budget=None):
+        options = {}
+        if budget is not None and not budget.exceeded():
+            options['budget'] = budget
+        try:
+            with TELEGRAM_LATENCY.time():
+                self.send(
+                    self.bot, chat_id, SEPARATOR.join(messages), **options)
+        except Exception as error:
+            self._retry(chat_id, messages, error)
+        else:
+            with self._condition:
+                self.sent += len(messages)
+                self._attempts.pop(chat_id, None)
+        finally:
+            now = time.monotonic()
+            with self._condition:
+                self._next_global = max(
+                    self._next_global, now + self.global_interval)
+                self._not_before[chat_id] = max(
+                    self._not_before.get(chat_id, 0),
+                    now + self.per_chat_interval)
+
+    def _drop(self, chat_id, messages, reason):
+        self._attempts.pop(chat_id, None)
+        self.dropped += len(messages)
+        MESSAGES_DROPPED.labels(reason).inc(len(messages))
+
+    def _retry(self, chat_id, messages, error):
+        with self._condition:
+            if isinstance(error, TelegramRejected):
+                self._drop(chat_id, messages, 'rejected')
+                logging.error(
+                    f'Telegram отклонил сообщения для {chat_id}, '
+                    f'отброшено {len(messages)}: {error}')
+                return
+            attempt = self._attempts.get(chat_id, 0)
+            if not isinstance(error, (CircuitOpen, BudgetExceeded)):
+                attempt += 1
+            if attempt >= self.max_attempts:
+                self._drop(chat_id, messages, 'attempts')
+                logging.error(
+                    f'сообщения для {chat_id} не доставлены после '
+                    f'{attempt} попыток, отброшено {len(messages)}: {error}')
+                return
+            self._attempts[chat_id] = attempt
+            delay = retry_after_of(error)
+            if delay is None:
+                delay = self.retry_delay * 2 ** (attempt - 1)
+            logging.warning(
+                f'повторим отправку в {chat_id} через {delay} с: {error}')
+            self._not_before[chat_id] = time.monotonic() + delay
+            self._pending[chat_id] = messages + self._pending.get(chat_id, [])
+            self._pending.move_to_end(chat_id, last=False)
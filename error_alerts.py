@@ -0,0 +1,105 @@
+"""Дедупликация сообщений о сбоях.
+
+Текст ошибки содержит параметры запроса и тело ответа, поэтому почти
+каждый сбой уникален. Вместо текста ошибки группируем их по отпечатку:
+классу исключения из exceptions.py и коду ответа HTTP. По каждому
+отпечатку отправляется одно сообщение за окно, а после восстановления —
+сводка с числом сбоев. Сам текст ошибки в Telegram не уходит: в нём
+заголовки запроса с токеном Практикума, поэтому сообщение состоит из
+отпечатка и короткой причины, а подробности остаются в логе.
+Исключения NotForSendException в Telegram не попадают вовсе: они
+только пишутся в лог и учитываются в счётчиках.
+"""
+import logging
+import time
+
+import exceptions
+from metrics import ERRORS
+from polling import status_code_of
+
+DEFAULT_WINDOW = 3600
+DEFAULT_REASON = 'внутренняя ошибка бота'
+REASONS = {
+    'ConectionError': 'нет связи с API Практикума',
+    'PracticumTimeout': 'API Практикума не ответило вовремя',
+    'StatusCodeException': 'API Практикума ответило ошибкой',
+    'TypeException': 'API Практикума вернуло ответ неожиданного вида',
+    'TelegramError': 'Telegram недоступен',
+    'TelegramTimeout': 'Telegram не ответил вовремя',
+    'TelegramRejected': 'Telegram отклонил сообщение',
+    'CircuitOpen': 'запросы к сервису приостановлены после сбоев',
+}
+
+
+def fingerprint(error):
+    """отпечаток ошибки: (класс исключения, код ответа HTTP).
+    Берётся самое вложенное исключение проекта в цепочке причин.
+    """
+    name = type(error).__name__
+    cause = error
+    while cause is not None:
+        if type(cause).__module__ == exceptions.__name__:
+            name = type(cause).__name__
+        cause = cause.__cause__
+    return name, status_code_of(error)
+
+
+def is_sendable(error):
+    """можно ли сообщать об ошибке в Telegram."""
+    return not isinstance(error, exceptions.NotForSendException)
+
+
+def describe(key):
+    """человекочитаемое название отпечатка."""
+    name, status_code = key
+    if status_code is None:
+        return name
+    return f'{name} (код {status_code})'
+
+
+class ErrorAlerter:
+    """Решает, о каких сбоях сообщать, и считает их до восстановления."""
+
+    def __init__(self, window=DEFAULT_WINDOW, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self._counts = {}
+        self._alerted_at = {}
+        self.suppressed = {}
+
+    def alert(self, error):
+        """учитывает сбой и возвращает текст сообщения.
+        None означает, что сбой не для отправки в Telegram или о нём уже
+        сообщали в текущем окне.
+        """
+        key = fingerprint(error)
+        ERRORS.labels(key[0]).inc()
+        if not is_sendable(error):
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            logging.error(f'сбой не для отправки {describe(key)}: {error}')
+            return None
+        self._counts[key] = self._counts.get(key, 0) + 1
+        now = self._clock()
+        alerted_at = self._alerted_at.get(key)
+        if alerted_at is not None and now - alerted_at < self.window:
+            return None
+        self._alerted_at[key] = now
+        reason = REASONS.get(key[0], DEFAULT_REASON)
+        return (
+            f'Сбой в работе программы: {describe(key)}, {reason}. '
+            'Подробности в логах.')
+
+    def recovered(self):
+        """сбрасывает счётчики и возвращает сводку о сбоях или None."""
+        self.suppressed.clear()
+        if not self._counts:
+            return None
+        lines = [
+            f'{describe(key)}: {count}'
+            for key, count in sorted(
+                self._counts.items(), key=lambda item: -item[1])
+        ]
+        self._counts.clear()
+        self._alerted_at.clear()
+        return 'Работа восстановлена. Сбои за время простоя:\n' + (
+            '\n'.join(lines))
@@ -13,7 +13,10 @@ class TypeException(NotForSendException):
 class StatusCodeException(NotForSendException):
     """Обрабатывает ошибку кода ответа страницы."""
 
-    pass
+    def __init__(self, message='', status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
 
 
 class TelegramError(Exception):
@@ -26,3 +29,35 @@ class ConectionError(Exception):
     """Обрабатывает ошибки для отправки в телеграмм."""
 
     pass
+
+
+class CircuitOpen(NotForSendException):
+    """Обрабатывает отказ в запросе из-за разомкнутого предохранителя."""
+
+    def __init__(self, message='', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PracticumTimeout(ConectionError):
+    """Обрабатывает таймаут запроса к API Практикума."""
+
+    pass
+
+
+class TelegramTimeout(TelegramError):
+    """Обрабатывает таймаут отправки сообщения в телеграмм."""
+
+    pass
+
+
+class TelegramRejected(TelegramError):
+    """Обрабатывает отказ Telegram, который не пройдёт при повторе."""
+
+    pass
+
+
+class BudgetExceeded(NotForSendException):
+    """Обрабатывает исчерпание бюджета времени на цикл опроса."""
+
+    pass
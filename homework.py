@@ -1,8 +1,5 @@
 import logging
-import os
-import requests
 import sys
-import telegram
 import time
 
 from dotenv import load_dotenv
@@ -10,21 +7,64 @@ from http import HTTPStatus
 from typing import Dict, List
 
 from exceptions import (
-    StatusCodeException, TypeException,
-    TelegramError, ConectionError
+    BudgetExceeded, NotForSendException, StatusCodeException,
+    TelegramError, ConectionError, PracticumTimeout, TelegramRejected,
+    TelegramTimeout,
 )
+from circuit_breaker import CircuitBreaker
+from commands import ChatState, start_command_listener
+from config import ConfigReloader, Settings
+from delivery import BudgetedQueue, DeliveryQueue
+from error_alerts import ErrorAlerter
+from lazy_import import lazy_import
+from lifecycle import Lifecycle
+from log_setup import setup_logging
+from metrics import (
+    API_LATENCY, EMPTY_RESPONSES, HTTP_POOL_REQUESTS, LOOP_LAG, POLLS,
+    REGISTRY, SKIPPED_HOMEWORKS, STATUS_CHANGES, CALL_TIMEOUTS,
+    start_metrics_server,
+)
+from polling import AdaptivePolicy, Backoff
+from response_cache import ResponseCache
+from schema import (
+    CHUNK_SIZE, parse_homework_statuses, trim_homeworks, validate_response,
+)
+from state_store import open_state_store
+from templates import TemplateRegistry
+from timeouts import Timeouts
 
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
+urllib3 = lazy_import('urllib3')
 
 load_dotenv()
 
 
-PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
-TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+SETTINGS = Settings.load()
+
+PRACTICUM_TOKEN = SETTINGS.practicum_token
+TELEGRAM_TOKEN = SETTINGS.telegram_token
+TELEGRAM_CHAT_ID = SETTINGS.telegram_chat_id
+
+RETRY_TIME = SETTINGS.retry_time
+ENDPOINT = SETTINGS.endpoint
+
+
+def make_headers(token):
+    """формирует заголовки авторизации для API Практикума."""
+    return {'Authorization': f'OAuth {token}'}
 
-RETRY_TIME = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+
+HEADERS = make_headers(PRACTICUM_TOKEN)
+
+HTTP_POOL = None
+
+PRACTICUM_BREAKER = CircuitBreaker.from_env('practicum')
+TELEGRAM_BREAKER = CircuitBreaker.from_env('telegram')
+
+TIMEOUTS = Timeouts.from_env()
+
+STREAM_THRESHOLD = 1024 * 1024
 
 HOMEWORK_STATUSES = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -32,58 +72,278 @@ HOMEWORK_STATUSES = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+TEMPLATES = TemplateRegistry.from_env(HOMEWORK_STATUSES)
+
+
+def apply_settings(settings):
+    """применяет перечитанные настройки к переменным модуля.
+    Новый TELEGRAM_TOKEN вступает в силу только после перезапуска:
+    бот к этому моменту уже создан.
+    """
+    global SETTINGS, PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, RETRY_TIME
+    global ENDPOINT, HEADERS
+    if settings.telegram_token != TELEGRAM_TOKEN:
+        logging.warning('новый TELEGRAM_TOKEN применится после перезапуска')
+    SETTINGS = settings
+    PRACTICUM_TOKEN = settings.practicum_token
+    TELEGRAM_CHAT_ID = settings.telegram_chat_id
+    RETRY_TIME = settings.retry_time
+    ENDPOINT = settings.endpoint
+    HEADERS = make_headers(PRACTICUM_TOKEN)
+
+
+def reload_settings(settings, policy):
+    """применяет перечитанные настройки к опросу одного чата."""
+    apply_settings(settings)
+    if policy.interval != RETRY_TIME:
+        policy.set_interval(RETRY_TIME)
+
+
+def install_http_pool(pool):
+    """подключает пул соединений для запросов к API.
+    None возвращает прямые вызовы requests.get.
+    """
+    global HTTP_POOL
+    HTTP_POOL = pool
+
+
+@REGISTRY.on_collect
+def collect_http_pool():
+    """переносит счётчики пула HTTP_POOL в метрики."""
+    if HTTP_POOL is None:
+        return
+    stats = HTTP_POOL.stats()
+    HTTP_POOL_REQUESTS.labels('hit').set(stats['hits'])
+    HTTP_POOL_REQUESTS.labels('miss').set(stats['misses'])
+
 
 def send_message(bot, message):
-    """отправляет сообщение в Telegram чат."""
-    try:
-        logging.info(f'Отправляем сообщение: {message}')
+    """отправляет сообщение в Telegram чат.
+    В цикле опроса bot — очередь DeliveryQueue, обычно привязанная к
+    бюджету цикла через with_budget: сообщение только ставится в
+    очередь, а доставляет его send_message_to в потоке очереди. Любой
+    другой бот отправляет сразу через send_message_to, с таймаутом,
+    предохранителем и исключениями проекта.
+    """
+    logging.info(f'Отправляем сообщение: {message}')
+    if isinstance(bot, (DeliveryQueue, BudgetedQueue)):
         bot.send_message(TELEGRAM_CHAT_ID, message)
+    else:
+        send_message_to(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_message_to(bot, chat_id, message, budget=None):
+    """доставляет сообщение в чат через бота Telegram.
+    Функция доставки DeliveryQueue: только здесь запросы к Telegram
+    проходят через TELEGRAM_BREAKER. Таймаут урезается до остатка
+    бюджета цикла budget.
+    """
+    timeout = TIMEOUTS.telegram_timeout(budget)
+    TELEGRAM_BREAKER.allow()
+    try:
+        logging.info(f'Доставляем сообщение в {chat_id}: {message}')
+        bot.send_message(chat_id, message, timeout=timeout)
+    except telegram.error.TimedOut as error:
+        TELEGRAM_BREAKER.failure()
+        CALL_TIMEOUTS.labels('telegram').inc()
+        raise TelegramTimeout(
+            f'Сообщение {message} не отправлено за '
+            f'{timeout} с: {error}') from error
     except telegram.error.TelegramError as error:
-        raise TelegramError(f'Сообщение {message} не отправлено {error}')
+        if is_telegram_outage(error):
+            TELEGRAM_BREAKER.failure()
+            raise TelegramError(
+                f'Сообщение {message} не отправлено {error}') from error
+        TELEGRAM_BREAKER.success()
+        raise TelegramRejected(
+            f'Сообщение {message} отклонено Telegram: {error}') from error
+    except Exception:
+        TELEGRAM_BREAKER.failure()
+        raise
     else:
+        TELEGRAM_BREAKER.success()
         logging.info('Сообщение отправлено! Ура, товарищи!')
 
 
+def is_telegram_outage(error):
+    """говорит ли ошибка Telegram о недоступности самого сервиса.
+    BadRequest и Unauthorized относятся к конкретному чату или боту.
+    """
+    if isinstance(error, telegram.error.BadRequest):
+        return False
+    return isinstance(
+        error, (telegram.error.NetworkError, telegram.error.RetryAfter))
+
+
+def request_api(get, request, budget=None):
+    """выполняет запрос к API Практикума через PRACTICUM_BREAKER.
+    Сбоем сервиса считаются исключения запроса и ответы 5xx и 429.
+    Таймауты берутся из TIMEOUTS и урезаются до остатка бюджета цикла.
+    """
+    request = {'timeout': TIMEOUTS.practicum(budget), **request}
+    PRACTICUM_BREAKER.allow()
+    try:
+        with API_LATENCY.time():
+            response = get(**request)
+    except Exception as error:
+        exceeded = budget_error(error, request['timeout'])
+        if exceeded is not None:
+            PRACTICUM_BREAKER.release()
+            raise exceeded from error
+        PRACTICUM_BREAKER.failure()
+        raise
+    if (response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or response.status_code == HTTPStatus.TOO_MANY_REQUESTS):
+        PRACTICUM_BREAKER.failure()
+    else:
+        PRACTICUM_BREAKER.success()
+    return response
+
+
 def get_api_answer(current_timestamp):
     """делает запрос к эндпоинту API-сервиса."""
+    return fetch_homework_statuses(current_timestamp, HEADERS)
+
+
+def fetch_homework_statuses(current_timestamp, headers, cache=None,
+                            budget=None):
+    """делает запрос к эндпоинту API-сервиса с заданными заголовками.
+    Позволяет опрашивать API от имени любого токена. С кэшем ответов
+    запрос становится условным и при ответе 304 возвращается None.
+    budget — общий бюджет цикла опроса; без него запрос ограничен
+    только таймаутами.
+    """
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(ENDPOINT, headers)
+        conditional = cache.conditional_headers(cache_key)
+        if conditional:
+            headers = {**headers, **conditional}
     dict_for_response = {
         'url': ENDPOINT,
-        'headers': HEADERS,
+        'headers': headers,
         'params': params,
+        'stream': True,
+        'timeout': TIMEOUTS.practicum(budget),
     }
     try:
         logging.info('начали запрос к API яндкс.практикума')
-        response = requests.get(**dict_for_response)
-        if response.status_code != HTTPStatus.OK:
-            raise StatusCodeException(
-                f'Запрос с параметрами {dict_for_response}, не прошёл'
-                f'функции get_api_answer получила код: {response.status_code}'
-                f'Какова причина остановки?: {response.reason}'
-                f'Текст {response.text}'
-            )
-        return response.json()
+        get = requests.get if HTTP_POOL is None else HTTP_POOL.get
+        POLLS.inc()
+        response = request_api(get, dict_for_response, budget)
+        try:
+            return read_response(
+                response, dict_for_response, cache, cache_key, budget)
+        finally:
+            if isinstance(response, requests.Response):
+                response.close()
+    except NotForSendException:
+        raise
     except Exception as error:
-        raise ConectionError(
-            f'проблема с подключением:{error}'
-            f'Запрос выполняли вот с какими параметрами {dict_for_response}'
+        exceeded = budget_error(error, dict_for_response['timeout'])
+        if exceeded is not None:
+            raise exceeded from error
+        raise connection_error(error, dict_for_response) from error
+
+
+def budget_error(error, timeout):
+    """исключение для таймаута, урезанного бюджетом цикла.
+    Такой таймаут говорит об исчерпании бюджета цикла, а не о сбое API:
+    опрос откладывается, а предохранитель и оповещения его не считают.
+    None, если таймаут не урезался или ошибка — не таймаут.
+    """
+    if timeout == TIMEOUTS.practicum() or not is_timeout(error):
+        return None
+    return BudgetExceeded(
+        f'таймаут {timeout}, урезанный бюджетом цикла, истёк; '
+        f'опрос отложен до следующего цикла: {error}')
+
+
+def read_response(response, request, cache=None, cache_key=None,
+                  budget=None):
+    """проверяет код ответа API и разбирает тело потоком.
+    При ответе 304 на условный запрос возвращается None.
+    """
+    if (cache is not None
+            and response.status_code == HTTPStatus.NOT_MODIFIED):
+        logging.info('ответ API не изменился')
+        EMPTY_RESPONSES.inc()
+        cache.not_modified(cache_key)
+        return None
+    if response.status_code != HTTPStatus.OK:
+        raise StatusCodeException(
+            f'Запрос с параметрами {request}, не прошёл'
+            f'функции get_api_answer получила код: {response.status_code}'
+            f'Какова причина остановки?: {response.reason}'
+            f'Текст {response.text}',
+            status_code=response.status_code,
+            retry_after=response.headers.get('Retry-After'),
+        )
+    if cache is not None:
+        cache.modified()
+        cache.store(cache_key, response)
+    return decode_response(response, budget)
+
+
+def connection_error(error, request):
+    """исключение проекта для сбоя запроса к API.
+    Таймауты выделяются в PracticumTimeout и учитываются в метриках.
+    """
+    if is_timeout(error):
+        CALL_TIMEOUTS.labels('practicum').inc()
+        return PracticumTimeout(
+            f'API не ответило за отведённое время: {error}'
+            f'Запрос выполняли вот с какими параметрами {request}'
         )
+    return ConectionError(
+        f'проблема с подключением:{error}'
+        f'Запрос выполняли вот с какими параметрами {request}'
+    )
+
+
+def is_timeout(error):
+    """истёк ли таймаут соединения или чтения.
+    requests при потоковом чтении заворачивает таймаут urllib3 в
+    ConnectionError, поэтому проверяется и его причина.
+    """
+    if isinstance(error, (requests.Timeout, TimeoutError)):
+        return True
+    reason = error.args[0] if error.args else None
+    return isinstance(reason, urllib3.exceptions.TimeoutError)
+
+
+def decode_response(response, budget=None):
+    """разбирает тело ответа API.
+    Обычный ответ, не длиннее STREAM_THRESHOLD байт по Content-Length,
+    разбирается json(): C-парсер вдвое-вчетверо быстрее потокового, а
+    структуру проверит check_response. Длинную историю или ответ без
+    Content-Length запрос с stream=True позволяет разобрать потоково:
+    тело читается из сокета по кускам, а с budget чтение тела укладывается
+    в бюджет цикла. В обоих случаях от домашек остаются только поля,
+    нужные для уведомлений.
+    """
+    if isinstance(response, requests.Response) and is_large(response):
+        chunks = response.iter_content(CHUNK_SIZE)
+        if budget is not None:
+            chunks = budget.guard(chunks)
+        return parse_homework_statuses(chunks, TEMPLATES.fields)
+    return trim_homeworks(response.json(), TEMPLATES.fields)
+
+
+def is_large(response):
+    """стоит ли разбирать тело ответа потоково."""
+    length = response.headers.get('Content-Length', '')
+    return not length.isdigit() or int(length) > STREAM_THRESHOLD
 
 
 def check_response(response: Dict) -> List:
     """проверяет ответ API на корректность."""
     logging.info('начинаем проверку ответа от сервера')
-    if not isinstance(response, Dict):
-        raise TypeError(
-            'список домашек это не словарь')
-    if 'homeworks' not in response or 'current_date' not in response:
-        raise TypeException(
-            'homeworks или current_date нет в запросе')
-    homework = response.get('homeworks')
-    if not isinstance(homework, List):
-        raise KeyError(
-            'под ключом `homeworks` домашки приходят не в виде списка')
+    homework = validate_response(response)
+    if not homework:
+        EMPTY_RESPONSES.inc()
     return homework
 
 
@@ -91,19 +351,93 @@ def parse_status(homework):
     """Извлекает статус домашней работы.
     и формулирует строку сообщения для отправки.
     """
-    homework_status = homework.get('status')
+    return format_status(homework)
+
+
+def format_status(homework, locale=None):
+    """формулирует сообщение о статусе домашки на языке locale.
+    Шаблоны берутся из реестра TEMPLATES, собранного при запуске.
+    """
     if 'homework_name' not in homework:
         raise KeyError(
             f'нет названия у работы {homework}')
-    if homework_status not in HOMEWORK_STATUSES:
-        raise ValueError(
-            f'Статуса {homework_status} нет в словаре {HOMEWORK_STATUSES}')
-    return(
-        'Изменился статус проверки работы "{hw_name}" вердикт: {verdict}'.
-        format(
-            hw_name=homework.get('homework_name'),
-            verdict=HOMEWORK_STATUSES[homework_status])
-    )
+    return TEMPLATES.render(homework, locale)
+
+
+def status_changes(homeworks, statuses, locale=None):
+    """находит домашки ответа API, статус которых изменился.
+    API отдаёт домашки от новых к старым, а тройки (название, статус,
+    сообщение) выдаются от старых к новым, как их выдаёт detect_changes.
+    """
+    return detect_changes(reversed(homeworks), statuses, locale)
+
+
+def detect_changes(items, statuses, locale=None, counts=None):
+    """выдаёт изменения статусов домашек items в порядке их следования.
+    statuses — индекс последних известных статусов по названию работы.
+    Выдаёт тройки (название, статус, сообщение). Домашки без названия
+    или с неизвестным статусом пропускаются, чтобы не задерживать
+    уведомления об остальных, и считаются в counts['skipped'].
+    """
+    for homework in items:
+        name = homework.get('homework_name')
+        status = homework.get('status')
+        if name is not None and statuses.get(name) == status:
+            continue
+        try:
+            message = format_status(homework, locale)
+        except (KeyError, ValueError) as error:
+            SKIPPED_HOMEWORKS.inc()
+            logging.warning(f'домашка пропущена: {error}')
+            if counts is not None:
+                counts['skipped'] += 1
+            continue
+        STATUS_CHANGES.inc()
+        yield name, status, message
+
+
+def notify_changes(bot, response, chat):
+    """ставит в очередь уведомления обо всех изменившихся статусах.
+    Статусы чата обновляются сразу после постановки в очередь: о
+    доставке отвечает DeliveryQueue, а потерянные ею сообщения
+    учитываются в счётчике MESSAGES_DROPPED.
+    """
+    homeworks = check_response(response)
+    changes = list(status_changes(homeworks, chat.statuses))
+    if not changes:
+        logging.info('нет новых статусов')
+    for name, status, message in changes:
+        send_message(bot, message)
+        chat.statuses[name] = status
+        chat.remember(message)
+    return changes
+
+
+def restore_report(saved_report):
+    """приводит сохранённый отчёт к виду {'statuses': {...}}."""
+    report = {'statuses': {}}
+    if isinstance(saved_report, Dict):
+        report['statuses'].update(saved_report.get('statuses') or {})
+    return report
+
+
+def restore_chat(store):
+    """возвращает курсор опроса и отчёт чата из хранилища.
+    Если состояния нет, опрос начинается с текущего момента.
+    """
+    state = store.load(TELEGRAM_CHAT_ID)
+    if state is None:
+        return int(time.time()), restore_report(None)
+    current_timestamp, saved_report = state
+    logging.info(f'продолжаем опрос с {current_timestamp}')
+    return current_timestamp, restore_report(saved_report)
+
+
+def make_bot(token, **kwargs):
+    """создаёт бота Telegram с таймаутами соединения и чтения TIMEOUTS."""
+    request = telegram.utils.request.Request(
+        connect_timeout=TIMEOUTS.connect, read_timeout=TIMEOUTS.telegram)
+    return telegram.Bot(token=token, request=request, **kwargs)
 
 
 def check_tokens():
@@ -119,50 +453,68 @@ def main():
             'PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID'
         )
         sys.exit('отсутствуют обязательные переменные окружения')
-    current_report = {'name': '', 'messages': '', }
-    prev_report: Dict = current_report.copy()
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    while True:
+    lifecycle = Lifecycle().install()
+    store = open_state_store()
+    lifecycle.on_shutdown(lambda remaining: store.close())
+    current_timestamp, report = restore_chat(store)
+    chat = ChatState(report['statuses'])
+    telegram_bot = make_bot(TELEGRAM_TOKEN)
+    bot = DeliveryQueue(telegram_bot, send_message_to).start()
+    lifecycle.on_shutdown(lambda remaining: bot.stop(timeout=remaining))
+
+    def lookup(chat_id):
+        return chat if str(chat_id) == str(TELEGRAM_CHAT_ID) else None
+
+    start_command_listener(
+        telegram_bot, bot.send_message, lookup, TEMPLATES.verdicts(),
+        lifecycle)
+    from http_pool import HttpPool
+    install_http_pool(HttpPool.from_env(
+        defaults={'pool_connections': 1, 'pool_maxsize': 1}))
+    response_cache = ResponseCache(maxsize=1)
+    policy = AdaptivePolicy(RETRY_TIME)
+    reloader = ConfigReloader(settings=SETTINGS).install(lifecycle)
+    reloader.on_reload(lambda old, new: reload_settings(new, policy))
+    backoff = Backoff()
+    alerter = ErrorAlerter()
+    start_metrics_server()
+    wake_at = time.time()
+    while not lifecycle.stopping:
+        LOOP_LAG.set(max(time.time() - wake_at, 0))
+        budget = TIMEOUTS.budget()
+        queue = bot.with_budget(budget)
         try:
-            response = get_api_answer(current_timestamp)
-            current_timestamp = response['current_date']
-            homeworks = check_response(response)
-            if homeworks:
-                homework = homeworks[0]
-                current_report['name'] = homework.get('homework_name')
-                message = parse_status(homework)
-                current_report['messages'] = message
-            else:
-                current_report['messages'] = 'нет новых статусов'
-            if current_report != prev_report:
-                send_message(bot, message)
-                prev_report = current_report.copy()
-            else:
-                logging.info('нет новых статусов')
+            if chat.paused:
+                logging.info('опрос приостановлен командой /pause')
+                continue
+            response = fetch_homework_statuses(
+                current_timestamp, HEADERS, response_cache, budget)
+            changes = []
+            if response is not None:
+                changes = notify_changes(queue, response, chat)
+                current_timestamp = response['current_date']
+            summary = alerter.recovered()
+            if summary:
+                send_message(queue, summary)
+            backoff.success(changed=bool(changes))
+            store.save(TELEGRAM_CHAT_ID, current_timestamp, report)
         except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            current_report['messages'] = message
-            if current_report != prev_report:
-                send_message(bot, message)
-                prev_report = current_report.copy()
-            logging.error(message)
+            backoff.failure(error)
+            logging.error(f'Сбой в работе программы: {error}')
+            message = alerter.alert(error)
+            if message:
+                send_message(queue, message)
         finally:
-            time.sleep(RETRY_TIME)
+            delay = policy.delay(backoff, report['statuses'])
+            wake_at = time.time() + delay
+            reloader.sleep(lifecycle, delay)
+    lifecycle.shutdown()
 
 
 if __name__ == '__main__':
-
-    BASE_LOG_DIR = 'program.log'
-
-    logging.basicConfig(
-        format='%(asctime)s - %(levelname)s - %(message)s - %(lineno)s',
-        level=logging.DEBUG,
-        encoding="UTF-8",
-        handlers=[
-            logging.FileHandler(f'{BASE_LOG_DIR}', 'a', 'utf-8'),
-            logging.StreamHandler(stream=sys.stdout),
-        ],
-    )
-
-    main()
+    setup_logging()
+    if sys.argv[1:2] == ['backfill']:
+        import backfill
+        backfill.main(sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,115 @@
+"""Пул постоянных HTTP-соединений для запросов к API Практикума.
+
+Вместо нового TCP+TLS соединения на каждый опрос запросы идут через
+общую requests.Session: соединения переиспользуются (keep-alive),
+а счётчики попаданий и промахов пула доступны через stats() и в
+метриках (homework.collect_http_pool).
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter, сохраняющий счётчики пулов urllib3 при их вытеснении."""
+
+    def __init__(self, *args, **kwargs):
+        self._lock = threading.Lock()
+        self._disposed_requests = 0
+        self._disposed_connections = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        """создаёт менеджер пулов и перехватывает вытеснение пулов."""
+        super().init_poolmanager(*args, **kwargs)
+        pools = self.poolmanager.pools
+        dispose = pools.dispose_func
+
+        def dispose_counting(pool):
+            with self._lock:
+                self._disposed_requests += pool.num_requests
+                self._disposed_connections += pool.num_connections
+            if dispose is not None:
+                dispose(pool)
+
+        pools.dispose_func = dispose_counting
+
+    def counters(self):
+        """возвращает пару (запросов, новых соединений) по всем пулам."""
+        pools = self.poolmanager.pools
+        with self._lock:
+            requests_count = self._disposed_requests
+            connections = self._disposed_connections
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_count += pool.num_requests
+                connections += pool.num_connections
+        return requests_count, connections
+
+
+class HttpPool:
+    """Переиспользуемая сессия с настраиваемым пулом соединений.
+
+    pool_connections — сколько хостов держать в кэше пулов,
+    pool_maxsize — максимум соединений к одному хосту,
+    pool_block — ждать свободного соединения вместо открытия лишнего.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keep_alive=True):
+        self.adapter = CountingAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    @classmethod
+    def from_env(cls, defaults=None, **overrides):
+        """создаёт пул по переменным окружения HTTP_POOL_*.
+        defaults заменяет DEFAULT_POOL_* для переменных, которых нет в
+        окружении; overrides важнее окружения.
+        """
+        defaults = {
+            'pool_connections': DEFAULT_POOL_CONNECTIONS,
+            'pool_maxsize': DEFAULT_POOL_MAXSIZE,
+            **(defaults or {}),
+        }
+        options = {
+            'pool_connections': int(os.getenv(
+                'HTTP_POOL_CONNECTIONS', defaults['pool_connections'])),
+            'pool_maxsize': int(os.getenv(
+                'HTTP_POOL_MAXSIZE', defaults['pool_maxsize'])),
+            'pool_block': os.getenv('HTTP_POOL_BLOCK', '0') == '1',
+            'keep_alive': os.getenv('HTTP_KEEP_ALIVE', '1') == '1',
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def get(self, url, **kwargs):
+        """выполняет GET-запрос через общую сессию."""
+        return self.session.get(url, **kwargs)
+
+    def stats(self):
+        """счётчики пула: попадания — запросы по готовому соединению."""
+        requests_count, misses = self.adapter.counters()
+        return {
+            'requests': requests_count,
+            'hits': max(requests_count - misses, 0),
+            'misses': misses,
+        }
+
+    def close(self):
+        """закрывает все соединения пула."""
+        self.session.close()
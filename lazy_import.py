@@ -0,0 +1,34 @@
+"""Отложенный импорт тяжёлых зависимостей.
+
+requests и python-telegram-bot вместе с их зависимостями занимают
+большую часть времени запуска, хотя при отсутствии токенов и в
+большинстве тестов не нужны вовсе. lazy_import() регистрирует модуль
+в sys.modules, но выполняет его только при первом обращении к
+атрибуту, поэтому monkeypatch(requests, 'get', ...) и обычный
+``import requests`` в других модулях продолжают работать с тем же
+объектом модуля.
+
+Загрузка при первом обращении в Python 3.11 не защищена блокировкой,
+поэтому точки входа обращаются к модулям в главном потоке до запуска
+фоновых потоков (make_bot, HttpPool).
+"""
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """модуль name, который загрузится при первом обращении к атрибуту.
+    Уже загруженный модуль возвращается как есть.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'нет модуля {name}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,179 @@
+"""Корректная остановка процесса по сигналу.
+
+SIGTERM (так платформа останавливает worker из Procfile) и SIGINT не
+убивают цикл опроса посреди работы, а только взводят флаг остановки:
+ожидание до следующего опроса прерывается сразу, текущий опрос
+доводится до конца, затем по очереди выполняются обработчики
+остановки — доставка очереди сообщений, запись состояния на диск —
+в пределах общего срока SHUTDOWN_TIMEOUT секунд, отсчитываемого от
+запроса остановки.
+
+Обработчик сигнала прерывает главный поток в любом месте, в том числе
+посреди записи в лог, пока занята нереентерабельная блокировка
+очереди логов. Поэтому обработчики сигналов только взводят Event, а
+логирование и слушатели выполняются потоком SignalRelay.
+"""
+import logging
+import os
+import signal
+import threading
+import time
+
+DEFAULT_SHUTDOWN_TIMEOUT = 25
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class SignalRelay:
+    """Переносит реакцию на сигналы из обработчика в отдельный поток.
+
+    Обработчик запоминает сигнал и взводит Event, которого главный поток
+    никогда не ждёт; callback(имя сигнала) вызывается уже из потока name.
+    """
+
+    def __init__(self, callback, name):
+        self.callback = callback
+        self.name = name
+        self._signalled = threading.Event()
+        self._signum = None
+        self._thread = None
+
+    def install(self, signals):
+        """перехватывает signals; работает только в главном потоке."""
+        for signum in signals:
+            signal.signal(signum, self._on_signal)
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._relay, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def _on_signal(self, signum, frame):
+        self._signum = signum
+        self._signalled.set()
+
+    def _relay(self):
+        while True:
+            self._signalled.wait()
+            self._signalled.clear()
+            try:
+                self.callback(signal.Signals(self._signum).name)
+            except Exception as error:
+                logging.error(f'сбой обработки сигнала: {error}')
+
+
+class Lifecycle:
+    """Флаг остановки процесса и обработчики завершения.
+
+    timeout — сколько секунд всего отводится на остановку, считая от
+    запроса остановки: на доведение начатых опросов и на обработчики;
+    по умолчанию берётся из SHUTDOWN_TIMEOUT.
+    """
+
+    def __init__(self, timeout=None, clock=time.monotonic):
+        if timeout is None:
+            timeout = float(os.getenv(
+                'SHUTDOWN_TIMEOUT', DEFAULT_SHUTDOWN_TIMEOUT))
+        self.timeout = timeout
+        self._clock = clock
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._handlers = []
+        self._listeners = []
+        self._wake_listeners = []
+        self._deadline = None
+        self._relay = SignalRelay(self.stop, 'lifecycle-signals')
+
+    @property
+    def stopping(self):
+        """запрошена ли остановка."""
+        return self._stopping.is_set()
+
+    def install(self, signals=STOP_SIGNALS):
+        """перехватывает сигналы остановки; работает в главном потоке."""
+        if threading.current_thread() is not threading.main_thread():
+            logging.warning('сигналы перехватываются только в главном потоке')
+            return self
+        self._relay.install(signals)
+        return self
+
+    def stop(self, reason='stop'):
+        """запрашивает остановку и будит всех ожидающих."""
+        if self._stopping.is_set():
+            return
+        logging.info(f'получен запрос на остановку: {reason}')
+        self._deadline = self._clock() + self.timeout
+        self._stopping.set()
+        for listener in self._listeners:
+            listener()
+        self.wake()
+
+    def wake(self):
+        """прерывает текущее ожидание wait(), не останавливая процесс.
+        Так цикл опроса узнаёт о запросе на перечитывание настроек.
+        """
+        self._wakeup.set()
+        for listener in self._wake_listeners:
+            listener()
+
+    def wait(self, timeout):
+        """спит timeout секунд, до запроса на остановку или до wake().
+        Возвращает True, если запрошена остановка.
+        """
+        if not self.stopping:
+            self._wakeup.wait(max(timeout, 0))
+            self._wakeup.clear()
+        return self.stopping
+
+    def on_stop(self, listener):
+        """вызывает listener() сразу при запросе остановки.
+        Нужен для ожиданий, которые не умеют смотреть на Event.
+        """
+        self._listeners.append(listener)
+        if self.stopping:
+            listener()
+
+    def on_wake(self, listener):
+        """вызывает listener() при каждом wake(), в том числе при остановке.
+        Нужен для ожиданий, которые не умеют смотреть на Event.
+        """
+        self._wake_listeners.append(listener)
+        if self.stopping:
+            listener()
+
+    def on_shutdown(self, handler):
+        """регистрирует обработчик остановки handler(оставшееся время).
+        Обработчики выполняются в обратном порядке регистрации.
+        """
+        self._handlers.append(handler)
+        return handler
+
+    def remaining(self):
+        """сколько секунд осталось от общего срока остановки.
+        До запроса остановки срок ещё не начался и равен timeout.
+        """
+        if self._deadline is None:
+            return self.timeout
+        return max(self._deadline - self._clock(), 0)
+
+    def shutdown(self):
+        """выполняет обработчики остановки в пределах общего срока.
+        Срок идёт от запроса остановки, а без него — от вызова shutdown.
+        Возвращает True, если все они уложились в срок без ошибок.
+        """
+        deadline = self._deadline
+        if deadline is None:
+            deadline = self._clock() + self.timeout
+        clean = True
+        while self._handlers:
+            handler = self._handlers.pop()
+            remaining = deadline - self._clock()
+            try:
+                if handler(max(remaining, 0)) is False:
+                    clean = False
+            except Exception as error:
+                clean = False
+                logging.error(f'сбой при остановке: {error}')
+        if self._clock() > deadline:
+            clean = False
+            logging.warning('остановка не уложилась в отведённое время')
+        return clean
@@ -0,0 +1,216 @@
+"""Локальные заменители API Практикума и Telegram Bot API.
+
+FakePracticum отдаёт homework_statuses по настоящему HTTP: у каждого
+токена своя домашка, статус которой меняется по расписанию
+(reviewing → rejected → reviewing → approved). Задержка ответа и доля
+ошибок 500 настраиваются. FakeTelegram принимает sendMessage так же,
+как api.telegram.org, и запоминает время получения каждого сообщения;
+его адрес передаётся в telegram.Bot(base_url=...).
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TRANSITIONS = ('reviewing', 'rejected', 'reviewing', 'approved')
+HOMEWORK_PATH = '/api/user_api/homework_statuses/'
+
+
+class FakeServer:
+    """Общая часть: HTTP-сервер в фоновом потоке."""
+
+    handler = None
+
+    def __init__(self, latency=0.0, error_rate=0.0, rand=random.random):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rand = rand
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        """запускает сервер на свободном локальном порту."""
+        handler = type('Handler', (self.handler,), {'fake': self})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name=type(self).__name__,
+            daemon=True).start()
+        return self
+
+    def stop(self):
+        """останавливает сервер."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def url(self):
+        """адрес сервера."""
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def _should_fail(self):
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._rand() < self.error_rate:
+                self.errors += 1
+                return True
+        return False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fake = None
+
+    def _reply(self, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _PracticumHandler(_Handler):
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        authorization = self.headers.get('Authorization', '')
+        if parts.path != HOMEWORK_PATH:
+            self._reply(404, {'message': 'not found'})
+            return
+        if not authorization.startswith('OAuth '):
+            self._reply(401, {
+                'message': 'Учетные данные не были предоставлены.'})
+            return
+        if self.fake._should_fail():
+            self._reply(500, {'message': 'internal error'})
+            return
+        try:
+            from_date = int(parse_qs(parts.query)['from_date'][0])
+        except (KeyError, ValueError):
+            self._reply(400, {'message': 'from_date обязателен'})
+            return
+        self._reply(200, self.fake.homework_statuses(
+            authorization[len('OAuth '):], from_date))
+
+
+class FakePracticum(FakeServer):
+    """Заменитель API Практикума.
+
+    step — секунды между сменами статуса домашки; первая смена каждого
+    токена сдвинута на случайную долю step, чтобы студенты не менялись
+    одновременно. started — момент отсчёта расписания.
+    """
+
+    handler = _PracticumHandler
+
+    def __init__(self, step=1.0, started=None, **kwargs):
+        super().__init__(**kwargs)
+        self.step = step
+        self.started = time.time() if started is None else started
+
+    @property
+    def endpoint(self):
+        """адрес homework_statuses для homework.ENDPOINT."""
+        return self.url + HOMEWORK_PATH
+
+    def homework_name(self, token):
+        """название домашки студента с токеном token."""
+        return f'{token}__homework.zip'
+
+    def changes(self, token, until=None):
+        """список (статус, момент смены) домашки токена до until."""
+        until = time.time() if until is None else until
+        offset = zlib.crc32(token.encode()) % 1000 / 1000 * self.step
+        moments = [
+            (status, self.started + offset + index * self.step)
+            for index, status in enumerate(TRANSITIONS)
+        ]
+        return [(status, moment) for status, moment in moments
+                if moment <= until]
+
+    def homework_statuses(self, token, from_date):
+        """тело ответа homework_statuses для токена."""
+        now = time.time()
+        changes = self.changes(token, now)
+        homeworks = []
+        if changes and changes[-1][1] >= from_date:
+            status, moment = changes[-1]
+            homeworks.append({
+                'id': zlib.crc32(token.encode()),
+                'status': status,
+                'homework_name': self.homework_name(token),
+                'reviewer_comment': 'Комментарий ревьюера.',
+                'date_updated': time.strftime(
+                    '%Y-%m-%dT%H:%M:%SZ', time.gmtime(moment)),
+                'lesson_name': 'Нагрузочный тест',
+            })
+        return {'homeworks': homeworks, 'current_date': int(now)}
+
+
+class _TelegramHandler(_Handler):
+    method = re.compile(r'^/bot(?P<token>[^/]+)/(?P<method>\w+)$')
+
+    def do_POST(self):
+        match = self.method.match(urlsplit(self.path).path)
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length).decode('utf-8')
+        if match is None:
+            self._reply(404, {'ok': False, 'description': 'Not Found'})
+            return
+        if self.headers.get('Content-Type', '').startswith(
+                'application/json'):
+            data = json.loads(raw or '{}')
+        else:
+            data = {key: values[0] for key, values in parse_qs(raw).items()}
+        if self.fake._should_fail():
+            self._reply(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            })
+            return
+        if match['method'] != 'sendMessage':
+            self._reply(200, {'ok': True, 'result': True})
+            return
+        self._reply(200, {'ok': True, 'result': self.fake.receive(
+            int(data['chat_id']), data['text'])})
+
+
+class FakeTelegram(FakeServer):
+    """Заменитель Telegram Bot API; error_rate — доля ответов 429."""
+
+    handler = _TelegramHandler
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.messages = []
+
+    @property
+    def base_url(self):
+        """значение base_url для telegram.Bot."""
+        return self.url + '/bot'
+
+    def receive(self, chat_id, text):
+        """запоминает сообщение и возвращает его в формате Bot API."""
+        now = time.time()
+        with self._lock:
+            self.messages.append((chat_id, text, now))
+            message_id = len(self.messages)
+        return {
+            'message_id': message_id,
+            'date': int(now),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text,
+        }
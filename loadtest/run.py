@@ -0,0 +1,160 @@
+"""Нагрузочный тест бота на локальных заменителях API.
+
+Поднимает FakePracticum и FakeTelegram, заводит N подписок и гоняет
+мультитенантный цикл опроса (tenants.run_once или AsyncRunner) заданное
+время. В конце печатает пропускную способность опроса, задержку
+уведомлений от смены статуса до получения сообщения (p50/p99) и
+пиковую память процесса.
+
+    python loadtest/run.py --students 500 --duration 30 --interval 2
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+from async_runner import AsyncRunner  # noqa: E402
+from delivery import DeliveryQueue  # noqa: E402
+from loadtest.fake_servers import FakePracticum, FakeTelegram  # noqa: E402
+from metrics import POLLS  # noqa: E402
+from tenants import PollScheduler, Subscription, run_once  # noqa: E402
+
+FAKE_BOT_TOKEN = '123456:loadtest'
+
+
+def percentile(values, fraction):
+    """перцентиль fraction (0..1) по списку значений."""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = min(int(len(ordered) * fraction), len(ordered) - 1)
+    return ordered[index]
+
+
+def notification_latencies(practicum, telegram_server, students):
+    """задержки уведомлений: от смены статуса до получения сообщения.
+    Сообщения сопоставляются со сменой статуса по названию домашки и
+    вердикту; уведомления о сбоях не учитываются.
+    """
+    statuses = {
+        verdict: status
+        for status, verdict in homework.TEMPLATES.verdicts().items()
+    }
+    names = {
+        practicum.homework_name(token): token for token in students}
+    latencies = []
+    for _, text, received in telegram_server.messages:
+        for line in text.split('\n\n'):
+            name = line.partition('"')[2].partition('"')[0]
+            verdict = line.rpartition('вердикт: ')[2]
+            if name not in names or verdict not in statuses:
+                continue
+            moments = [
+                moment for status, moment
+                in practicum.changes(names[name], received)
+                if status == statuses[verdict]
+            ]
+            if moments:
+                latencies.append(received - moments[-1])
+    return latencies
+
+
+def run_tenants(bot, scheduler, deadline):
+    """синхронный цикл tenants.run_once до deadline."""
+    while time.time() < deadline:
+        _, delay = run_once(bot, scheduler)
+        time.sleep(min(max(delay, 0), max(deadline - time.time(), 0)))
+
+
+def run_async(bot, scheduler, deadline, concurrency):
+    """асинхронный цикл AsyncRunner до deadline."""
+    runner = AsyncRunner(bot, scheduler, concurrency)
+
+    async def limited():
+        try:
+            await asyncio.wait_for(
+                runner.run(), max(deadline - time.time(), 0))
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(limited())
+
+
+def main(argv=None):
+    """Точка входа нагрузочного теста."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument(
+        '--interval', type=float, default=2.0,
+        help='интервал опроса одной подписки, секунд')
+    parser.add_argument(
+        '--step', type=float, default=5.0,
+        help='секунд между сменами статуса домашки')
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0)
+    parser.add_argument(
+        '--global-rate', type=float, default=30,
+        help='лимит сообщений в секунду на бота')
+    parser.add_argument(
+        '--runner', choices=('tenants', 'async'), default='async')
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    practicum = FakePracticum(
+        step=args.step, latency=args.api_latency,
+        error_rate=args.api_error_rate).start()
+    telegram_server = FakeTelegram(
+        latency=args.telegram_latency,
+        error_rate=args.telegram_error_rate).start()
+    homework.ENDPOINT = practicum.endpoint
+    students = [f'student-{index}' for index in range(args.students)]
+    scheduler = PollScheduler(args.interval)
+    for chat_id, token in enumerate(students, start=1):
+        scheduler.add(Subscription(token, chat_id, time.time()))
+    bot = DeliveryQueue(
+        homework.make_bot(FAKE_BOT_TOKEN, base_url=telegram_server.base_url),
+        homework.send_message_to, per_chat_interval=0,
+        global_rate=args.global_rate).start()
+
+    polls_before = POLLS.value()
+    started = time.time()
+    deadline = started + args.duration
+    if args.runner == 'async':
+        run_async(bot, scheduler, deadline, args.concurrency)
+    else:
+        run_tenants(bot, scheduler, deadline)
+    elapsed = time.time() - started
+    drained = bot.stop(timeout=args.duration)
+    practicum.stop()
+    telegram_server.stop()
+
+    polls = POLLS.value() - polls_before
+    latencies = notification_latencies(practicum, telegram_server, students)
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f'раннер: {args.runner}, студентов: {args.students}, '
+          f'потоков: {threading.active_count()}')
+    print(f'опросов: {polls} за {elapsed:.1f} с '
+          f'({polls / elapsed:.1f} опросов/с), '
+          f'ошибок API: {practicum.errors}')
+    print(f'сообщений: {len(telegram_server.messages)}, '
+          f'уведомлений о статусах: {len(latencies)}, '
+          f'очередь доставлена: {"да" if drained else "нет"}')
+    if latencies:
+        print(f'задержка уведомления: p50 {percentile(latencies, 0.5):.2f} с, '
+              f'p99 {percentile(latencies, 0.99):.2f} с, '
+              f'среднее {statistics.mean(latencies):.2f} с')
+    print(f'пиковая память процесса: {peak_kib / 1024:.1f} МиБ')
+
+
+if __name__ == '__main__':
+    main()
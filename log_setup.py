@@ -0,0 +1,115 @@
+"""Неблокирующая настройка логирования с ротацией файлов.
+
+Записи логов кладутся в ограниченную очередь (QueueHandler), а на диск и
+в stdout их пишет отдельный поток (QueueListener). Если очередь
+переполнена, запись отбрасывается, а не задерживает опрос. Размер
+файлов ограничен ротацией по размеру или по времени.
+
+Переменные окружения: LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES,
+LOG_BACKUP_COUNT, LOG_ROTATE_WHEN (например ``midnight``), LOG_JSON.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s - %(lineno)s'
+DEFAULT_LOG_FILE = 'program.log'
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_QUEUE_SIZE = 10000
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну строку JSON.
+    Поле chat_id берётся из extra={'chat_id': ...}, если оно передано.
+    """
+
+    def format(self, record):
+        """собирает словарь полей записи и сериализует его."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'module': record.module,
+            'lineno': record.lineno,
+        }
+        chat_id = getattr(record, 'chat_id', None)
+        if chat_id is not None:
+            data['chat_id'] = chat_id
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который при переполнении очереди теряет запись."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        """кладёт запись в очередь без ожидания."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _file_handler(path, max_bytes, backup_count, when):
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding='utf-8')
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count,
+        encoding='utf-8')
+
+
+def setup_logging(level=None, path=None, max_bytes=None, backup_count=None,
+                  when=None, json_format=None,
+                  queue_size=DEFAULT_QUEUE_SIZE, stream=sys.stdout):
+    """настраивает корневой логгер и запускает поток записи логов.
+    Возвращает QueueListener; он останавливается при выходе из процесса.
+    Пустой путь к файлу отключает запись в файл.
+    """
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    path = os.getenv('LOG_FILE', DEFAULT_LOG_FILE) if path is None else path
+    max_bytes = max_bytes or int(
+        os.getenv('LOG_MAX_BYTES', DEFAULT_MAX_BYTES))
+    backup_count = backup_count or int(
+        os.getenv('LOG_BACKUP_COUNT', DEFAULT_BACKUP_COUNT))
+    when = when or os.getenv('LOG_ROTATE_WHEN')
+    if json_format is None:
+        json_format = os.getenv('LOG_JSON', '0') == '1'
+
+    formatter = (
+        JsonFormatter() if json_format else logging.Formatter(DEFAULT_FORMAT))
+    handlers = [logging.StreamHandler(stream=stream)]
+    if path:
+        handlers.append(_file_handler(path, max_bytes, backup_count, when))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
+
+
+def stop_listener(listener):
+    """дописывает очередь логов, останавливает поток и закрывает файлы."""
+    if listener._thread is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
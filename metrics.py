@@ -0,0 +1,312 @@
+"""Метрики опроса и доставки в текстовом формате Prometheus.
+
+Без внешних зависимостей: счётчики, измерители и гистограммы хранятся
+в памяти процесса, а start_metrics_server() отдаёт их по HTTP на
+локальном порту (путь /metrics).
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    inner = ','.join(
+        '{}="{}"'.format(
+            name, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for name, value in pairs
+    )
+    return '{' + inner + '}'
+
+
+class Metric:
+    """Общая часть метрик: имя, описание и значения по меткам."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def labels(self, *values):
+        """возвращает дочернюю метрику для значений меток."""
+        return _Child(self, tuple(str(value) for value in values))
+
+    def collect(self):
+        """строки метрики в текстовом формате Prometheus."""
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            yield from self._lines(key, value)
+
+    def _lines(self, key, value):
+        labels = _format_labels(self.labelnames, key)
+        yield f'{self.name}{labels} {value}'
+
+
+class _Child:
+    """Метрика с зафиксированными значениями меток."""
+
+    __slots__ = ('_metric', '_key')
+
+    def __init__(self, metric, key):
+        self._metric = metric
+        self._key = key
+
+    def __getattr__(self, name):
+        method = getattr(self._metric, name)
+
+        def bound(*args, **kwargs):
+            return method(*args, key=self._key, **kwargs)
+
+        return bound
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, key=()):
+        """увеличивает счётчик."""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, key=()):
+        """текущее значение счётчика."""
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Gauge(Metric):
+    """Значение, которое может расти и убывать."""
+
+    kind = 'gauge'
+
+    def set(self, value, key=()):
+        """устанавливает значение."""
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, key=()):
+        """увеличивает значение."""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, key=()):
+        """уменьшает значение."""
+        self.inc(-amount, key=key)
+
+    def value(self, key=()):
+        """текущее значение."""
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Histogram(Metric):
+    """Распределение наблюдений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, key=()):
+        """добавляет наблюдение."""
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [
+                    [0] * len(self.buckets), 0, 0.0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            state[1] += 1
+            state[2] += value
+
+    @contextmanager
+    def time(self, key=()):
+        """измеряет длительность блока кода."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, key=key)
+
+    def count(self, key=()):
+        """число наблюдений."""
+        with self._lock:
+            state = self._values.get(key)
+            return 0 if state is None else state[1]
+
+    def _lines(self, key, value):
+        counts, total, amount = value
+        for bound, count in zip(self.buckets, counts):
+            labels = _format_labels(self.labelnames, key, [('le', bound)])
+            yield f'{self.name}_bucket{labels} {count}'
+        labels = _format_labels(self.labelnames, key, [('le', '+Inf')])
+        yield f'{self.name}_bucket{labels} {total}'
+        labels = _format_labels(self.labelnames, key)
+        yield f'{self.name}_count{labels} {total}'
+        yield f'{self.name}_sum{labels} {amount}'
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """регистрирует метрику; повторное имя возвращает существующую."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def on_collect(self, collector):
+        """регистрирует функцию, обновляющую измерители перед выдачей.
+        Так в метрики попадают счётчики, которые ведёт не этот модуль.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def counter(self, *args, **kwargs):
+        """создаёт и регистрирует счётчик."""
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        """создаёт и регистрирует измеритель."""
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        """создаёт и регистрирует гистограмму."""
+        return self.register(Histogram(*args, **kwargs))
+
+    def exposition(self):
+        """все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as error:
+                logging.error(f'не удалось обновить метрики: {error}')
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+API_LATENCY = REGISTRY.histogram(
+    'practicum_api_latency_seconds',
+    'Длительность запроса к API Практикума')
+TELEGRAM_LATENCY = REGISTRY.histogram(
+    'telegram_send_latency_seconds',
+    'Длительность отправки сообщения в Telegram')
+POLLS = REGISTRY.counter(
+    'homework_polls_total', 'Число запросов к API Практикума')
+EMPTY_RESPONSES = REGISTRY.counter(
+    'homework_empty_responses_total',
+    'Ответы API без домашек или с кодом 304')
+STATUS_CHANGES = REGISTRY.counter(
+    'homework_status_changes_total', 'Найденные изменения статусов')
+SKIPPED_HOMEWORKS = REGISTRY.counter(
+    'homework_skipped_total',
+    'Домашки без названия или с неизвестным статусом')
+ERRORS = REGISTRY.counter(
+    'homework_errors_total', 'Сбои по классу исключения',
+    labelnames=('exception',))
+LOOP_LAG = REGISTRY.gauge(
+    'homework_loop_lag_seconds',
+    'Опоздание опроса относительно запланированного времени')
+BREAKER_STATE = REGISTRY.gauge(
+    'circuit_breaker_state',
+    'Состояние предохранителя: 0 — замкнут, 1 — полуоткрыт, 2 — разомкнут',
+    labelnames=('upstream',))
+BREAKER_REJECTIONS = REGISTRY.counter(
+    'circuit_breaker_rejections_total',
+    'Запросы, отклонённые разомкнутым предохранителем',
+    labelnames=('upstream',))
+RATE_LIMIT_WAIT = REGISTRY.histogram(
+    'practicum_rate_limit_wait_seconds',
+    'На сколько лимитер запросов отложил опрос')
+RATE_LIMITED = REGISTRY.counter(
+    'practicum_rate_limited_total',
+    'Опросы, отложенные лимитером, по исчерпанному ведру',
+    labelnames=('limit',))
+CALL_TIMEOUTS = REGISTRY.counter(
+    'outbound_timeouts_total',
+    'Внешние вызовы, прерванные по таймауту',
+    labelnames=('upstream',))
+CYCLE_BUDGET_EXCEEDED = REGISTRY.counter(
+    'homework_cycle_budget_exceeded_total',
+    'Запросы, не начатые из-за исчерпанного бюджета цикла')
+MESSAGES_DROPPED = REGISTRY.counter(
+    'telegram_messages_dropped_total',
+    'Сообщения, так и не доставленные в Telegram',
+    labelnames=('reason',))
+HTTP_POOL_REQUESTS = REGISTRY.gauge(
+    'practicum_http_pool_requests',
+    'Запросы через пул соединений: hit — по готовому соединению, '
+    'miss — с новым',
+    labelnames=('result',))
+WORKER_THROUGHPUT = REGISTRY.gauge(
+    'homework_worker_polls_per_second',
+    'Пропускная способность воркера супервизора',
+    labelnames=('worker',))
+
+
+def start_metrics_server(port=None, registry=REGISTRY, host='127.0.0.1'):
+    """запускает HTTP-сервер метрик в фоновом потоке.
+    Порт берётся из аргумента или METRICS_PORT; без порта сервер
+    не запускается и возвращается None.
+    """
+    port = port if port is not None else os.getenv('METRICS_PORT')
+    if port is None or port == '':
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.exposition().encode('utf-8')
+            self.send_response(200)
+            self.send_header(
+                'Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True)
+    thread.start()
+    logging.info(f'метрики доступны на http://{host}:{port}/metrics')
+    return server
@@ -0,0 +1,117 @@
+"""Адаптивный интервал опроса API вместо постоянного RETRY_TIME.
+
+Пока какая-то работа на ревью, опрашиваем чаще: вердикт скоро.
+Пустые ответы и ошибки постепенно увеличивают интервал (экспоненциально,
+со случайным разбросом), а ответ 429 с Retry-After соблюдается точно.
+"""
+import random
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+REVIEWING = 'reviewing'
+
+
+def parse_retry_after(value, now=None):
+    """переводит значение Retry-After в секунды ожидания.
+    Заголовок бывает числом секунд или HTTP-датой.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        moment = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(moment - now, 0.0)
+
+
+def retry_after_of(error):
+    """ищет Retry-After в ошибке и в цепочке её причин."""
+    while error is not None:
+        if getattr(error, 'retry_after', None) is not None:
+            return parse_retry_after(error.retry_after)
+        error = error.__cause__
+    return None
+
+
+def status_code_of(error):
+    """ищет код ответа HTTP в ошибке и в цепочке её причин."""
+    while error is not None:
+        if getattr(error, 'status_code', None) is not None:
+            return error.status_code
+        error = error.__cause__
+    return None
+
+
+class Backoff:
+    """Состояние адаптивного опроса одной подписки."""
+
+    __slots__ = ('empty_polls', 'failures', 'retry_after')
+
+    def __init__(self):
+        self.empty_polls = 0
+        self.failures = 0
+        self.retry_after = None
+
+    def success(self, changed):
+        """учитывает успешный опрос; changed — были ли новые статусы."""
+        self.failures = 0
+        self.retry_after = None
+        self.empty_polls = 0 if changed else self.empty_polls + 1
+
+    def failure(self, error):
+        """учитывает неудачный опрос."""
+        self.failures += 1
+        self.retry_after = retry_after_of(error)
+        if (self.retry_after is None
+                and status_code_of(error) == HTTPStatus.TOO_MANY_REQUESTS):
+            self.failures += 1
+
+
+class AdaptivePolicy:
+    """Вычисляет задержку до следующего опроса подписки.
+
+    interval — обычный интервал, reviewing_interval — интервал, пока
+    работа на ревью, max_interval — потолок отступа, factor — множитель
+    отступа, jitter — доля случайного разброса задержки.
+    """
+
+    def __init__(self, interval, reviewing_interval=None, max_interval=None,
+                 factor=2.0, jitter=0.1, rand=random.random):
+        self.interval = interval
+        self.reviewing_interval = reviewing_interval or interval / 5
+        self.max_interval = max_interval or interval * 6
+        self.factor = factor
+        self.jitter = jitter
+        self._rand = rand
+
+    def set_interval(self, interval):
+        """меняет обычный интервал, сохраняя пропорции остальных."""
+        scale = interval / self.interval
+        self.interval = interval
+        self.reviewing_interval *= scale
+        self.max_interval *= scale
+
+    def delay(self, backoff, statuses=None):
+        """задержка в секундах до следующего опроса."""
+        if backoff.retry_after is not None:
+            return max(backoff.retry_after, self.reviewing_interval)
+        if backoff.failures:
+            return self._spread(self._backoff(backoff.failures))
+        if statuses and REVIEWING in statuses.values():
+            return self._spread(self.reviewing_interval)
+        return self._spread(self._backoff(backoff.empty_polls))
+
+    def _backoff(self, attempts):
+        return min(
+            self.interval * self.factor ** max(attempts - 1, 0),
+            self.max_interval,
+        )
+
+    def _spread(self, delay):
+        return delay * (1 + self.jitter * (2 * self._rand() - 1))
@@ -0,0 +1,131 @@
+"""Ограничение частоты запросов к API Практикума.
+
+Два ведра токенов: общее на процесс и отдельное на каждый токен
+Практикума. Планировщик опроса спрашивает лимитер перед каждым
+опросом; если токенов нет, опрос откладывается ровно на время, через
+которое они появятся, поэтому запросы идут равномерно, а не пачкой в
+начале каждого интервала.
+
+Переменные окружения (запросов в секунду и размер пачки, 0 отключает
+ограничение): RATE_LIMIT_GLOBAL, RATE_LIMIT_GLOBAL_BURST,
+RATE_LIMIT_PER_TOKEN, RATE_LIMIT_PER_TOKEN_BURST. Общий лимит по
+умолчанию выключен: любая постоянная частота ограничивает число
+подписок, которые процесс успевает опросить за интервал.
+"""
+import os
+
+from metrics import RATE_LIMITED, RATE_LIMIT_WAIT
+
+DEFAULT_GLOBAL_RATE = 0.0
+DEFAULT_PER_TOKEN_RATE = 0.1
+DEFAULT_PER_TOKEN_BURST = 2
+
+
+class TokenBucket:
+    """Ведро: rate токенов в секунду, не больше capacity."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now):
+        """секунды до появления целого токена; 0 — токен есть."""
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """списывает токен."""
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Общее и по-токенное ведро запросов к API.
+
+    rate и per_token_rate — запросов в секунду, burst и per_token_burst —
+    сколько запросов можно сделать подряд после простоя. Нулевая
+    частота отключает соответствующее ограничение.
+    """
+
+    def __init__(self, rate=DEFAULT_GLOBAL_RATE, burst=None,
+                 per_token_rate=DEFAULT_PER_TOKEN_RATE,
+                 per_token_burst=DEFAULT_PER_TOKEN_BURST):
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self.per_token_rate = per_token_rate
+        self.per_token_burst = per_token_burst or 1
+        self._global = None
+        self._buckets = {}
+
+    @classmethod
+    def from_env(cls, share=1.0, **overrides):
+        """создаёт лимитер по переменным окружения RATE_LIMIT_*.
+        share — доля общего лимита, доставшаяся этому процессу.
+        """
+        rate = float(os.getenv('RATE_LIMIT_GLOBAL', DEFAULT_GLOBAL_RATE))
+        burst = float(os.getenv('RATE_LIMIT_GLOBAL_BURST', 0))
+        options = {
+            'rate': rate * share,
+            'burst': max(burst * share, 1) if burst else None,
+            'per_token_rate': float(os.getenv(
+                'RATE_LIMIT_PER_TOKEN', DEFAULT_PER_TOKEN_RATE)),
+            'per_token_burst': float(os.getenv(
+                'RATE_LIMIT_PER_TOKEN_BURST', DEFAULT_PER_TOKEN_BURST)),
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def capacity(self, interval):
+        """сколько запросов общий лимит пропускает за interval секунд.
+        None — общий лимит отключён.
+        """
+        if not self.rate:
+            return None
+        return int(self.rate * interval)
+
+    def set_rate(self, rate, burst=None):
+        """меняет общий лимит; ведро пересоздаётся при следующем запросе."""
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self._global = None
+
+    def try_acquire(self, token, now):
+        """списывает запрос, если его можно сделать сейчас.
+        Возвращает 0 при успехе или секунды, через которые стоит
+        попробовать снова; тогда ничего не списывается.
+        """
+        buckets = []
+        if self.rate:
+            if self._global is None:
+                self._global = TokenBucket(self.rate, self.burst, now)
+            buckets.append(('global', self._global))
+        if self.per_token_rate:
+            bucket = self._buckets.get(token)
+            if bucket is None:
+                bucket = self._buckets[token] = TokenBucket(
+                    self.per_token_rate, self.per_token_burst, now)
+            buckets.append(('token', bucket))
+        wait, limit = 0.0, None
+        for name, bucket in buckets:
+            delay = bucket.wait_time(now)
+            if delay > wait:
+                wait, limit = delay, name
+        if limit is not None:
+            RATE_LIMITED.labels(limit).inc()
+            RATE_LIMIT_WAIT.observe(wait)
+            return wait
+        for _, bucket in buckets:
+            bucket.take()
+        return 0.0
+
+    def forget(self, token):
+        """удаляет ведро токена, например при удалении подписки."""
+        self._buckets.pop(token, None)
@@ -0,0 +1,68 @@
+"""Кэш ответов API Практикума с условными запросами.
+
+Для каждого токена запоминаются ETag и Last-Modified последнего ответа.
+Следующий запрос отправляется с If-None-Match / If-Modified-Since, и
+ответ 304 Not Modified не нужно ни скачивать, ни разбирать.
+"""
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 10000
+
+
+class ResponseCache:
+    """Ограниченный LRU-кэш валидаторов ответов по ключу запроса."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(url, headers):
+        """ключ кэша: адрес эндпоинта и заголовок авторизации."""
+        return url, headers.get('Authorization')
+
+    def conditional_headers(self, key):
+        """заголовки условного запроса для сохранённого ответа."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        etag, last_modified = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, key, response):
+        """запоминает валидаторы ответа, если сервер их прислал."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            if not (etag or last_modified):
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def not_modified(self, key):
+        """отмечает ответ 304 и обновляет позицию ключа в LRU."""
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def modified(self):
+        """отмечает полный ответ сервера."""
+        with self._lock:
+            self.misses += 1
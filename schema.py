@@ -0,0 +1,217 @@
+"""Потоковый разбор и проверка ответа API homework_statuses.
+
+Ответ читается по кускам: верхний уровень объекта и массив homeworks
+разбираются вручную, а каждое отдельное значение декодирует C-сканер
+модуля json. От каждой домашки остаются только нужные поля, поэтому
+память не растёт с длиной истории, а неверная структура ответа
+отклоняется сразу, как только встречается, без чтения остального тела.
+"""
+import codecs
+import json
+
+from exceptions import TypeException
+
+HOMEWORK_FIELDS = ('homework_name', 'status')
+REQUIRED_KEYS = ('homeworks', 'current_date')
+MAX_VALUE_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+
+def compile_validator(required=REQUIRED_KEYS):
+    """собирает проверку уже разобранного ответа API.
+    Возвращает функцию, которая принимает словарь ответа и возвращает
+    список домашек; ошибки те же, что у check_response.
+    """
+    required = tuple(required)
+    missing_message = ' или '.join(required) + ' нет в запросе'
+
+    def validate(response):
+        if not isinstance(response, dict):
+            raise TypeError('список домашек это не словарь')
+        for key in required:
+            if key not in response:
+                raise TypeException(missing_message)
+        homeworks = response['homeworks']
+        if not isinstance(homeworks, list):
+            raise KeyError(
+                'под ключом `homeworks` домашки приходят не в виде списка')
+        return homeworks
+
+    return validate
+
+
+validate_response = compile_validator()
+
+
+class HomeworkStream:
+    """Инкрементальный разбор тела ответа API.
+
+    chunks — итерируемое кусков тела (bytes или str), например
+    response.iter_content(). Итерация выдаёт домашки по одной в виде
+    словарей только с полями fields; current_date доступен после
+    окончания итерации.
+    """
+
+    def __init__(self, chunks, fields=HOMEWORK_FIELDS,
+                 max_value_size=MAX_VALUE_SIZE):
+        self.fields = tuple(fields)
+        self.max_value_size = max_value_size
+        self.current_date = None
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._exhausted = False
+        self._seen = set()
+
+    def __iter__(self):
+        return self._parse()
+
+    def _fill(self):
+        """дочитывает следующий кусок; False, если тело закончилось."""
+        if self._exhausted:
+            return False
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._text.decode(chunk)
+            if chunk:
+                self._buffer += chunk
+                return True
+        self._exhausted = True
+        self._buffer += self._text.decode(b'', final=True)
+        return False
+
+    def _peek(self):
+        """следующий значимый символ или '' в конце тела."""
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill() and self._pos >= len(self._buffer):
+                return ''
+
+    def _expect(self, allowed, error):
+        char = self._peek()
+        if not char or char not in allowed:
+            raise error
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """декодирует одно JSON-значение, дочитывая тело при нехватке."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as error:
+                if not self._incomplete(error) or not self._fill():
+                    raise
+                continue
+            # число в конце куска может быть обрезано: за значением
+            # внутри объекта всегда следует ещё хотя бы один символ
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def _incomplete(self, error):
+        """похожа ли ошибка на оборванное куском значение.
+        Синтаксическая ошибка в середине буфера означает испорченный
+        ответ, и дальше тело не читается.
+        """
+        if len(self._buffer) - self._pos > self.max_value_size:
+            return False
+        return (
+            error.pos >= len(self._buffer) - len('\\uXXXX')
+            or error.msg.startswith('Unterminated string')
+        )
+
+    def _parse(self):
+        self._expect('{', TypeError('список домашек это не словарь'))
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            yield from self._members()
+        if self._peek():
+            raise ValueError('лишние данные после ответа API')
+        missing = [key for key in REQUIRED_KEYS if key not in self._seen]
+        if missing:
+            raise TypeException(' или '.join(missing) + ' нет в запросе')
+
+    def _members(self):
+        while True:
+            if self._peek() != '"':
+                raise ValueError('ожидался ключ в ответе API')
+            key = self._value()
+            self._expect(':', ValueError('ожидалось двоеточие в ответе API'))
+            self._seen.add(key)
+            if key == 'homeworks':
+                yield from self._homeworks()
+            elif key == 'current_date':
+                self.current_date = self._value()
+            else:
+                self._value()
+            separator = self._expect(
+                ',}', ValueError('ожидалась запятая в ответе API'))
+            if separator == '}':
+                return
+
+    def _homeworks(self):
+        self._expect('[', KeyError(
+            'под ключом `homeworks` домашки приходят не в виде списка'))
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        fields = self.fields
+        while True:
+            homework = self._value()
+            if not isinstance(homework, dict):
+                raise TypeException(f'домашка {homework!r} это не словарь')
+            yield {
+                field: homework[field] for field in fields
+                if field in homework
+            }
+            separator = self._expect(
+                ',]', ValueError('ожидалась запятая в списке homeworks'))
+            if separator == ']':
+                return
+
+
+def chunked(body, size=CHUNK_SIZE):
+    """режет тело ответа на куски, не копируя его целиком в str."""
+    return (body[start:start + size] for start in range(0, len(body), size))
+
+
+def trim_homeworks(response, fields=HOMEWORK_FIELDS):
+    """оставляет у домашек разобранного ответа только поля fields.
+    Ответ неверной структуры возвращается как есть: его отклонит проверка.
+    """
+    homeworks = response.get('homeworks') if isinstance(
+        response, dict) else None
+    if not isinstance(homeworks, list):
+        return response
+    response['homeworks'] = [
+        {field: homework[field] for field in fields if field in homework}
+        if isinstance(homework, dict) else homework
+        for homework in homeworks
+    ]
+    return response
+
+
+def parse_homework_statuses(body, fields=HOMEWORK_FIELDS):
+    """разбирает тело ответа API в словарь homeworks/current_date.
+    body — bytes, str или итерируемое кусков тела.
+    """
+    if isinstance(body, (bytes, str)):
+        body = chunked(body)
+    stream = HomeworkStream(body, fields)
+    homeworks = list(stream)
+    return {'homeworks': homeworks, 'current_date': stream.current_date}
@@ -0,0 +1,177 @@
+"""Хранилище состояния чатов, переживающее перезапуск бота.
+
+Для каждого чата хранятся курсор опроса (current_date из ответа API) и
+последний отправленный отчёт. Запись идёт пачками: изменения копятся в
+памяти и сбрасываются одной транзакцией, когда накопилось batch_size
+чатов или прошло flush_interval секунд. Пачка, которую не удалось
+записать, остаётся в буфере до следующего сброса.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STATE_STORE = 'homework_state.sqlite3'
+DEFAULT_BUSY_TIMEOUT = 30.0
+
+
+class StateStore:
+    """Базовое хранилище: буферизует изменения до flush()."""
+
+    def __init__(self, batch_size=100, flush_interval=5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def load(self, chat_id):
+        """возвращает (current_date, last_report) чата или None."""
+        chat_id = str(chat_id)
+        with self._lock:
+            if chat_id in self._pending:
+                return self._pending[chat_id]
+        return self._read(chat_id)
+
+    def load_all(self):
+        """выдаёт тройки (chat_id, current_date, last_report)."""
+        self.flush()
+        yield from self._read_all()
+
+    def save(self, chat_id, current_date, last_report):
+        """запоминает состояние чата; запись на диск — пачкой."""
+        chat_id = str(chat_id)
+        with self._lock:
+            self._pending[chat_id] = (current_date, last_report)
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """сбрасывает накопленные изменения в хранилище.
+        Если запись не удалась, пачка возвращается в буфер, не затирая
+        более свежих изменений, а исключение пробрасывается.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            except Exception:
+                for chat_id, state in pending.items():
+                    self._pending.setdefault(chat_id, state)
+                raise
+
+    def close(self):
+        """сбрасывает изменения и освобождает ресурсы."""
+        self.flush()
+
+    def _read(self, chat_id):
+        raise NotImplementedError
+
+    def _read_all(self):
+        raise NotImplementedError
+
+    def _write(self, pending):
+        raise NotImplementedError
+
+
+class MemoryStateStore(StateStore):
+    """Хранилище в памяти процесса, для тестов."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._data = {}
+
+    def _read(self, chat_id):
+        return self._data.get(chat_id)
+
+    def _read_all(self):
+        for chat_id, (current_date, last_report) in list(self._data.items()):
+            yield chat_id, current_date, last_report
+
+    def _write(self, pending):
+        self._data.update(pending)
+
+
+class SQLiteStateStore(StateStore):
+    """Хранилище в SQLite в режиме WAL.
+
+    С synchronous=NORMAL фиксация транзакции в WAL не вызывает fsync,
+    диск синхронизируется на контрольных точках, поэтому число fsync
+    ограничено частотой сброса пачек, а не частотой опросов. Одну базу
+    могут открыть несколько процессов (воркеры supervisor.py): пишущий
+    ждёт освобождения базы до busy_timeout секунд.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_STORE,
+                 busy_timeout=DEFAULT_BUSY_TIMEOUT, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._connection = sqlite3.connect(
+            path, timeout=busy_timeout, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS chat_state ('
+            'chat_id TEXT PRIMARY KEY, '
+            'from_date INTEGER NOT NULL, '
+            'last_report TEXT)'
+        )
+        self._connection.commit()
+
+    def _read(self, chat_id):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT from_date, last_report FROM chat_state '
+                'WHERE chat_id = ?', (chat_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _read_all(self):
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT chat_id, from_date, last_report FROM chat_state'
+            ).fetchall()
+        for chat_id, current_date, last_report in rows:
+            yield chat_id, current_date, json.loads(last_report)
+
+    def _write(self, pending):
+        with self._connection:
+            self._connection.executemany(
+                'INSERT INTO chat_state (chat_id, from_date, last_report) '
+                'VALUES (?, ?, ?) ON CONFLICT(chat_id) DO UPDATE SET '
+                'from_date = excluded.from_date, '
+                'last_report = excluded.last_report',
+                [
+                    (chat_id, current_date,
+                     json.dumps(last_report, ensure_ascii=False))
+                    for chat_id, (current_date, last_report)
+                    in pending.items()
+                ],
+            )
+
+    def close(self):
+        """сбрасывает изменения и закрывает соединение с базой."""
+        super().close()
+        self._connection.close()
+
+
+def open_state_store(location=None):
+    """открывает хранилище по адресу из аргумента или STATE_STORE.
+    Значение ``memory`` выбирает хранилище в памяти. STATE_STORE_TIMEOUT —
+    сколько секунд ждать, пока базу держит другой процесс.
+    """
+    location = location or os.getenv('STATE_STORE', DEFAULT_STATE_STORE)
+    if location == 'memory':
+        return MemoryStateStore()
+    return SQLiteStateStore(location, busy_timeout=float(os.getenv(
+        'STATE_STORE_TIMEOUT', DEFAULT_BUSY_TIMEOUT)))
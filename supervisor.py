@@ -0,0 +1,314 @@
+"""Супервизор: делит подписки между несколькими процессами-воркерами.
+
+Подписки распределяются по виртуальным шардам по хэшу id чата, а шарды —
+по воркерам. Каждый воркер сам читает CSV-файл подписок, оставляет только
+свои шарды и опрашивает их тем же циклом, что и tenants.py. Упавший
+воркер перезапускается; если он падает слишком часто, его шарды
+передаются живым воркерам. Воркеры присылают отчёты о своей пропускной
+способности (по воркеру, а не по отдельному шарду), которые попадают в
+лог и в метрики. Общие лимиты запросов к API и сообщений боту делятся
+между воркерами по доле их шардов. По SIGHUP или при изменении файлов
+супервизор просит воркеров перечитать настройки и свои подписки.
+"""
+import argparse
+import logging
+import multiprocessing
+import queue
+import signal
+import sys
+import time
+import zlib
+
+
+from config import ConfigReloader, Settings
+from delivery import TELEGRAM_GLOBAL_RATE, DeliveryQueue
+import homework
+from http_pool import HttpPool
+from lifecycle import Lifecycle
+from log_setup import setup_logging
+from metrics import WORKER_THROUGHPUT, start_metrics_server
+from polling import AdaptivePolicy
+from rate_limit import RateLimiter
+from response_cache import ResponseCache
+from state_store import open_state_store
+from tenants import (
+    PollScheduler, load_subscriptions, restore_state, run_once,
+    sync_subscriptions,
+)
+
+SHARDS_PER_WORKER = 8
+DEFAULT_REPORT_INTERVAL = 60
+DEFAULT_STOP_TIMEOUT = 15
+
+
+def shard_of(chat_id, total_shards):
+    """номер шарда подписки; стабилен между запусками и процессами."""
+    return zlib.crc32(str(chat_id).encode()) % total_shards
+
+
+def load_shards(path, shards, total_shards):
+    """читает из CSV-файла подписки только заданных шардов."""
+    for subscription in load_subscriptions(path):
+        if shard_of(subscription.chat_id, total_shards) in shards:
+            yield subscription
+
+
+def reload_worker(worker_id, scheduler, path, shards, total_shards, store,
+                  interval=None):
+    """перечитывает в воркере настройки и подписки его шардов.
+    Ошибка чтения оставляет прежние настройки и подписки.
+    """
+    try:
+        homework.apply_settings(Settings.load())
+        if interval is None and scheduler.interval != homework.RETRY_TIME:
+            scheduler.set_interval(homework.RETRY_TIME)
+        counts = sync_subscriptions(
+            scheduler, load_shards(path, shards, total_shards), store)
+    except Exception as error:
+        logging.error(f'воркер {worker_id}: настройки не перечитаны: {error}')
+        return
+    logging.info(f'воркер {worker_id}: подписки перечитаны, {counts}')
+
+
+def apply_share(scheduler, bot, share):
+    """делит общие лимиты процесса по доле шардов воркера share.
+    Лимит API Практикума и лимит Telegram на бота относятся ко всем
+    воркерам вместе, поэтому каждый получает их часть.
+    """
+    limiter = RateLimiter.from_env(share=share)
+    scheduler.limiter.set_rate(limiter.rate, limiter.burst)
+    scheduler.check_capacity()
+    bot.set_global_rate(TELEGRAM_GLOBAL_RATE * share)
+
+
+def worker_main(worker_id, path, shards, total_shards, interval, commands,
+                reports, report_interval=DEFAULT_REPORT_INTERVAL):
+    """Точка входа процесса-воркера.
+    Без interval интервал опроса следует за RETRY_TIME из настроек.
+    """
+    setup_logging(path='')
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    lifecycle = Lifecycle().install()
+    lifecycle.on_stop(lambda: commands.put(('stop', None)))
+    store = open_state_store()
+    owned = set()
+    share = len(shards) / total_shards
+    scheduler = PollScheduler(
+        interval or homework.RETRY_TIME,
+        AdaptivePolicy(interval or homework.RETRY_TIME),
+        RateLimiter.from_env(share=share))
+    bot = DeliveryQueue(
+        homework.make_bot(homework.TELEGRAM_TOKEN),
+        homework.send_message_to,
+        global_rate=TELEGRAM_GLOBAL_RATE * share).start()
+
+    def add_shards(new_shards):
+        owned.update(new_shards)
+        apply_share(scheduler, bot, len(owned) / total_shards)
+        incoming = {
+            subscription.chat_id: subscription
+            for subscription in load_shards(path, new_shards, total_shards)
+        }
+        restore_state(incoming, store)
+        for subscription in incoming.values():
+            scheduler.add(subscription)
+        logging.info(
+            f'воркер {worker_id}: шарды {sorted(new_shards)}, '
+            f'подписок {len(scheduler)}')
+
+    add_shards(set(shards))
+    handlers = {
+        'add_shards': lambda argument: add_shards(set(argument)),
+        'reload': lambda argument: reload_worker(
+            worker_id, scheduler, path, owned, total_shards, store,
+            interval),
+    }
+    homework.install_http_pool(HttpPool.from_env())
+    cache = ResponseCache()
+    polls, reported_at = 0, time.monotonic()
+    try:
+        while True:
+            done, delay = run_once(bot, scheduler, cache, store)
+            polls += done
+            now = time.monotonic()
+            if now - reported_at >= report_interval:
+                reports.put(
+                    (worker_id, polls, now - reported_at, len(scheduler)))
+                polls, reported_at = 0, now
+            try:
+                command, argument = commands.get(
+                    timeout=min(delay, report_interval))
+            except queue.Empty:
+                continue
+            if command == 'stop':
+                break
+            handlers[command](argument)
+    finally:
+        bot.stop(timeout=lifecycle.remaining())
+        store.close()
+
+
+class Supervisor:
+    """Запускает воркеров, следит за ними и собирает их отчёты.
+
+    max_restarts — сколько падений за restart_window секунд допускается
+    до того, как шарды воркера будут переданы остальным.
+    """
+
+    def __init__(self, path, workers, interval, max_restarts=3,
+                 restart_window=300, report_interval=DEFAULT_REPORT_INTERVAL,
+                 context=None):
+        self.path = path
+        self.interval = interval
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.report_interval = report_interval
+        self.total_shards = workers * SHARDS_PER_WORKER
+        self.assignment = {
+            worker_id: set(range(worker_id, self.total_shards, workers))
+            for worker_id in range(workers)
+        }
+        self.throughput = {}
+        self._context = context or multiprocessing.get_context('spawn')
+        self._reports = self._context.Queue()
+        self._commands = {}
+        self._processes = {}
+        self._crashes = {}
+
+    def start(self):
+        """запускает всех воркеров."""
+        for worker_id in self.assignment:
+            self._spawn(worker_id)
+
+    def _spawn(self, worker_id):
+        commands = self._context.Queue()
+        process = self._context.Process(
+            target=worker_main,
+            args=(
+                worker_id, self.path, sorted(self.assignment[worker_id]),
+                self.total_shards, self.interval, commands, self._reports,
+                self.report_interval,
+            ),
+            name=f'homework-worker-{worker_id}',
+            daemon=True,
+        )
+        process.start()
+        self._commands[worker_id] = commands
+        self._processes[worker_id] = process
+        logging.info(f'запущен воркер {worker_id}, pid {process.pid}')
+
+    def check_workers(self, now=None):
+        """перезапускает упавших воркеров или раздаёт их шарды."""
+        now = time.monotonic() if now is None else now
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            logging.error(
+                f'воркер {worker_id} завершился с кодом {process.exitcode}')
+            crashes = [
+                moment for moment in self._crashes.get(worker_id, [])
+                if now - moment < self.restart_window
+            ] + [now]
+            self._crashes[worker_id] = crashes
+            if len(crashes) < self.max_restarts:
+                self._spawn(worker_id)
+            else:
+                self.rebalance(worker_id)
+
+    def rebalance(self, worker_id):
+        """передаёт шарды выбывшего воркера наименее загруженным живым."""
+        shards = self.assignment.pop(worker_id, set())
+        self._processes.pop(worker_id, None)
+        self._commands.pop(worker_id, None)
+        self.throughput.pop(worker_id, None)
+        if not self.assignment:
+            raise RuntimeError('не осталось живых воркеров')
+        additions = {}
+        for shard in sorted(shards):
+            target = min(
+                self.assignment,
+                key=lambda other: len(self.assignment[other]))
+            self.assignment[target].add(shard)
+            additions.setdefault(target, []).append(shard)
+        for target, added in additions.items():
+            self._commands[target].put(('add_shards', added))
+        logging.warning(
+            f'шарды воркера {worker_id} переданы: {additions}')
+
+    def collect_reports(self, timeout=1.0):
+        """принимает отчёты воркеров о пропускной способности."""
+        try:
+            report = self._reports.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            worker_id, polls, elapsed, size = report
+            rate = polls / elapsed if elapsed else 0.0
+            self.throughput[worker_id] = rate
+            WORKER_THROUGHPUT.labels(worker_id).set(rate)
+            logging.info(
+                f'воркер {worker_id}: {rate:.2f} опросов/с, '
+                f'подписок {size}')
+            try:
+                report = self._reports.get_nowait()
+            except queue.Empty:
+                return
+
+    def reload(self, settings):
+        """применяет перечитанные настройки и передаёт запрос воркерам."""
+        homework.apply_settings(settings)
+        for commands in self._commands.values():
+            commands.put(('reload', None))
+
+    def run(self, lifecycle=None, reloader=None):
+        """следит за воркерами до остановки процесса."""
+        self.start()
+        try:
+            while lifecycle is None or not lifecycle.stopping:
+                if reloader is not None:
+                    reloader.apply()
+                self.check_workers()
+                self.collect_reports()
+        finally:
+            self.stop(None if lifecycle is None else lifecycle.remaining())
+
+    def stop(self, timeout=None):
+        """просит воркеров завершиться и дожидается их."""
+        timeout = DEFAULT_STOP_TIMEOUT if timeout is None else timeout
+        for commands in self._commands.values():
+            commands.put(('stop', None))
+        deadline = time.monotonic() + timeout
+        for process in self._processes.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.terminate()
+
+
+def main(argv=None):
+    """Точка входа супервизора."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('subscriptions', help='CSV-файл с подписками')
+    parser.add_argument(
+        '--workers', type=int, default=multiprocessing.cpu_count(),
+        help='число процессов-воркеров')
+    parser.add_argument(
+        '--interval', type=int,
+        help='интервал опроса одной подписки, секунд; по умолчанию '
+             'RETRY_TIME из настроек')
+    args = parser.parse_args(argv)
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('отсутствует переменная окружения TELEGRAM_TOKEN')
+        sys.exit('отсутствует переменная окружения TELEGRAM_TOKEN')
+    start_metrics_server()
+    lifecycle = Lifecycle().install()
+    supervisor = Supervisor(args.subscriptions, args.workers, args.interval)
+    reloader = ConfigReloader(
+        watch=[args.subscriptions], settings=homework.SETTINGS,
+    ).install(lifecycle)
+    reloader.on_reload(lambda old, new: supervisor.reload(new))
+    supervisor.run(lifecycle, reloader)
+
+
+if __name__ == '__main__':
+    setup_logging()
+    main()
@@ -0,0 +1,140 @@
+"""Шаблоны уведомлений о смене статуса по языкам.
+
+Реестр собирается один раз при запуске: вердикт каждого статуса сразу
+подставляется в шаблон сообщения, и для пары (язык, статус) остаются
+только готовые куски текста между полями домашки. Отрисовка сообщения
+сводится к склейке этих кусков со значениями полей, без разбора
+шаблона на каждый вызов.
+
+Новые статусы, языки и тексты задаются JSON-файлом без изменения кода
+(путь — в переменной окружения TEMPLATES_FILE):
+
+    {
+        "ru": {"statuses": {"revision": "Работа ждёт доработки."}},
+        "en": {"message": "Homework {homework_name}: {verdict}",
+               "statuses": {"approved": "Approved!"}}
+    }
+"""
+import json
+import logging
+import os
+from string import Formatter
+
+DEFAULT_LOCALE = 'ru'
+DEFAULT_MESSAGE = (
+    'Изменился статус проверки работы "{homework_name}" вердикт: {verdict}')
+
+
+def template_fields(template):
+    """поля домашки, которые использует шаблон сообщения."""
+    return tuple(
+        field for _, field, _, _ in Formatter().parse(template)
+        if field is not None and field != 'verdict'
+    )
+
+
+def compile_template(template, verdict):
+    """готовит функцию отрисовки шаблона с подставленным вердиктом.
+    Функция принимает домашку и возвращает текст сообщения; KeyError,
+    если в домашке нет поля, нужного шаблону.
+    """
+    literals = []
+    fields = []
+    current = ''
+    for literal, field, spec, conversion in Formatter().parse(template):
+        current += literal
+        if field is None:
+            continue
+        if field == 'verdict':
+            current += format(verdict, spec or '')
+            continue
+        literals.append(current)
+        fields.append(field)
+        current = ''
+    literals.append(current)
+    if not fields:
+        return lambda homework: current
+    if len(fields) == 1:
+        prefix, suffix = literals
+        field = fields[0]
+        return lambda homework: prefix + str(homework[field]) + suffix
+
+    def render(homework):
+        parts = [literals[0]]
+        for field, literal in zip(fields, literals[1:]):
+            parts.append(str(homework[field]))
+            parts.append(literal)
+        return ''.join(parts)
+
+    return render
+
+
+class TemplateRegistry:
+    """Готовые шаблоны сообщений по языку и статусу.
+
+    locales — словарь {язык: {'message': шаблон, 'statuses':
+    {статус: вердикт}}}; язык без шаблона или без вердикта статуса
+    берёт его из языка по умолчанию. fields — поля домашки, нужные
+    всем шаблонам; только они остаются при разборе ответа API.
+    """
+
+    def __init__(self, locales, default_locale=DEFAULT_LOCALE):
+        self.default_locale = default_locale
+        base = locales[default_locale]
+        self._verdicts = {}
+        self._renderers = {}
+        fields = dict.fromkeys(('homework_name', 'status'))
+        for locale, settings in locales.items():
+            message = settings.get('message') or base['message']
+            fields.update(dict.fromkeys(template_fields(message)))
+            verdicts = {**base['statuses'], **settings.get('statuses', {})}
+            self._verdicts[locale] = verdicts
+            self._renderers[locale] = {
+                status: compile_template(message, verdict)
+                for status, verdict in verdicts.items()
+            }
+        self.fields = tuple(fields)
+
+    @classmethod
+    def load(cls, path, verdicts, message=DEFAULT_MESSAGE,
+             default_locale=DEFAULT_LOCALE):
+        """собирает реестр из вердиктов по умолчанию и файла настроек.
+        Отсутствующий или пустой путь оставляет только вердикты по
+        умолчанию.
+        """
+        locales = {default_locale: {
+            'message': message, 'statuses': dict(verdicts)}}
+        if path:
+            with open(path, encoding='utf-8') as file:
+                for locale, settings in json.load(file).items():
+                    merged = locales.setdefault(locale, {'statuses': {}})
+                    if settings.get('message'):
+                        merged['message'] = settings['message']
+                    merged['statuses'].update(settings.get('statuses', {}))
+            logging.info(f'шаблоны сообщений загружены из {path}')
+        return cls(locales, default_locale)
+
+    @classmethod
+    def from_env(cls, verdicts, **kwargs):
+        """реестр с файлом настроек из TEMPLATES_FILE."""
+        return cls.load(os.getenv('TEMPLATES_FILE'), verdicts, **kwargs)
+
+    def verdicts(self, locale=None):
+        """вердикты статусов для языка."""
+        return self._verdicts.get(
+            locale, self._verdicts[self.default_locale])
+
+    def render(self, homework, locale=None):
+        """текст уведомления о статусе домашки.
+        ValueError — если статус неизвестен, KeyError — если в домашке
+        нет поля, нужного шаблону.
+        """
+        renderers = self._renderers.get(locale)
+        if renderers is None:
+            renderers = self._renderers[self.default_locale]
+        status = homework.get('status')
+        renderer = renderers.get(status)
+        if renderer is None:
+            raise ValueError(
+                f'Статуса {status} нет в словаре {list(renderers)}')
+        return renderer(homework)
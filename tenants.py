@@ -0,0 +1,470 @@
+"""Мультитенантный режим: один процесс опрашивает много подписок.
+
+Подписка — это тройка (токен Практикума, id чата, последний current_date).
+Таблица подписок читается из CSV-файла с колонками
+``practicum_token,chat_id,current_date`` и необязательной колонкой
+``locale`` — языком уведомлений. Таблица и настройки перечитываются
+без перезапуска по SIGHUP или при изменении файла (см. config.py).
+"""
+import argparse
+import csv
+import heapq
+import itertools
+import logging
+import sys
+import time
+import zlib
+
+
+from commands import ChatState, start_command_listener
+from config import ConfigReloader
+from delivery import DeliveryQueue
+import homework
+from homework import (
+    check_response, fetch_homework_statuses, make_headers, restore_report,
+    send_message_to, status_changes,
+)
+from error_alerts import ErrorAlerter
+from exceptions import BudgetExceeded
+from http_pool import HttpPool
+from lifecycle import Lifecycle
+from log_setup import setup_logging
+from metrics import LOOP_LAG, start_metrics_server
+from polling import AdaptivePolicy, Backoff
+from rate_limit import RateLimiter
+from response_cache import ResponseCache
+from state_store import open_state_store
+
+
+class Subscription(ChatState):
+    """Подписка одного студента на уведомления о статусе домашки."""
+
+    __slots__ = (
+        'token', 'chat_id', 'current_date', 'locale', 'alerts', 'backoff')
+
+    def __init__(self, token, chat_id, current_date=0, locale=None):
+        super().__init__()
+        self.token = token
+        self.chat_id = chat_id
+        self.current_date = int(current_date or 0)
+        self.locale = locale
+        self.alerts = None
+        self.backoff = Backoff()
+
+    def __repr__(self):
+        return f'Subscription(chat_id={self.chat_id!r})'
+
+
+def load_subscriptions(path):
+    """читает таблицу подписок из CSV-файла построчно."""
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            yield Subscription(
+                row['practicum_token'],
+                row['chat_id'],
+                row.get('current_date') or 0,
+                row.get('locale') or None,
+            )
+
+
+class PollScheduler:
+    """Общий планировщик опроса подписок.
+
+    Хранит подписки в куче по времени следующего опроса. Каждая подписка
+    получает постоянное смещение внутри интервала, поэтому запросы
+    равномерно распределены во времени, а интервал для каждого
+    студента предсказуем. С политикой AdaptivePolicy интервал каждой
+    подписки подстраивается под результат её последнего опроса. С
+    лимитером RateLimiter опрос, на который не хватает запросов,
+    откладывается до появления свободного запроса.
+    """
+
+    def __init__(self, interval=None, policy=None, limiter=None):
+        self.interval = interval or homework.RETRY_TIME
+        self.policy = policy
+        self.limiter = limiter
+        self._heap = []
+        self._subscriptions = {}
+        self._counter = itertools.count()
+        self._over_capacity = False
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def __contains__(self, chat_id):
+        return chat_id in self._subscriptions
+
+    def __iter__(self):
+        return iter(list(self._subscriptions.values()))
+
+    def get(self, chat_id):
+        """возвращает подписку по id чата."""
+        return self._subscriptions.get(chat_id)
+
+    def offset(self, chat_id):
+        """постоянное смещение подписки внутри интервала опроса."""
+        digest = zlib.crc32(str(chat_id).encode())
+        return digest / 2 ** 32 * self.interval
+
+    def add(self, subscription, now=None):
+        """добавляет подписку или заменяет существующую с тем же чатом."""
+        now = time.time() if now is None else now
+        self._subscriptions[subscription.chat_id] = subscription
+        self._push(now + self.offset(subscription.chat_id), subscription)
+        self.check_capacity()
+
+    def set_interval(self, interval):
+        """меняет интервал опроса; уже назначенные опросы не сдвигаются."""
+        self.interval = interval
+        if self.policy is not None:
+            self.policy.set_interval(interval)
+        self.check_capacity()
+
+    def remove(self, chat_id):
+        """удаляет подписку; её записи в куче будут пропущены."""
+        subscription = self._subscriptions.pop(chat_id, None)
+        if subscription is not None and self.limiter is not None:
+            self.limiter.forget(subscription.token)
+        self.check_capacity()
+        return subscription
+
+    def check_capacity(self):
+        """предупреждает, если общий лимит не пропускает все подписки.
+        Тогда каждую подписку опрашивают реже интервала; предупреждение
+        пишется один раз, пока подписки снова не уместятся в лимит.
+        """
+        capacity = None
+        if self.limiter is not None:
+            capacity = self.limiter.capacity(self.interval)
+        over = capacity is not None and len(self) > capacity
+        if over and not self._over_capacity:
+            logging.warning(
+                f'лимит {self.limiter.rate:g} запросов в секунду пропускает '
+                f'{capacity} опросов за интервал {self.interval:g} с, а '
+                f'подписок {len(self)}: их будут опрашивать реже интервала')
+        self._over_capacity = over
+
+    def requeue(self, subscription, due):
+        """возвращает подписку в очередь с прежним сроком опроса.
+        Так опрос, не уместившийся в бюджет цикла, выполняется в
+        следующем цикле без отступа, как после сбоя.
+        """
+        self._push(due, subscription)
+
+    def reschedule(self, subscription, due, now=None):
+        """планирует следующий опрос ровно через интервал после due.
+        Если опрос отстал больше чем на интервал, отсчёт идёт от now.
+        С адаптивной политикой задержка отсчитывается от now.
+        """
+        now = time.time() if now is None else now
+        if self.policy is not None:
+            delay = self.policy.delay(
+                subscription.backoff, subscription.statuses)
+            self._push(now + delay, subscription)
+            return
+        next_due = due + self.interval
+        if next_due <= now:
+            next_due = now + self.interval
+        self._push(next_due, subscription)
+
+    def pop_due(self, now=None):
+        """выдаёт пары (время опроса, подписка), срок которых наступил."""
+        now = time.time() if now is None else now
+        while self._heap and self._heap[0][0] <= now:
+            due, _, subscription = heapq.heappop(self._heap)
+            if self._subscriptions.get(subscription.chat_id) is not (
+                    subscription):
+                continue
+            if self.limiter is not None:
+                wait = self.limiter.try_acquire(subscription.token, now)
+                if wait > 0:
+                    self._push(now + wait, subscription)
+                    continue
+            yield due, subscription
+
+    def next_due(self):
+        """время ближайшего запланированного опроса."""
+        while self._heap:
+            _, _, subscription = self._heap[0]
+            if self._subscriptions.get(subscription.chat_id) is subscription:
+                return self._heap[0][0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _push(self, due, subscription):
+        heapq.heappush(
+            self._heap, (due, next(self._counter), subscription))
+
+
+def sync_subscriptions(scheduler, subscriptions, store=None):
+    """приводит подписки планировщика к перечитанной таблице.
+    Новые подписки добавляются с состоянием из хранилища, пропавшие
+    удаляются, у оставшихся меняются только токен и язык: курсор,
+    статусы и отступ после сбоев сохраняются.
+    Возвращает словарь счётчиков added, removed, updated.
+    """
+    incoming = {
+        subscription.chat_id: subscription for subscription in subscriptions}
+    counts = {'added': 0, 'removed': 0, 'updated': 0}
+    for subscription in scheduler:
+        if subscription.chat_id not in incoming:
+            scheduler.remove(subscription.chat_id)
+            counts['removed'] += 1
+    added = {}
+    for chat_id, fresh in incoming.items():
+        current = scheduler.get(chat_id)
+        if current is None:
+            added[chat_id] = fresh
+            continue
+        if (current.token, current.locale) == (fresh.token, fresh.locale):
+            continue
+        if current.token != fresh.token and scheduler.limiter is not None:
+            scheduler.limiter.forget(current.token)
+        current.token, current.locale = fresh.token, fresh.locale
+        counts['updated'] += 1
+    if store is not None:
+        restore_state(added, store)
+    for subscription in added.values():
+        scheduler.add(subscription)
+    counts['added'] = len(added)
+    return counts
+
+
+def install_reloader(lifecycle, scheduler, path, store=None,
+                     interval=None):
+    """перечитывает настройки и таблицу подписок без перезапуска.
+    Без явного interval интервал опроса следует за RETRY_TIME.
+    """
+    reloader = ConfigReloader(
+        watch=[path], settings=homework.SETTINGS).install(lifecycle)
+
+    @reloader.on_reload
+    def reload(old, new):
+        homework.apply_settings(new)
+        if interval is None and scheduler.interval != new.retry_time:
+            scheduler.set_interval(new.retry_time)
+        counts = sync_subscriptions(
+            scheduler, load_subscriptions(path), store)
+        logging.info(
+            f'подписки перечитаны: добавлено {counts["added"]}, '
+            f'удалено {counts["removed"]}, обновлено {counts["updated"]}')
+
+    return reloader
+
+
+def handle_response(subscription, response):
+    """проверяет ответ API и находит изменившиеся статусы подписки.
+    Возвращает список троек (название, статус, сообщение); он пуст,
+    если новых статусов нет или ответ не изменился.
+    """
+    if response is None:
+        return []
+    homeworks = check_response(response)
+    changes = list(status_changes(
+        homeworks, subscription.statuses, subscription.locale))
+    if not changes:
+        logging.info(
+            f'нет новых статусов для {subscription.chat_id}',
+            extra={'chat_id': subscription.chat_id})
+    return changes
+
+
+def commit_response(subscription, response, changes):
+    """сдвигает курсор подписки после доставки всех уведомлений.
+    Возвращает сводку о восстановлении после сбоев или None.
+    """
+    if response is not None:
+        subscription.current_date = response['current_date']
+    subscription.backoff.success(bool(changes))
+    alerts, subscription.alerts = subscription.alerts, None
+    return None if alerts is None else alerts.recovered()
+
+
+def alert_message(subscription, error):
+    """учитывает сбой опроса подписки и возвращает текст оповещения.
+    None означает, что о таком сбое уже сообщали.
+    """
+    logging.error(
+        f'{subscription.chat_id}: Сбой в работе программы: {error}',
+        extra={'chat_id': subscription.chat_id})
+    subscription.backoff.failure(error)
+    if subscription.alerts is None:
+        subscription.alerts = ErrorAlerter()
+    return subscription.alerts.alert(error)
+
+
+def restore_state(scheduler, store):
+    """восстанавливает курсоры и последние отчёты подписок из хранилища.
+    scheduler — планировщик или словарь подписок по id чата.
+    """
+    restored = 0
+    for chat_id, current_date, last_report in store.load_all():
+        subscription = scheduler.get(chat_id)
+        if subscription is None:
+            continue
+        subscription.current_date = max(
+            subscription.current_date, current_date)
+        report = restore_report(last_report)
+        subscription.statuses = report['statuses']
+        restored += 1
+    return restored
+
+
+def save_state(store, subscription):
+    """передаёт состояние подписки в хранилище, если оно подключено."""
+    if store is not None:
+        store.save(
+            subscription.chat_id, subscription.current_date,
+            {'statuses': subscription.statuses})
+
+
+def poll_subscription(bot, subscription, cache=None, store=None,
+                      budget=None):
+    """опрашивает API для одной подписки и отправляет уведомления.
+    budget — бюджет цикла опроса; если он исчерпан до запроса,
+    BudgetExceeded пробрасывается, а состояние подписки не меняется.
+    """
+    if subscription.paused:
+        return
+    try:
+        response = fetch_homework_statuses(
+            subscription.current_date, make_headers(subscription.token),
+            cache, budget)
+        changes = handle_response(subscription, response)
+        for name, status, message in changes:
+            bot.send_message(subscription.chat_id, message, budget=budget)
+            subscription.statuses[name] = status
+            subscription.remember(message)
+        summary = commit_response(subscription, response, changes)
+        if summary:
+            bot.send_message(subscription.chat_id, summary, budget=budget)
+    except BudgetExceeded:
+        raise
+    except Exception as error:
+        message = alert_message(subscription, error)
+        if message:
+            bot.send_message(subscription.chat_id, message, budget=budget)
+    save_state(store, subscription)
+
+
+def run_once(bot, scheduler, cache=None, store=None, budget=None):
+    """опрашивает подписки, срок которых наступил.
+    Все опросы и отправки прохода делят один бюджет цикла; когда он
+    исчерпан, оставшиеся подписки ждут следующего прохода.
+    Возвращает пару (число опросов, секунд до следующего опроса).
+    """
+    if budget is None:
+        budget = homework.TIMEOUTS.budget()
+    polls = 0
+    for due, subscription in scheduler.pop_due():
+        LOOP_LAG.set(max(time.time() - due, 0))
+        try:
+            poll_subscription(bot, subscription, cache, store, budget)
+        except BudgetExceeded as error:
+            logging.warning(
+                f'{subscription.chat_id}: {error}',
+                extra={'chat_id': subscription.chat_id})
+            scheduler.requeue(subscription, due)
+            break
+        except Exception as error:
+            logging.error(
+                f'{subscription.chat_id}: {error}',
+                extra={'chat_id': subscription.chat_id})
+        scheduler.reschedule(subscription, due)
+        polls += 1
+    next_due = scheduler.next_due()
+    delay = homework.RETRY_TIME if next_due is None else (
+        next_due - time.time())
+    return polls, max(delay, 0)
+
+
+def run(bot, scheduler, sleep=None, cache=None, store=None, lifecycle=None,
+        reloader=None):
+    """цикл опроса всех подписок планировщика.
+    С lifecycle цикл завершается после запроса остановки, а ожидание
+    до следующего опроса прерывается сразу. С reloader перечитанные
+    настройки применяются перед очередным проходом.
+    """
+    if sleep is None:
+        sleep = time.sleep if lifecycle is None else lifecycle.wait
+    while lifecycle is None or not lifecycle.stopping:
+        if reloader is not None:
+            reloader.apply()
+        _, delay = run_once(bot, scheduler, cache, store)
+        if delay > 0:
+            sleep(delay)
+
+
+class Service:
+    """Всё, что поднимает start_service для цикла опроса подписок."""
+
+    __slots__ = ('scheduler', 'bot', 'store', 'lifecycle', 'reloader')
+
+    def __init__(self, scheduler, bot, store, lifecycle, reloader):
+        self.scheduler = scheduler
+        self.bot = bot
+        self.store = store
+        self.lifecycle = lifecycle
+        self.reloader = reloader
+
+
+def make_parser(description):
+    """парсер аргументов, общий для режимов опроса подписок."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('subscriptions', help='CSV-файл с подписками')
+    parser.add_argument(
+        '--interval', type=int,
+        help='интервал опроса одной подписки, секунд; по умолчанию '
+             'RETRY_TIME из настроек')
+    return parser
+
+
+def start_service(args, **pool_options):
+    """поднимает окружение цикла опроса подписок из args make_parser.
+    Загружает подписки и их состояние, запускает очередь доставки,
+    приём команд, метрики, пул соединений с параметрами pool_options и
+    слежение за настройками. Обработчики остановки уже зарегистрированы
+    в lifecycle; вызывающий запускает цикл и потом lifecycle.shutdown().
+    """
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('отсутствует переменная окружения TELEGRAM_TOKEN')
+        sys.exit('отсутствует переменная окружения TELEGRAM_TOKEN')
+    interval = args.interval or homework.RETRY_TIME
+    scheduler = PollScheduler(
+        interval, AdaptivePolicy(interval), RateLimiter.from_env())
+    for subscription in load_subscriptions(args.subscriptions):
+        scheduler.add(subscription)
+    logging.info(f'загружено подписок: {len(scheduler)}')
+    lifecycle = Lifecycle().install()
+    store = open_state_store()
+    lifecycle.on_shutdown(lambda remaining: store.close())
+    start_metrics_server()
+    logging.info(f'восстановлено состояний: {restore_state(scheduler, store)}')
+    telegram_bot = homework.make_bot(homework.TELEGRAM_TOKEN)
+    bot = DeliveryQueue(telegram_bot, send_message_to).start()
+    lifecycle.on_shutdown(lambda remaining: bot.stop(timeout=remaining))
+    start_command_listener(
+        telegram_bot, bot.send_message,
+        lambda chat_id: scheduler.get(str(chat_id)),
+        homework.TEMPLATES.verdicts(), lifecycle)
+    homework.install_http_pool(HttpPool.from_env(**pool_options))
+    reloader = install_reloader(
+        lifecycle, scheduler, args.subscriptions, store, args.interval)
+    return Service(scheduler, bot, store, lifecycle, reloader)
+
+
+def main(argv=None):
+    """Точка входа мультитенантного режима."""
+    args = make_parser(__doc__.splitlines()[0]).parse_args(argv)
+    service = start_service(args)
+    try:
+        run(service.bot, service.scheduler, cache=ResponseCache(),
+            store=service.store, lifecycle=service.lifecycle,
+            reloader=service.reloader)
+    finally:
+        service.lifecycle.shutdown()
+
+
+if __name__ == '__main__':
+    setup_logging()
+    main()
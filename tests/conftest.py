@@ -1,9 +1,18 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+@pytest.fixture(autouse=True)
+def closed_breakers():
+    import homework
+    homework.PRACTICUM_BREAKER.reset()
+    homework.TELEGRAM_BREAKER.reset()
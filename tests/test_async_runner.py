@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+import requests
+
+import async_runner
+import homework
+import tenants
+from lifecycle import Lifecycle
+from polling import AdaptivePolicy
+from timeouts import Timeouts
+
+
+class MockBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class TestAsyncRunner:
+
+    def test_concurrent_fetches_respect_limit(self, monkeypatch):
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def slow_fetch(current_timestamp, headers, cache=None, budget=None):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 1,
+            }
+
+        monkeypatch.setattr(async_runner, 'fetch_homework_statuses',
+                            slow_fetch)
+        bot = MockBot()
+        scheduler = tenants.PollScheduler(interval=1000)
+        for chat_id in range(12):
+            scheduler.add(tenants.Subscription('t', chat_id), now=0)
+        runner = async_runner.AsyncRunner(bot, scheduler, concurrency=4)
+
+        async def run_once():
+            runner._semaphore = asyncio.Semaphore(runner.concurrency)
+            await asyncio.gather(*runner.dispatch_due(now=1000))
+
+        started = time.monotonic()
+        asyncio.run(run_once())
+        elapsed = time.monotonic() - started
+        assert state['peak'] == 4, (
+            'Количество одновременных запросов должно ограничиваться'
+        )
+        assert elapsed < 12 * 0.05, (
+            'Запросы разных подписок должны выполняться параллельно'
+        )
+        assert len(bot.sent) == 12
+
+    def test_loop_keeps_adaptive_interval(self, monkeypatch):
+        polls = []
+
+        def reviewing_fetch(current_timestamp, headers, cache=None,
+                            budget=None):
+            polls.append(time.monotonic())
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'reviewing'}],
+                'current_date': 1,
+            }
+
+        monkeypatch.setattr(async_runner, 'fetch_homework_statuses',
+                            reviewing_fetch)
+        policy = AdaptivePolicy(600, reviewing_interval=0.1, jitter=0)
+        scheduler = tenants.PollScheduler(600, policy)
+        scheduler.add(tenants.Subscription('t', 1), now=0)
+        lifecycle = Lifecycle(timeout=1)
+        threading.Timer(1, lifecycle.stop).start()
+        runner = async_runner.AsyncRunner(MockBot(), scheduler)
+        asyncio.run(runner.run(lifecycle))
+        assert len(polls) >= 5, (
+            'Пока работа на ревью, подписка должна опрашиваться с '
+            'интервалом ревью, а не RETRY_TIME'
+        )
+
+    def test_budget_starts_when_request_slot_is_free(self, monkeypatch):
+        latency = 0.1
+
+        class Response:
+            status_code = 200
+
+            def json(self):
+                return {'homeworks': [], 'current_date': 1}
+
+        def healthy_get(timeout, **kwargs):
+            if timeout[1] < latency:
+                time.sleep(timeout[1])
+                raise requests.ReadTimeout('read timed out')
+            time.sleep(latency)
+            return Response()
+
+        monkeypatch.setattr(homework.requests, 'get', healthy_get)
+        monkeypatch.setattr(homework, 'TIMEOUTS', Timeouts(cycle=0.25))
+        bot = MockBot()
+        scheduler = tenants.PollScheduler(interval=1000)
+        for chat_id in range(8):
+            scheduler.add(tenants.Subscription('t', chat_id), now=0)
+        runner = async_runner.AsyncRunner(bot, scheduler, concurrency=2)
+
+        async def run_once():
+            runner._semaphore = asyncio.Semaphore(runner.concurrency)
+            await asyncio.gather(*runner.dispatch_due(now=1000))
+
+        asyncio.run(run_once())
+        assert all(s.current_date == 1 for s in scheduler), (
+            'Ожидание свободного места для запроса не должно расходовать '
+            'бюджет цикла'
+        )
+        assert homework.PRACTICUM_BREAKER.state == 'closed'
+        assert not bot.sent
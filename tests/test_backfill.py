@@ -0,0 +1,124 @@
+import json
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import homework
+from backfill import backfill
+from state_store import MemoryStateStore
+
+NAMES = ('hw1', 'hw2', 'hw3')
+
+
+class HistoryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    size = 3
+    params_seen = []
+
+    def do_GET(self):
+        self.params_seen.append(self.path)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self._chunk(b'{"homeworks": [')
+        for index in range(self.size):
+            item = json.dumps({
+                'id': index,
+                'homework_name': NAMES[index % len(NAMES)],
+                'status': 'approved' if index < len(NAMES) else 'rejected',
+                'reviewer_comment': 'замечание ' * 20,
+            }, ensure_ascii=False).encode()
+            self._chunk(item if index == 0 else b',' + item)
+        self._chunk(b'], "current_date": 1700000000}')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _chunk(self, data):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def history_server(monkeypatch):
+    HistoryHandler.params_seen = []
+    HistoryHandler.size = 3
+    server = ThreadingHTTPServer(('127.0.0.1', 0), HistoryHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        homework, 'ENDPOINT', f'http://127.0.0.1:{server.server_address[1]}/')
+    yield HistoryHandler
+    server.shutdown()
+    server.server_close()
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class TestBackfill:
+    headers = homework.make_headers('token')
+
+    def test_rebuilds_state_and_replays(self, history_server):
+        store = MemoryStateStore()
+        bot = FakeBot()
+        counts = backfill(bot, 42, self.headers, store, replay=True)
+        assert history_server.params_seen == ['/?from_date=0']
+        assert counts == {'seen': 3, 'changed': 3, 'skipped': 0}
+        assert len(bot.sent) == 3, 'По каждому новому статусу — уведомление'
+        current_date, report = store.load(42)
+        assert current_date == 1700000000
+        assert report == {'statuses': dict.fromkeys(NAMES, 'approved')}
+
+    def test_known_statuses_are_not_replayed(self, history_server):
+        store = MemoryStateStore()
+        store.save(42, 5, {'statuses': {'hw1': 'approved'}})
+        bot = FakeBot()
+        counts = backfill(bot, 42, self.headers, store, replay=True)
+        assert counts['changed'] == 2
+        assert [text for _, text in bot.sent if '"hw1"' in text] == [], (
+            'Статусы из хранилища не должны отправляться повторно'
+        )
+
+    def test_replay_goes_from_old_to_new(self, history_server):
+        history_server.size = 6
+        store = MemoryStateStore()
+        bot = FakeBot()
+        counts = backfill(bot, 42, self.headers, store, replay=True)
+        assert counts == {'seen': 6, 'changed': 3, 'skipped': 0}
+        assert [name for _, text in bot.sent for name in NAMES
+                if f'"{name}"' in text] == ['hw3', 'hw2', 'hw1'], (
+            'Уведомления истории должны идти от старых к новым, как в цикле'
+        )
+        assert store.load(42)[1] == {
+            'statuses': dict.fromkeys(NAMES, 'approved')}, (
+            'Старые записи истории не должны затирать свежие статусы'
+        )
+
+    def test_without_replay_nothing_is_sent(self, history_server):
+        bot = FakeBot()
+        backfill(bot, 42, self.headers, MemoryStateStore())
+        assert bot.sent == []
+
+    def test_memory_does_not_grow_with_history(self, history_server):
+        peaks = []
+        for size in (1000, 10000):
+            history_server.size = size
+            tracemalloc.start()
+            try:
+                backfill(None, 42, self.headers, MemoryStateStore())
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        assert peaks[1] < peaks[0] * 2, (
+            'Память догоняющего режима не должна расти с длиной истории'
+        )
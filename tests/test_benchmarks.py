@@ -0,0 +1,44 @@
+from benchmarks.suite import BENCHMARKS, compare, main
+
+
+class TestBenchmarks:
+
+    def test_regression_above_threshold(self):
+        lines, regressions = compare(
+            {'fast': 1.0, 'slow': 2.0, 'new': 1.0},
+            {'fast': 1.0, 'slow': 1.0}, threshold=1.25)
+        assert regressions == ['slow'], (
+            'Замедление сильнее порога должно считаться регрессией'
+        )
+        assert any('нет базы' in line for line in lines)
+
+    def test_every_benchmark_runs(self):
+        for factory in BENCHMARKS.values():
+            function, cleanup = factory()
+            try:
+                function()
+            finally:
+                if cleanup is not None:
+                    cleanup()
+
+    def test_exit_code_reports_regression(self, tmp_path, capsys):
+        baseline = tmp_path / 'baseline.json'
+        baseline.write_text('{"parse_status": 1e-12}')
+        assert main([
+            'parse_status', '--repeat', '1', '--baseline', str(baseline),
+        ]) == 1
+        assert 'РЕГРЕССИЯ' in capsys.readouterr().out
+
+    def test_missing_baseline_is_not_regression(self, tmp_path, capsys):
+        baseline = tmp_path / 'baseline.json'
+        assert main([
+            'parse_status', '--repeat', '1', '--baseline', str(baseline),
+        ]) == 0
+        assert 'нет базы' in capsys.readouterr().out
+        assert main([
+            'parse_status', '--repeat', '1', '--baseline', str(baseline),
+            '--save',
+        ]) == 0
+        assert 'parse_status' in baseline.read_text(), (
+            '--save должен создавать базу на этой машине'
+        )
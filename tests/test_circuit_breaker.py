@@ -0,0 +1,162 @@
+import pytest
+import telegram
+
+import homework
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from delivery import DeliveryQueue
+from exceptions import CircuitOpen, ConectionError, TelegramError
+from metrics import BREAKER_STATE
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_probes(self):
+        clock = Clock()
+        breaker = CircuitBreaker(
+            'test', failure_threshold=2, reset_timeout=30, clock=clock)
+        for _ in range(2):
+            breaker.allow()
+            breaker.failure()
+        assert breaker.state == OPEN
+        assert BREAKER_STATE.labels('test').value() == 2
+        with pytest.raises(CircuitOpen) as raised:
+            breaker.allow()
+        assert raised.value.retry_after == 30
+        clock.now = 31
+        breaker.allow()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpen):
+            breaker.allow()
+        breaker.success()
+        assert breaker.state == CLOSED, 'Успешная проба замыкает предохранитель'
+
+    def test_failed_probe_reopens(self):
+        clock = Clock()
+        breaker = CircuitBreaker(
+            'test', failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.allow()
+        breaker.failure()
+        clock.now = 11
+        breaker.allow()
+        breaker.failure()
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpen):
+            breaker.allow()
+
+    def test_open_breaker_skips_api_request(self, monkeypatch):
+        calls = []
+
+        def failing_get(**kwargs):
+            calls.append(kwargs)
+            raise ConnectionError('нет связи')
+
+        monkeypatch.setattr(homework.requests, 'get', failing_get)
+        breaker = homework.PRACTICUM_BREAKER
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises(ConectionError):
+                homework.get_api_answer(1)
+        with pytest.raises(CircuitOpen):
+            homework.get_api_answer(1)
+        assert len(calls) == breaker.failure_threshold, (
+            'Разомкнутый предохранитель не должен пропускать запросы к API'
+        )
+
+    def test_client_errors_do_not_open_breaker(self, monkeypatch):
+        class Response:
+            status_code = 401
+            reason = 'Unauthorized'
+            text = ''
+            headers = {}
+
+        monkeypatch.setattr(
+            homework.requests, 'get', lambda **kwargs: Response())
+        for _ in range(homework.PRACTICUM_BREAKER.failure_threshold + 1):
+            with pytest.raises(Exception):
+                homework.get_api_answer(1)
+        assert homework.PRACTICUM_BREAKER.state == CLOSED, (
+            'Ошибка токена одного студента не должна отключать API для всех'
+        )
+
+    def test_telegram_outage_opens_breaker(self):
+        class Bot:
+            def send_message(self, chat_id, text, **kwargs):
+                raise telegram.error.TimedOut()
+
+        breaker = homework.TELEGRAM_BREAKER
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises(TelegramError):
+                homework.send_message_to(Bot(), 1, 'текст')
+        with pytest.raises(CircuitOpen):
+            homework.send_message_to(Bot(), 1, 'текст')
+
+    def test_delivery_waits_for_breaker_without_dropping(self):
+        error = CircuitOpen('telegram', retry_after=0)
+        failures = [error] * 10
+        sent = []
+
+        def send(bot, chat_id, text):
+            if failures:
+                raise failures.pop()
+            sent.append(text)
+
+        queue = DeliveryQueue(
+            None, send, per_chat_interval=0, global_rate=1000,
+            max_attempts=2).start()
+        queue.send_message(1, 'текст')
+        assert queue.stop(timeout=5)
+        assert sent == ['текст'] and queue.dropped == 0, (
+            'Отказ предохранителя не должен считаться попыткой доставки'
+        )
+
+    def test_enqueue_does_not_touch_breaker(self):
+        breaker = homework.TELEGRAM_BREAKER
+        for _ in range(breaker.failure_threshold - 1):
+            breaker.allow()
+            breaker.failure()
+        queue = DeliveryQueue(None, homework.send_message_to)
+        homework.send_message(queue, 'в очередь')
+        assert breaker._failures == breaker.failure_threshold - 1, (
+            'Постановка в очередь не должна считаться удачной отправкой'
+        )
+        breaker.allow()
+        breaker.failure()
+        assert breaker.state == OPEN
+        homework.send_message(queue, 'ещё одно')
+        assert len(queue) == 2, (
+            'Разомкнутый предохранитель не должен мешать постановке в очередь'
+        )
+
+    def test_direct_send_goes_through_breaker(self):
+        calls = []
+
+        class Bot:
+            def send_message(self, chat_id, text, **kwargs):
+                calls.append(kwargs)
+                raise telegram.error.NetworkError('нет сети')
+
+        with pytest.raises(TelegramError):
+            homework.send_message(Bot(), 'текст')
+        assert calls[0].get('timeout'), (
+            'Отправка без очереди должна идти с таймаутом Telegram'
+        )
+        assert homework.TELEGRAM_BREAKER._failures == 1, (
+            'Отправка без очереди должна учитываться предохранителем'
+        )
+
+    def test_budgeted_queue_passes_budget(self):
+        queue = DeliveryQueue(None, homework.send_message_to)
+        budget = object()
+        homework.send_message(queue.with_budget(budget), 'в очередь')
+        assert len(queue) == 1
+        assert queue._budgets[homework.TELEGRAM_CHAT_ID] is budget, (
+            'Сообщение из цикла опроса должно доставляться в его бюджет'
+        )
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import homework
+import tenants
+from commands import ChatState, CommandHandler, CommandListener
+
+
+class TestCommands:
+
+    def make_handler(self, chat):
+        return CommandHandler(
+            lambda chat_id: chat if chat_id == 7 else None,
+            homework.HOMEWORK_STATUSES)
+
+    def test_status_from_memory(self):
+        chat = ChatState({'hw1': 'approved'})
+        answer = self.make_handler(chat).handle(7, '/status')
+        assert answer == (
+            '"hw1": Работа проверена: ревьюеру всё понравилось. Ура!')
+
+    def test_status_survives_concurrent_update(self):
+        chat = ChatState({'hw1': 'reviewing'})
+
+        class PollingVerdicts(dict):
+            def get(self, status, default=None):
+                chat.statuses['hw2'] = 'approved'
+                return super().get(status, default)
+
+        handler = CommandHandler(
+            lambda chat_id: chat, PollingVerdicts(homework.HOMEWORK_STATUSES))
+        answer = handler.handle(7, '/status')
+        assert answer == '"hw1": Работа взята на проверку ревьюером.', (
+            'Ответ на /status не должен падать, пока опрос меняет статусы'
+        )
+
+    def test_unknown_chat_and_command(self):
+        handler = self.make_handler(ChatState())
+        assert handler.handle(8, '/status') == (
+            'Этот чат не подписан на уведомления.')
+        assert handler.handle(7, '/unknown').startswith('Доступные команды')
+        assert handler.handle(7, 'привет') is None
+
+    def test_history_is_bounded(self):
+        chat = ChatState()
+        for number in range(20):
+            chat.remember(f'уведомление {number}')
+        answer = self.make_handler(chat).handle(7, '/history')
+        assert answer.split('\n\n')[0] == 'уведомление 10'
+        assert len(answer.split('\n\n')) == 10
+
+    def test_pause_skips_polling(self, monkeypatch):
+        def fake_fetch(*args, **kwargs):
+            assert False, 'Приостановленная подписка не должна опрашиваться'
+
+        monkeypatch.setattr(tenants, 'fetch_homework_statuses', fake_fetch)
+        subscription = tenants.Subscription('token', 7)
+        handler = self.make_handler(subscription)
+        handler.handle(7, '/pause@homework_bot')
+        tenants.poll_subscription(None, subscription)
+        handler.handle(7, '/resume')
+        assert not subscription.paused
+
+    def test_listener_replies_and_moves_offset(self):
+        replies = []
+        listener = CommandListener(
+            None, self.make_handler(ChatState()),
+            lambda chat_id, text: replies.append((chat_id, text)))
+        listener.process([
+            SimpleNamespace(
+                update_id=5,
+                message=SimpleNamespace(chat_id=7, text='/status')),
+            SimpleNamespace(update_id=6, message=None),
+        ])
+        assert replies == [(7, 'Статусов пока нет.')]
+        assert listener.offset == 7
@@ -0,0 +1,138 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import homework
+import tenants
+from config import ConfigReloader, Settings
+from lifecycle import Lifecycle
+from state_store import MemoryStateStore
+
+
+@pytest.fixture
+def restore_sighup():
+    saved = signal.getsignal(signal.SIGHUP)
+    yield
+    signal.signal(signal.SIGHUP, saved)
+
+
+@pytest.fixture
+def restore_settings():
+    saved = homework.SETTINGS
+    yield
+    homework.apply_settings(saved)
+
+
+def write_subscriptions(path, *rows):
+    path.write_text(
+        'practicum_token,chat_id,locale\n' + ''.join(
+            f'{row}\n' for row in rows),
+        encoding='utf-8')
+
+
+class TestConfig:
+
+    def test_file_overrides_environment(self, tmp_path):
+        path = tmp_path / 'bot.env'
+        path.write_text('RETRY_TIME=60\nPRACTICUM_TOKEN=from-file\n')
+        settings = Settings.load(path, environ={
+            'PRACTICUM_TOKEN': 'from-env', 'TELEGRAM_CHAT_ID': '7'})
+        assert settings.practicum_token == 'from-file', (
+            'Значения файла настроек должны быть важнее окружения'
+        )
+        assert settings.telegram_chat_id == '7'
+        assert settings.retry_time == 60
+        assert Settings.load(environ={}).endpoint == homework.ENDPOINT
+
+    def test_reload_only_on_request(self, tmp_path):
+        path = tmp_path / 'bot.env'
+        path.write_text('RETRY_TIME=60\n')
+        reloader = ConfigReloader(path, interval=0)
+        calls = []
+        reloader.on_reload(lambda old, new: calls.append((old, new)))
+        path.write_text('RETRY_TIME=30\n')
+        assert reloader.apply() is False
+        reloader.request()
+        assert reloader.apply() is True
+        (old, new), = calls
+        assert (old.retry_time, new.retry_time) == (60, 30)
+        assert reloader.settings is new
+
+    def test_failed_listener_keeps_settings(self, tmp_path):
+        path = tmp_path / 'bot.env'
+        path.write_text('RETRY_TIME=60\n')
+        reloader = ConfigReloader(path, interval=0)
+
+        @reloader.on_reload
+        def broken(old, new):
+            raise ValueError('битая таблица подписок')
+
+        path.write_text('RETRY_TIME=30\n')
+        reloader.request()
+        assert reloader.apply() is False
+        assert reloader.settings.retry_time == 60, (
+            'Ошибка при перечитывании должна оставлять прежние настройки'
+        )
+
+    def test_changed_file_requests_reload(self, tmp_path):
+        path = tmp_path / 'subscriptions.csv'
+        write_subscriptions(path, 'token,1,')
+        lifecycle = Lifecycle(timeout=1)
+        reloader = ConfigReloader(
+            '', watch=[path], interval=0).install(lifecycle, signals=())
+        reloader.check_files()
+        assert reloader.apply() is False
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        reloader.check_files()
+        assert reloader.apply() is True
+
+    def test_sighup_wakes_loop_without_shifting_poll(self, restore_sighup):
+        lifecycle = Lifecycle(timeout=1)
+        reloader = ConfigReloader('', interval=0).install(lifecycle)
+        reloaded = []
+        reloader.on_reload(lambda old, new: reloaded.append(new))
+        threading.Timer(
+            0.05, os.kill, (os.getpid(), signal.SIGHUP)).start()
+        started = time.monotonic()
+        assert reloader.sleep(lifecycle, 0.5) is False
+        assert time.monotonic() - started >= 0.5, (
+            'Перечитывание настроек не должно сдвигать следующий опрос'
+        )
+        assert len(reloaded) == 1
+
+    def test_reload_syncs_subscriptions(self, tmp_path, monkeypatch,
+                                        restore_settings, restore_sighup):
+        path = tmp_path / 'subscriptions.csv'
+        write_subscriptions(path, 'token1,1,', 'token2,2,')
+        store = MemoryStateStore(flush_interval=3600)
+        store.save('3', 500, {'statuses': {'hw': 'approved'}})
+        scheduler = tenants.PollScheduler(600)
+        for subscription in tenants.load_subscriptions(path):
+            scheduler.add(subscription, now=0)
+        kept = scheduler.get('1')
+        kept.statuses['hw'] = 'reviewing'
+        kept.current_date = 100
+        lifecycle = Lifecycle(timeout=1)
+        reloader = tenants.install_reloader(lifecycle, scheduler, path, store)
+        lifecycle.stop()
+        write_subscriptions(path, 'token1-new,1,en', 'token3,3,')
+        monkeypatch.setenv('RETRY_TIME', '120')
+        reloader.request()
+        assert reloader.apply() is True
+        assert sorted(s.chat_id for s in scheduler) == ['1', '3']
+        assert scheduler.get('1') is kept, (
+            'Подписка не должна пересоздаваться при перечитывании'
+        )
+        assert (kept.token, kept.locale) == ('token1-new', 'en')
+        assert kept.statuses == {'hw': 'reviewing'}
+        assert kept.current_date == 100
+        assert scheduler.get('3').current_date == 500, (
+            'Новая подписка должна получить состояние из хранилища'
+        )
+        assert scheduler.interval == homework.RETRY_TIME == 120, (
+            'Интервал опроса должен следовать за RETRY_TIME'
+        )
@@ -0,0 +1,96 @@
+import time
+
+import telegram
+
+import homework
+from delivery import DeliveryQueue
+from metrics import MESSAGES_DROPPED
+
+
+class FlakyBot:
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise telegram.error.NetworkError('сеть недоступна')
+        self.sent.append((chat_id, text))
+
+
+class TestDeliveryQueue:
+
+    def test_messages_for_one_chat_are_coalesced(self):
+        bot = FlakyBot()
+        queue = DeliveryQueue(bot, homework.send_message_to)
+        for number in range(3):
+            queue.send_message(1, f'статус {number}')
+        queue.send_message(2, 'другой чат')
+        queue.start()
+        assert queue.stop(timeout=5)
+        assert sorted(bot.sent) == [
+            (1, 'статус 0\n\nстатус 1\n\nстатус 2'),
+            (2, 'другой чат'),
+        ], 'Сообщения одному чату должны склеиваться в одно'
+        assert queue.sent == 4
+
+    def test_failed_send_is_retried(self):
+        bot = FlakyBot(failures=2)
+        queue = DeliveryQueue(
+            bot, homework.send_message_to, per_chat_interval=0,
+            retry_delay=0.01).start()
+        queue.send_message(1, 'статус')
+        assert queue.stop(timeout=5)
+        assert bot.sent == [(1, 'статус')]
+
+    def test_message_is_dropped_after_max_attempts(self):
+        bot = FlakyBot(failures=10)
+        queue = DeliveryQueue(
+            bot, homework.send_message_to, max_attempts=2,
+            retry_delay=0.01)
+        queue.send_message(1, 'статус')
+        queue.send_message(1, 'ещё статус')
+        before = MESSAGES_DROPPED.labels('attempts').value()
+        queue.start()
+        assert queue.stop(timeout=5)
+        assert (queue.sent, queue.dropped) == (0, 2), (
+            'Потерянными должны считаться все склеенные сообщения'
+        )
+        assert MESSAGES_DROPPED.labels('attempts').value() == before + 2
+
+    def test_rejected_message_is_not_retried(self):
+        calls = []
+
+        class BlockedBot:
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                calls.append(text)
+                raise telegram.error.Unauthorized('бот заблокирован')
+
+        queue = DeliveryQueue(
+            BlockedBot(), homework.send_message_to, retry_delay=0.01)
+        queue.send_message(1, 'статус')
+        before = MESSAGES_DROPPED.labels('rejected').value()
+        queue.start()
+        assert queue.stop(timeout=5)
+        assert len(calls) == 1, (
+            'Отказ Telegram вроде Unauthorized не должен повторяться'
+        )
+        assert queue.dropped == 1
+        assert MESSAGES_DROPPED.labels('rejected').value() == before + 1
+
+    def test_per_chat_rate_limit(self):
+        bot = FlakyBot()
+        queue = DeliveryQueue(
+            bot, homework.send_message_to, per_chat_interval=60).start()
+        queue.send_message(1, 'первое')
+        deadline = time.monotonic() + 5
+        while not bot.sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+        queue.send_message(1, 'второе')
+        time.sleep(0.2)
+        assert not queue.stop(timeout=0)
+        assert bot.sent == [(1, 'первое')], (
+            'Второе сообщение в чат должно ждать лимита Telegram'
+        )
@@ -0,0 +1,58 @@
+from error_alerts import ErrorAlerter, fingerprint
+from exceptions import ConectionError, StatusCodeException
+
+
+def wrapped(status_code, text):
+    try:
+        raise ConectionError(text) from StatusCodeException(
+            text, status_code=status_code)
+    except ConectionError as error:
+        return error
+
+
+class TestErrorAlerter:
+
+    def test_fingerprint_uses_class_and_status_code(self):
+        assert fingerprint(wrapped(500, 'тело 1')) == (
+            'StatusCodeException', 500)
+        assert fingerprint(ValueError('x')) == ('ValueError', None)
+
+    def test_one_alert_per_fingerprint_per_window(self):
+        now = [0]
+        alerter = ErrorAlerter(window=60, clock=lambda: now[0])
+        assert alerter.alert(wrapped(500, 'тело 1'))
+        assert alerter.alert(wrapped(500, 'тело 2')) is None, (
+            'Сбой с тем же отпечатком не должен отправляться повторно'
+        )
+        assert alerter.alert(wrapped(502, 'тело 3'))
+        now[0] = 61
+        assert alerter.alert(wrapped(500, 'тело 4'))
+
+    def test_recovery_summary(self):
+        alerter = ErrorAlerter()
+        assert alerter.recovered() is None
+        for _ in range(3):
+            alerter.alert(wrapped(500, 'тело'))
+        alerter.alert(ValueError('x'))
+        summary = alerter.recovered()
+        assert 'StatusCodeException (код 500): 3' in summary
+        assert 'ValueError: 1' in summary
+        assert alerter.recovered() is None
+
+    def test_not_for_send_errors_are_suppressed(self):
+        alerter = ErrorAlerter()
+        error = StatusCodeException('код 500', status_code=500)
+        assert alerter.alert(error) is None, (
+            'NotForSendException не должны отправляться в Telegram'
+        )
+        assert alerter.suppressed == {('StatusCodeException', 500): 1}
+        assert alerter.recovered() is None
+
+    def test_alert_does_not_leak_request(self):
+        alerter = ErrorAlerter()
+        message = alerter.alert(wrapped(
+            502, "{'headers': {'Authorization': 'OAuth secret'}}"))
+        assert 'secret' not in message and 'Authorization' not in message, (
+            'Параметры запроса с токеном не должны уходить в Telegram'
+        )
+        assert 'StatusCodeException (код 502)' in message
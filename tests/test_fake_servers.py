@@ -0,0 +1,74 @@
+import time
+
+import pytest
+import telegram
+
+import homework
+from delivery import DeliveryQueue
+from exceptions import StatusCodeException
+from loadtest.fake_servers import FakePracticum, FakeTelegram
+from loadtest.run import (
+    FAKE_BOT_TOKEN, notification_latencies, run_tenants,
+)
+from tenants import PollScheduler, Subscription
+
+
+@pytest.fixture
+def practicum(monkeypatch):
+    server = FakePracticum(step=0.2).start()
+    monkeypatch.setattr(homework, 'ENDPOINT', server.endpoint)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def telegram_server():
+    server = FakeTelegram().start()
+    yield server
+    server.stop()
+
+
+class TestFakeServers:
+
+    def test_statuses_follow_schedule(self, practicum):
+        practicum.started = time.time() - 10
+        response = homework.fetch_homework_statuses(
+            1, homework.make_headers('student'))
+        assert response['homeworks'] == [{
+            'homework_name': 'student__homework.zip', 'status': 'approved'}]
+        later = homework.fetch_homework_statuses(
+            response['current_date'] + 1, homework.make_headers('student'))
+        assert later['homeworks'] == [], (
+            'После последней смены статуса домашка не должна возвращаться'
+        )
+
+    def test_server_errors_reach_bot(self, practicum):
+        practicum.error_rate = 1.0
+        with pytest.raises(StatusCodeException):
+            homework.get_api_answer(1)
+        assert practicum.errors == 1
+
+    def test_every_student_is_notified_over_http(
+            self, practicum, telegram_server):
+        students = ['a', 'b', 'c']
+        scheduler = PollScheduler(0.05)
+        for chat_id, token in enumerate(students, start=1):
+            scheduler.add(Subscription(token, chat_id, time.time()))
+        bot = DeliveryQueue(
+            telegram.Bot(FAKE_BOT_TOKEN, base_url=telegram_server.base_url),
+            homework.send_message_to, per_chat_interval=0, global_rate=1000,
+        ).start()
+        run_tenants(bot, scheduler, time.time() + 1.2)
+        assert bot.stop(timeout=5)
+        received = {chat_id for chat_id, _, _ in telegram_server.messages}
+        assert received == {1, 2, 3}
+        assert all(
+            scheduler.get(chat_id).statuses == {
+                f'{token}__homework.zip': 'approved'}
+            for chat_id, token in enumerate(students, start=1)
+        ), 'Каждый студент должен дойти до статуса approved'
+        latencies = notification_latencies(
+            practicum, telegram_server, students)
+        assert latencies and max(latencies) < 1, (
+            'Задержка уведомления должна измеряться по времени смены статуса'
+        )
@@ -0,0 +1,73 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import homework
+from http_pool import HttpPool
+from metrics import REGISTRY
+
+
+class StatusesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StatusesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpPool:
+
+    def test_connections_are_reused(self, local_server):
+        pool = HttpPool(pool_maxsize=1)
+        for _ in range(5):
+            assert pool.get(local_server).json()['current_date'] == 1
+        stats = pool.stats()
+        pool.close()
+        assert stats == {'requests': 5, 'hits': 4, 'misses': 1}, (
+            'Соединение с сервером должно переиспользоваться'
+        )
+
+    def test_get_api_answer_uses_pool(self, local_server, monkeypatch):
+        pool = HttpPool()
+        monkeypatch.setattr(homework, 'ENDPOINT', local_server)
+        monkeypatch.setattr(homework, 'HTTP_POOL', pool)
+        homework.get_api_answer(1)
+        homework.get_api_answer(1)
+        stats = pool.stats()
+        exposition = REGISTRY.exposition()
+        pool.close()
+        assert stats['hits'] == 1
+        assert 'practicum_http_pool_requests{result="hit"} 1' in exposition, (
+            'Попадания пула должны попадать в метрики'
+        )
+        assert 'practicum_http_pool_requests{result="miss"} 1' in exposition
+
+    def test_from_env_defaults_do_not_override_environment(self, monkeypatch):
+        defaults = {'pool_connections': 1, 'pool_maxsize': 1}
+        pool = HttpPool.from_env(defaults=defaults)
+        assert pool.adapter._pool_maxsize == 1
+        monkeypatch.setenv('HTTP_POOL_MAXSIZE', '3')
+        pool = HttpPool.from_env(defaults=defaults)
+        assert pool.adapter._pool_maxsize == 3, (
+            'HTTP_POOL_MAXSIZE должен быть важнее значений по умолчанию'
+        )
+        assert pool.adapter._pool_connections == 1
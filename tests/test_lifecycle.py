@@ -0,0 +1,122 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import tenants
+from delivery import DeliveryQueue
+from lifecycle import Lifecycle
+from state_store import MemoryStateStore
+
+
+@pytest.fixture
+def restore_signals():
+    saved = {signum: signal.getsignal(signum)
+             for signum in (signal.SIGTERM, signal.SIGINT)}
+    yield
+    for signum, handler in saved.items():
+        signal.signal(signum, handler)
+
+
+class TestLifecycle:
+
+    def test_wait_is_interrupted_by_stop(self):
+        lifecycle = Lifecycle(timeout=1)
+        threading.Timer(0.05, lifecycle.stop).start()
+        started = time.monotonic()
+        assert lifecycle.wait(30) is True
+        assert time.monotonic() - started < 5, (
+            'Ожидание должно прерываться запросом на остановку'
+        )
+
+    def test_wake_interrupts_wait_without_stopping(self):
+        lifecycle = Lifecycle(timeout=1)
+        woken = []
+        lifecycle.on_wake(lambda: woken.append(True))
+        threading.Timer(0.05, lifecycle.wake).start()
+        started = time.monotonic()
+        assert lifecycle.wait(30) is False
+        assert time.monotonic() - started < 5
+        assert woken and not lifecycle.stopping
+        lifecycle.stop()
+        assert lifecycle.wait(30) is True and len(woken) == 2, (
+            'Остановка тоже должна будить ожидающих'
+        )
+
+    def test_shutdown_runs_handlers_in_reverse_within_deadline(self):
+        lifecycle = Lifecycle(timeout=10)
+        calls = []
+        lifecycle.on_shutdown(lambda remaining: calls.append('store'))
+        lifecycle.on_shutdown(
+            lambda remaining: calls.append(('queue', remaining <= 10)))
+        assert lifecycle.shutdown() is True
+        assert calls == [('queue', True), 'store'], (
+            'Сначала доставляется очередь, потом записывается состояние'
+        )
+
+    def test_failed_handler_does_not_block_others(self):
+        lifecycle = Lifecycle(timeout=1)
+        calls = []
+        lifecycle.on_shutdown(lambda remaining: calls.append('store'))
+        lifecycle.on_shutdown(lambda remaining: 1 / 0)
+        lifecycle.on_shutdown(lambda remaining: False)
+        assert lifecycle.shutdown() is False
+        assert calls == ['store']
+
+    def test_deadline_starts_at_stop_request(self):
+        clock = iter([0, 7, 7, 7, 7]).__next__
+        lifecycle = Lifecycle(timeout=10, clock=clock)
+        lifecycle.stop()
+        assert lifecycle.remaining() == 3
+        remainders = []
+        lifecycle.on_shutdown(remainders.append)
+        assert lifecycle.shutdown() is True
+        assert remainders == [3], (
+            'Обработчикам остановки достаётся остаток общего срока'
+        )
+
+    def test_signal_handler_does_not_run_listeners(self, restore_signals):
+        lifecycle = Lifecycle(timeout=1).install()
+        threads = []
+        stopped = threading.Event()
+
+        def listener():
+            threads.append(threading.current_thread())
+            stopped.set()
+
+        lifecycle.on_stop(listener)
+        os.kill(os.getpid(), signal.SIGTERM)
+        assert stopped.wait(5) and lifecycle.stopping
+        assert threads[0] is not threading.main_thread(), (
+            'Обработчик сигнала не должен логировать и звать слушателей: '
+            'это может повиснуть на блокировке прерванного кода'
+        )
+
+    def test_sigterm_stops_poll_loop_and_flushes_state(self, restore_signals):
+        lifecycle = Lifecycle(timeout=5).install()
+        store = MemoryStateStore(flush_interval=3600)
+        sent = []
+        bot = DeliveryQueue(
+            None, lambda bot, chat_id, text: sent.append(text),
+            per_chat_interval=0).start()
+        lifecycle.on_shutdown(lambda remaining: store.close())
+        lifecycle.on_shutdown(lambda remaining: bot.stop(timeout=remaining))
+        scheduler = tenants.PollScheduler(3600)
+        subscription = tenants.Subscription('t', '7', 100)
+        scheduler.add(subscription, now=time.time() + 3600)
+        bot.send_message('7', 'в очереди')
+        tenants.save_state(store, subscription)
+        threading.Timer(
+            0.1, os.kill, (os.getpid(), signal.SIGTERM)).start()
+        started = time.monotonic()
+        tenants.run(bot, scheduler, store=store, lifecycle=lifecycle)
+        assert time.monotonic() - started < 5, (
+            'SIGTERM должен прерывать ожидание следующего опроса'
+        )
+        assert lifecycle.shutdown() is True
+        assert sent == ['в очереди'], 'Очередь должна быть доставлена'
+        assert store._read('7') == (100, {'statuses': {}}), (
+            'Состояние должно быть записано при остановке'
+        )
@@ -0,0 +1,58 @@
+import io
+import json
+import logging
+
+import pytest
+
+from log_setup import DroppingQueueHandler, setup_logging, stop_listener
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class TestLogSetup:
+
+    def test_json_records_with_chat_id(self, tmp_path, restore_root_logger):
+        stream = io.StringIO()
+        path = tmp_path / 'program.log'
+        listener = setup_logging(
+            level='INFO', path=str(path), json_format=True, stream=stream)
+        logging.info('нет новых статусов', extra={'chat_id': 7})
+        logging.debug('не попадёт в лог')
+        stop_listener(listener)
+        lines = path.read_text(encoding='utf-8').splitlines()
+        assert len(lines) == 1
+        record = json.loads(lines[0])
+        assert record['message'] == 'нет новых статусов'
+        assert record['chat_id'] == 7
+        assert stream.getvalue().strip() == lines[0]
+
+    def test_file_is_rotated(self, tmp_path, restore_root_logger):
+        path = tmp_path / 'program.log'
+        listener = setup_logging(
+            level='INFO', path=str(path), max_bytes=200, backup_count=2,
+            stream=io.StringIO())
+        for number in range(50):
+            logging.info(f'сообщение {number}')
+        stop_listener(listener)
+        files = sorted(p.name for p in tmp_path.iterdir())
+        assert files == ['program.log', 'program.log.1', 'program.log.2'], (
+            'Размер логов должен ограничиваться ротацией'
+        )
+
+    def test_full_queue_drops_records(self):
+        import queue
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        record = logging.makeLogRecord({'msg': 'x'})
+        handler.emit(record)
+        handler.emit(record)
+        assert handler.dropped == 1
@@ -0,0 +1,44 @@
+import urllib.request
+
+import homework
+from metrics import Registry, start_metrics_server
+
+
+class TestMetrics:
+
+    def test_exposition_format(self):
+        registry = Registry()
+        errors = registry.counter(
+            'errors_total', 'Сбои', labelnames=('exception',))
+        errors.labels('ConectionError').inc()
+        errors.labels('ConectionError').inc()
+        latency = registry.histogram(
+            'latency_seconds', 'Задержка', buckets=(0.1, 1))
+        latency.observe(0.5)
+        text = registry.exposition()
+        assert '# TYPE errors_total counter' in text
+        assert 'errors_total{exception="ConectionError"} 2' in text
+        assert 'latency_seconds_bucket{le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{le="1"} 1' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+        assert 'latency_seconds_count 1' in text
+
+    def test_status_changes_are_counted(self):
+        before = homework.STATUS_CHANGES.value()
+        homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+        list(homework.status_changes(homeworks, {}))
+        assert homework.STATUS_CHANGES.value() == before + 1
+
+    def test_metrics_server(self):
+        registry = Registry()
+        registry.gauge('loop_lag_seconds', 'Опоздание').set(3)
+        server = start_metrics_server(0, registry)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(
+                    f'http://127.0.0.1:{port}/metrics') as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'loop_lag_seconds 3' in body
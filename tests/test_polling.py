@@ -0,0 +1,40 @@
+from exceptions import ConectionError, StatusCodeException
+from polling import AdaptivePolicy, Backoff, parse_retry_after
+
+
+class TestAdaptivePolicy:
+    policy = AdaptivePolicy(600, jitter=0)
+
+    def test_reviewing_polls_more_often(self):
+        backoff = Backoff()
+        backoff.success(changed=True)
+        assert self.policy.delay(backoff, {'hw': 'reviewing'}) == 120
+        assert self.policy.delay(backoff, {'hw': 'approved'}) == 600
+
+    def test_empty_responses_back_off_up_to_limit(self):
+        backoff = Backoff()
+        delays = []
+        for _ in range(6):
+            backoff.success(changed=False)
+            delays.append(self.policy.delay(backoff))
+        assert delays == [600, 1200, 2400, 3600, 3600, 3600]
+
+    def test_retry_after_is_respected(self):
+        error = StatusCodeException('429', status_code=429, retry_after='900')
+        backoff = Backoff()
+        try:
+            raise ConectionError('сбой') from error
+        except ConectionError as wrapped:
+            backoff.failure(wrapped)
+        assert self.policy.delay(backoff) == 900
+        backoff.success(changed=False)
+        assert self.policy.delay(backoff) == 600
+
+    def test_jitter_spreads_delay(self):
+        policy = AdaptivePolicy(600, jitter=0.1, rand=lambda: 1.0)
+        assert policy.delay(Backoff()) == 660
+
+    def test_parse_retry_after_http_date(self):
+        assert parse_retry_after(
+            'Thu, 01 Jan 1970 00:01:40 GMT', now=40) == 60
+        assert parse_retry_after('soon') is None
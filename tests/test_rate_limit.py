@@ -0,0 +1,74 @@
+import tenants
+from metrics import RATE_LIMITED
+from rate_limit import RateLimiter, TokenBucket
+
+
+class TestRateLimit:
+
+    def test_bucket_refills_at_rate(self):
+        bucket = TokenBucket(rate=2, capacity=2, now=0)
+        for _ in range(2):
+            assert bucket.wait_time(0) == 0
+            bucket.take()
+        assert bucket.wait_time(0) == 0.5
+        assert bucket.wait_time(0.5) == 0
+
+    def test_per_token_limit_does_not_affect_other_tokens(self):
+        limiter = RateLimiter(rate=0, per_token_rate=0.1, per_token_burst=1)
+        before = RATE_LIMITED.labels('token').value()
+        assert limiter.try_acquire('a', now=0) == 0
+        assert limiter.try_acquire('a', now=1) == 9
+        assert limiter.try_acquire('b', now=1) == 0
+        assert RATE_LIMITED.labels('token').value() == before + 1
+
+    def test_refused_request_is_not_charged(self):
+        limiter = RateLimiter(rate=1, burst=1, per_token_rate=0.01)
+        assert limiter.try_acquire('a', now=0) == 0
+        assert limiter.try_acquire('b', now=0) == 1
+        assert limiter.try_acquire('b', now=1) == 0, (
+            'Отложенный опрос не должен списывать запрос из ведра токена'
+        )
+
+    def test_scheduler_spreads_burst_of_due_polls(self):
+        limiter = RateLimiter(rate=2, burst=2, per_token_rate=0)
+        scheduler = tenants.PollScheduler(600, limiter=limiter)
+        for chat_id in range(10):
+            subscription = tenants.Subscription(f't{chat_id}', chat_id)
+            scheduler.add(subscription, now=0)
+        polled = {}
+        now = 600.0
+        while len(polled) < 10:
+            for _, subscription in scheduler.pop_due(now):
+                polled[subscription.chat_id] = now
+            now = scheduler.next_due()
+        moments = sorted(polled.values())
+        assert moments[-1] - moments[0] >= 3.9, (
+            'Опросы должны растягиваться по времени, а не идти пачкой'
+        )
+        for start in moments:
+            window = [moment for moment in moments
+                      if start <= moment < start + 1]
+            assert len(window) <= 3, 'Лимит запросов в секунду превышен'
+
+    def test_global_limit_is_off_by_default(self, monkeypatch):
+        monkeypatch.delenv('RATE_LIMIT_GLOBAL', raising=False)
+        limiter = RateLimiter.from_env()
+        assert limiter.capacity(600) is None, (
+            'Общий лимит по умолчанию не должен ограничивать число подписок'
+        )
+
+    def test_warns_when_limit_is_below_subscriptions(self, caplog):
+        limiter = RateLimiter(rate=0.01, per_token_rate=0)
+        scheduler = tenants.PollScheduler(600, limiter=limiter)
+        for chat_id in range(8):
+            scheduler.add(tenants.Subscription(f't{chat_id}', chat_id))
+        warnings = [record for record in caplog.records
+                    if record.levelname == 'WARNING']
+        assert len(warnings) == 1, (
+            'Нехватка лимита на опрос подписок должна попадать в лог один раз'
+        )
+        scheduler.remove(7)
+        scheduler.remove(6)
+        scheduler.add(tenants.Subscription('t6', 6))
+        assert len([record for record in caplog.records
+                    if record.levelname == 'WARNING']) == 2
@@ -0,0 +1,81 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import homework
+from response_cache import ResponseCache
+
+ETAG = '"v1"'
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'homeworks': [], 'current_date': 5}).encode()
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def conditional_server(monkeypatch):
+    ConditionalHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ConditionalHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        homework, 'ENDPOINT', f'http://127.0.0.1:{server.server_address[1]}/')
+    yield ConditionalHandler.requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+class TestResponseCache:
+
+    def test_not_modified_short_circuits(self, conditional_server):
+        cache = ResponseCache()
+        headers = homework.make_headers('token')
+        first = homework.fetch_homework_statuses(1, headers, cache)
+        assert first == {'homeworks': [], 'current_date': 5}
+        second = homework.fetch_homework_statuses(5, headers, cache)
+        assert second is None, (
+            'При ответе 304 ответ не должен разбираться повторно'
+        )
+        assert conditional_server[1].get('If-None-Match') == ETAG
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_tokens_are_cached_separately(self, conditional_server):
+        cache = ResponseCache()
+        homework.fetch_homework_statuses(
+            1, homework.make_headers('first'), cache)
+        response = homework.fetch_homework_statuses(
+            1, homework.make_headers('second'), cache)
+        assert response is not None
+        assert 'If-None-Match' not in conditional_server[1]
+
+    def test_cache_is_bounded(self):
+        class Response:
+            headers = {'ETag': ETAG}
+
+        cache = ResponseCache(maxsize=2)
+        for token in range(3):
+            cache.store(('url', token), Response())
+        assert len(cache) == 2
+        assert cache.conditional_headers(('url', 0)) == {}
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from exceptions import TypeException
+from schema import HomeworkStream, parse_homework_statuses, validate_response
+
+BODY = json.dumps({
+    'homeworks': [
+        {
+            'id': index,
+            'homework_name': f'Домашка {index}',
+            'status': 'approved',
+            'reviewer_comment': 'Отлично \\u2014 "без замечаний"',
+        }
+        for index in range(3)
+    ],
+    'current_date': 1640995200,
+}, ensure_ascii=False).encode()
+
+
+def split(body, size):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 2, 5, 64, len(BODY)])
+    def test_any_chunk_boundaries(self, size):
+        result = parse_homework_statuses(split(BODY, size))
+        assert result['current_date'] == 1640995200, (
+            'current_date не должен зависеть от границ кусков'
+        )
+        assert result['homeworks'] == [
+            {'homework_name': f'Домашка {index}', 'status': 'approved'}
+            for index in range(3)
+        ], 'От домашки должны остаться только нужные поля'
+
+    def test_homeworks_are_yielded_before_body_ends(self):
+        def chunks():
+            yield BODY[:BODY.index(b'}') + 2]
+            raise AssertionError('тело не должно читаться дальше')
+
+        stream = iter(HomeworkStream(chunks()))
+        assert next(stream)['homework_name'] == 'Домашка 0'
+
+    def test_malformed_item_is_rejected_without_reading_rest(self):
+        read = []
+
+        def chunks():
+            yield b'{"homeworks": [{"homework_name": oops}, ' + b' ' * 10
+            read.append('rest')
+            yield b'{}], "current_date": 1}'
+
+        with pytest.raises(ValueError):
+            parse_homework_statuses(chunks())
+        assert not read, 'Испорченный ответ должен отклоняться сразу'
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[]', TypeError),
+        (b'{"current_date": 1}', TypeException),
+        (b'{"homeworks": {}, "current_date": 1}', KeyError),
+        (b'{"homeworks": [1], "current_date": 1}', TypeException),
+        (b'{"homeworks": [], "current_date": 1', ValueError),
+        (b'{"homeworks": [], "current_date": 1} {}', ValueError),
+    ])
+    def test_invalid_bodies(self, body, error):
+        with pytest.raises(error):
+            parse_homework_statuses(body)
+
+
+class TestValidateResponse:
+
+    def test_returns_homeworks(self):
+        homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+        assert validate_response(
+            {'homeworks': homeworks, 'current_date': 1}) is homeworks
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({'homeworks': []}, TypeException),
+        ({'homeworks': {}, 'current_date': 1}, KeyError),
+    ])
+    def test_errors_match_check_response(self, response, error):
+        with pytest.raises(error):
+            validate_response(response)
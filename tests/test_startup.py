@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+import pytest
+
+ROOT_DIR = dirname(dirname(abspath(__file__)))
+HEAVY_MODULES = ('requests', 'telegram', 'urllib3', 'http.server')
+STARTUP_BUDGET = os.getenv('STARTUP_BUDGET')
+RUNS = 3
+
+
+def import_times(args, cwd, env=None):
+    """запускает python -X importtime и возвращает время импорта модулей.
+    Время — накопленное, в секундах, по имени модуля.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 10 ** 6
+    return result, times
+
+
+class TestStartup:
+
+    def test_heavy_dependencies_are_deferred(self, tmp_path):
+        _, times = import_times(
+            ['-c', f'import sys; sys.path.insert(0, {ROOT_DIR!r}); '
+                   'import homework'], tmp_path)
+        assert 'homework' in times
+        loaded = [name for name in HEAVY_MODULES if name in times]
+        assert not loaded, (
+            f'Импорт homework не должен загружать {loaded}: они '
+            'импортируются при первом обращении'
+        )
+
+    @pytest.mark.skipif(
+        not STARTUP_BUDGET,
+        reason='замер времени зависит от машины; включается STARTUP_BUDGET')
+    def test_import_fits_budget(self, tmp_path):
+        budget = float(STARTUP_BUDGET)
+        best = min(
+            import_times(
+                ['-c', f'import sys; sys.path.insert(0, {ROOT_DIR!r}); '
+                       'import homework'], tmp_path)[1]['homework']
+            for _ in range(RUNS)
+        )
+        assert best < budget, (
+            f'Импорт homework занял {best * 1000:.0f} мс при бюджете '
+            f'{budget * 1000:.0f} мс'
+        )
+
+    def test_missing_tokens_exit_without_heavy_imports(self, tmp_path):
+        env = {
+            name: value for name, value in os.environ.items()
+            if name not in (
+                'PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID',
+                'CONFIG_FILE')
+        }
+        env['LOG_FILE'] = ''
+        result, times = import_times(
+            [os.path.join(ROOT_DIR, 'homework.py')], tmp_path, env)
+        assert result.returncode != 0
+        assert 'отсутствуют обязательные переменные' in result.stderr
+        loaded = [name for name in HEAVY_MODULES if name in times]
+        assert not loaded, (
+            f'Без токенов бот не должен загружать {loaded}'
+        )
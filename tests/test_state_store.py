@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+import tenants
+from state_store import MemoryStateStore, SQLiteStateStore
+
+
+class MockBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class TestStateStore:
+
+    def test_sqlite_persists_between_connections(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        store = SQLiteStateStore(path, batch_size=10, flush_interval=60)
+        store.save(1, 100, {'messages': 'Работа взята на проверку'})
+        assert store.load(1) == (100, {'messages': 'Работа взята на проверку'})
+        store.close()
+        reopened = SQLiteStateStore(path)
+        assert reopened.load('1') == (
+            100, {'messages': 'Работа взята на проверку'})
+        assert list(reopened.load_all()) == [
+            ('1', 100, {'messages': 'Работа взята на проверку'})]
+        reopened.close()
+
+    def test_writes_are_batched(self):
+        store = MemoryStateStore(batch_size=3, flush_interval=60)
+        store.save(1, 1, '')
+        store.save(2, 1, '')
+        assert store._data == {}, (
+            'Изменения должны накапливаться до заполнения пачки'
+        )
+        store.save(3, 1, '')
+        assert len(store._data) == 3
+
+    def test_failed_flush_keeps_batch(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        store = SQLiteStateStore(
+            path, busy_timeout=0.05, batch_size=10, flush_interval=60)
+        other = sqlite3.connect(path)
+        other.execute('BEGIN IMMEDIATE')
+        store.save(1, 100, {'statuses': {}})
+        store.save(2, 100, {'statuses': {}})
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush()
+        store.save(2, 200, {'statuses': {'hw': 'approved'}})
+        other.rollback()
+        other.close()
+        store.flush()
+        assert sorted(store.load_all()) == [
+            ('1', 100, {'statuses': {}}),
+            ('2', 200, {'statuses': {'hw': 'approved'}}),
+        ], (
+            'Пачка, которую не удалось записать, не должна теряться и '
+            'затирать более свежие изменения'
+        )
+        store.close()
+
+    def test_restart_does_not_duplicate(self, monkeypatch):
+        def fake_fetch(current_timestamp, headers, cache=None,
+                       budget=None):
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': current_timestamp + 10,
+            }
+
+        monkeypatch.setattr(tenants, 'fetch_homework_statuses', fake_fetch)
+        store = MemoryStateStore()
+        bot = MockBot()
+        tenants.poll_subscription(
+            bot, tenants.Subscription('t', '7', 100), store=store)
+        store.flush()
+
+        scheduler = tenants.PollScheduler(interval=10)
+        restarted = tenants.Subscription('t', '7')
+        scheduler.add(restarted)
+        assert tenants.restore_state(scheduler, store) == 1
+        assert restarted.current_date == 110
+        tenants.poll_subscription(bot, restarted, store=store)
+        assert len(bot.sent) == 1, (
+            'После перезапуска то же уведомление не должно отправляться'
+        )
@@ -0,0 +1,84 @@
+import queue
+from collections import Counter
+
+import supervisor
+import tenants
+from delivery import TELEGRAM_GLOBAL_RATE, DeliveryQueue
+from rate_limit import RateLimiter
+
+
+class FakeProcess:
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.exitcode = None if alive else 1
+
+    def is_alive(self):
+        return self.alive
+
+
+class TestSupervisor:
+
+    def test_shards_are_stable_and_spread(self):
+        shards = Counter(
+            supervisor.shard_of(chat_id, 4) for chat_id in range(4000))
+        assert set(shards) == {0, 1, 2, 3}
+        assert min(shards.values()) > 800, (
+            'Подписки должны распределяться по шардам равномерно'
+        )
+        assert supervisor.shard_of('123', 4) == supervisor.shard_of(123, 4)
+
+    def test_load_shards(self, tmp_path):
+        path = tmp_path / 'subscriptions.csv'
+        path.write_text(
+            'practicum_token,chat_id,current_date\n'
+            + ''.join(f't,{chat_id},0\n' for chat_id in range(20)),
+            encoding='utf-8',
+        )
+        parts = [
+            {s.chat_id for s in supervisor.load_shards(path, {shard}, 2)}
+            for shard in (0, 1)
+        ]
+        assert not parts[0] & parts[1]
+        assert len(parts[0] | parts[1]) == 20
+
+    def test_worker_gets_share_of_global_limits(self, monkeypatch):
+        monkeypatch.setenv('RATE_LIMIT_GLOBAL', '10')
+        scheduler = tenants.PollScheduler(
+            600, limiter=RateLimiter.from_env(share=0.25))
+        bot = DeliveryQueue(None, None)
+        supervisor.apply_share(scheduler, bot, 0.5)
+        assert scheduler.limiter.rate == 5
+        assert bot.global_interval == 1 / (TELEGRAM_GLOBAL_RATE * 0.5), (
+            'Воркеры с общим ботом должны делить лимит Telegram на бота'
+        )
+
+    def test_crashed_worker_is_restarted_then_rebalanced(self, monkeypatch):
+        sup = supervisor.Supervisor('unused.csv', workers=3, interval=600,
+                                    max_restarts=2, restart_window=100)
+        spawned = []
+
+        def fake_spawn(worker_id):
+            spawned.append(worker_id)
+            sup._commands[worker_id] = queue.Queue()
+            sup._processes[worker_id] = FakeProcess()
+
+        monkeypatch.setattr(sup, '_spawn', fake_spawn)
+        sup.start()
+        sup._processes[1] = FakeProcess(alive=False)
+        sup.check_workers(now=0)
+        assert spawned == [0, 1, 2, 1], 'Упавший воркер нужно перезапустить'
+
+        moved = set(sup.assignment[1])
+        sup._processes[1] = FakeProcess(alive=False)
+        sup.check_workers(now=10)
+        assert 1 not in sup.assignment
+        assert set().union(*sup.assignment.values()) == set(range(24))
+        received = set()
+        for worker_id in (0, 2):
+            command, shards = sup._commands[worker_id].get_nowait()
+            assert command == 'add_shards'
+            received.update(shards)
+        assert received == moved, (
+            'Шарды часто падающего воркера нужно раздать живым воркерам'
+        )
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import homework
+from templates import TemplateRegistry, compile_template
+
+VERDICTS = {'approved': 'Принято.', 'rejected': 'Есть замечания.'}
+
+
+@pytest.fixture
+def templates_file(tmp_path):
+    path = tmp_path / 'templates.json'
+    path.write_text(json.dumps({
+        'ru': {'statuses': {'revision': 'Ждёт доработки.'}},
+        'en': {
+            'message': '{lesson_name}: homework "{homework_name}" {verdict}',
+            'statuses': {'approved': 'approved!'},
+        },
+    }, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+class TestTemplates:
+
+    def test_default_template_matches_parse_status(self):
+        registry = TemplateRegistry.load(None, homework.HOMEWORK_STATUSES)
+        item = {'homework_name': 'hw', 'status': 'approved'}
+        assert registry.render(item) == homework.parse_status(item)
+
+    def test_compiled_template_substitutes_verdict_once(self):
+        render = compile_template('{homework_name} — {verdict}', 'ок {x}')
+        assert render({'homework_name': 'hw'}) == 'hw — ок {x}', (
+            'Вердикт не должен разбираться как шаблон'
+        )
+
+    def test_unknown_status_configured_without_code(self, templates_file):
+        registry = TemplateRegistry.load(templates_file, VERDICTS)
+        item = {'homework_name': 'hw', 'status': 'revision'}
+        assert registry.render(item).endswith('Ждёт доработки.')
+        with pytest.raises(ValueError):
+            registry.render({'homework_name': 'hw', 'status': 'lost'})
+
+    def test_locale_falls_back_to_default(self, templates_file):
+        registry = TemplateRegistry.load(templates_file, VERDICTS)
+        item = {
+            'homework_name': 'hw', 'status': 'approved', 'lesson_name': 'L1'}
+        assert registry.render(item, 'en') == 'L1: homework "hw" approved!'
+        item['status'] = 'rejected'
+        assert registry.render(item, 'en').endswith('Есть замечания.'), (
+            'Вердикт без перевода берётся из языка по умолчанию'
+        )
+        assert registry.render(item, 'de') == registry.render(item)
+        assert 'lesson_name' in registry.fields, (
+            'Поля из шаблонов должны оставаться при разборе ответа API'
+        )
@@ -0,0 +1,175 @@
+import homework
+import tenants
+from metrics import SKIPPED_HOMEWORKS
+from timeouts import LatencyBudget
+
+
+class MockBot:
+
+    def __init__(self):
+        self.sent = []
+        self.budgets = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+        self.budgets.append(kwargs.get('budget'))
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTenants:
+
+    def test_load_subscriptions(self, tmp_path):
+        path = tmp_path / 'subscriptions.csv'
+        path.write_text(
+            'practicum_token,chat_id,current_date\n'
+            'token1,1,100\n'
+            'token2,2,\n',
+            encoding='utf-8',
+        )
+        subscriptions = list(tenants.load_subscriptions(path))
+        assert [s.chat_id for s in subscriptions] == ['1', '2']
+        assert subscriptions[0].current_date == 100
+        assert subscriptions[1].current_date == 0
+
+    def test_scheduler_spreads_and_repeats(self):
+        scheduler = tenants.PollScheduler(interval=100)
+        for chat_id in range(50):
+            scheduler.add(tenants.Subscription('t', chat_id), now=0)
+        assert len(scheduler) == 50
+        due = list(scheduler.pop_due(now=100))
+        assert len(due) == 50, (
+            'Все подписки должны быть опрошены в течение одного интервала'
+        )
+        assert len({when for when, _ in due}) > 1, (
+            'Опросы подписок должны быть распределены внутри интервала'
+        )
+        for when, subscription in due:
+            scheduler.reschedule(subscription, when, now=100)
+        assert not list(scheduler.pop_due(now=100))
+        assert len(list(scheduler.pop_due(now=200))) == 50
+
+    def test_scheduler_remove(self):
+        scheduler = tenants.PollScheduler(interval=10)
+        scheduler.add(tenants.Subscription('t', 1), now=0)
+        scheduler.add(tenants.Subscription('t', 2), now=0)
+        scheduler.remove(1)
+        due = [s.chat_id for _, s in scheduler.pop_due(now=10)]
+        assert due == [2]
+
+    def test_poll_subscription(self, monkeypatch):
+        def fake_fetch(current_timestamp, headers, cache=None,
+                       budget=None):
+            assert headers['Authorization'] == 'OAuth token'
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 42,
+            }
+
+        monkeypatch.setattr(tenants, 'fetch_homework_statuses', fake_fetch)
+        bot = MockBot()
+        subscription = tenants.Subscription('token', 7)
+        tenants.poll_subscription(bot, subscription)
+        tenants.poll_subscription(bot, subscription)
+        assert subscription.current_date == 42
+        assert len(bot.sent) == 1, (
+            'Повторный одинаковый статус не должен отправляться'
+        )
+        assert bot.sent[0][0] == 7
+
+    def test_every_changed_homework_is_notified(self, monkeypatch):
+        responses = [
+            [{'homework_name': 'hw1', 'status': 'reviewing'},
+             {'homework_name': 'hw2', 'status': 'reviewing'}],
+            [{'homework_name': 'hw2', 'status': 'approved'},
+             {'homework_name': 'hw1', 'status': 'reviewing'},
+             {'homework_name': 'hw3', 'status': 'rejected'}],
+        ]
+
+        def fake_fetch(current_timestamp, headers, cache=None,
+                       budget=None):
+            return {'homeworks': responses.pop(0), 'current_date': 1}
+
+        monkeypatch.setattr(tenants, 'fetch_homework_statuses', fake_fetch)
+        bot = MockBot()
+        subscription = tenants.Subscription('token', 7)
+        tenants.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 2
+        tenants.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 4, (
+            'Нужно отправлять уведомление для каждой изменившейся работы'
+        )
+        assert subscription.statuses == {
+            'hw1': 'reviewing', 'hw2': 'approved', 'hw3': 'rejected'}
+
+    def test_polls_of_one_cycle_share_budget(self, monkeypatch):
+        clock = Clock()
+        polled = []
+
+        class Response:
+            status_code = 200
+
+            def json(self):
+                homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+                return {'homeworks': homeworks, 'current_date': 42}
+
+        def slow_get(**kwargs):
+            polled.append(kwargs['headers']['Authorization'])
+            clock.now += 2
+            return Response()
+
+        monkeypatch.setattr(homework.requests, 'get', slow_get)
+        scheduler = tenants.PollScheduler(600)
+        for chat_id in range(1, 5):
+            scheduler.add(tenants.Subscription(f'token{chat_id}', chat_id), 0)
+        budget = LatencyBudget(5, clock=clock)
+        bot = MockBot()
+        polls, delay = tenants.run_once(bot, scheduler, budget=budget)
+        assert polls == len(polled) == 3, (
+            'Опросы одного цикла должны делить общий бюджет'
+        )
+        assert delay == 0
+        assert set(bot.budgets) == {budget}, (
+            'Отправки цикла тоже должны записываться на его бюджет'
+        )
+        deferred, = [s for s in scheduler if s.current_date == 0]
+        assert deferred.backoff.failures == 0, (
+            'Опрос, не уместившийся в бюджет, не должен считаться сбоем'
+        )
+        polls, _ = tenants.run_once(
+            bot, scheduler, budget=LatencyBudget(5, clock=clock))
+        assert polls == 1 and deferred.current_date == 42, (
+            'Отложенный опрос должен выполняться в следующем цикле'
+        )
+
+    def test_bad_homework_does_not_block_others(self, monkeypatch):
+        def fake_fetch(current_timestamp, headers, cache=None,
+                       budget=None):
+            return {
+                'homeworks': [
+                    {'homework_name': 'a', 'status': 'approved'},
+                    {'homework_name': 'b', 'status': 'revision'},
+                    {'status': 'approved'},
+                ],
+                'current_date': 42,
+            }
+
+        monkeypatch.setattr(tenants, 'fetch_homework_statuses', fake_fetch)
+        before = SKIPPED_HOMEWORKS.value()
+        bot = MockBot()
+        subscription = tenants.Subscription('token', 7)
+        tenants.poll_subscription(bot, subscription)
+        assert len(bot.sent) == 1 and subscription.statuses == {
+            'a': 'approved'}, (
+            'Домашка с неизвестным статусом или без названия не должна '
+            'мешать уведомлениям об остальных'
+        )
+        assert subscription.current_date == 42
+        assert SKIPPED_HOMEWORKS.value() == before + 2
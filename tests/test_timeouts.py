@@ -0,0 +1,219 @@
+import io
+import json
+
+import pytest
+import requests
+import telegram
+
+import homework
+import tenants
+from exceptions import (
+    BudgetExceeded, ConectionError, PracticumTimeout, TelegramTimeout,
+)
+from metrics import CALL_TIMEOUTS, CYCLE_BUDGET_EXCEEDED
+from timeouts import LatencyBudget, Timeouts
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Body(io.BytesIO):
+    """тело ответа, соединение которого возвращается в пул при закрытии."""
+
+    released = False
+
+    def release_conn(self):
+        self.released = True
+
+
+class SlowBody(Body):
+    """тело ответа, каждое чтение которого занимает секунду."""
+
+    def __init__(self, data, clock):
+        super().__init__(data)
+        self.clock = clock
+
+    def read(self, size=-1):
+        self.clock.now += 1
+        return super().read(size)
+
+
+def streamed_response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = body
+    return response
+
+
+class TestTimeouts:
+
+    def test_every_api_request_has_timeout(self, monkeypatch):
+        calls = []
+
+        def hanging_get(**kwargs):
+            calls.append(kwargs)
+            raise requests.ReadTimeout('read timed out')
+
+        monkeypatch.setattr(homework.requests, 'get', hanging_get)
+        before = CALL_TIMEOUTS.labels('practicum').value()
+        with pytest.raises(PracticumTimeout) as raised:
+            homework.get_api_answer(1)
+        assert isinstance(raised.value, ConectionError), (
+            'Таймаут API должен оставаться ошибкой подключения'
+        )
+        assert calls[0]['timeout'] == homework.TIMEOUTS.practicum(), (
+            'Запрос к API должен выполняться с таймаутами из TIMEOUTS'
+        )
+        assert CALL_TIMEOUTS.labels('practicum').value() == before + 1
+
+    def test_streaming_read_timeout_is_classified(self):
+        error = requests.ConnectionError(
+            requests.urllib3.exceptions.ReadTimeoutError(None, '/', 'таймаут'))
+        assert homework.is_timeout(error), (
+            'Таймаут чтения тела ответа тоже должен считаться таймаутом'
+        )
+        assert not homework.is_timeout(requests.ConnectionError('сброс'))
+
+    def test_telegram_send_has_timeout(self):
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text, timeout=None):
+                sent.append(timeout)
+                if len(sent) > 1:
+                    raise telegram.error.TimedOut()
+
+        homework.send_message_to(Bot(), 1, 'текст')
+        assert sent == [homework.TIMEOUTS.telegram], (
+            'Отправка в Telegram должна выполняться с таймаутом'
+        )
+        with pytest.raises(TelegramTimeout):
+            homework.send_message_to(Bot(), 1, 'текст')
+
+    def test_budget_limits_timeouts(self):
+        clock = Clock()
+        timeouts = Timeouts(connect=3, read=10)
+        budget = LatencyBudget(12, clock=clock)
+        assert timeouts.practicum(budget) == (3, 10)
+        clock.now = 7
+        assert timeouts.practicum(budget) == (3, 5), (
+            'Таймаут чтения не должен выходить за остаток бюджета цикла'
+        )
+        assert timeouts.telegram_timeout(budget) == 5
+        clock.now = 12
+        before = CYCLE_BUDGET_EXCEEDED.value()
+        with pytest.raises(BudgetExceeded):
+            timeouts.practicum(budget)
+        assert CYCLE_BUDGET_EXCEEDED.value() == before + 1
+
+    def test_exhausted_budget_skips_request(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            homework.requests, 'get', lambda **kwargs: calls.append(kwargs))
+        with pytest.raises(BudgetExceeded):
+            homework.fetch_homework_statuses(
+                1, homework.HEADERS, budget=LatencyBudget(-1))
+        assert not calls, 'Исчерпанный бюджет не должен начинать запрос'
+        assert homework.PRACTICUM_BREAKER.state == 'closed'
+
+    def test_poll_is_streamed_and_closed(self, monkeypatch):
+        calls = []
+        body = Body(json.dumps(
+            {'homeworks': [], 'current_date': 1}).encode())
+
+        def streamed_get(**kwargs):
+            calls.append(kwargs)
+            return streamed_response(body)
+
+        monkeypatch.setattr(homework.requests, 'get', streamed_get)
+        assert homework.get_api_answer(1)['current_date'] == 1
+        assert calls[0]['stream'] is True, (
+            'Тело ответа API должно читаться из сокета по мере загрузки'
+        )
+        assert body.released, 'Ответ API должен закрываться после разбора'
+
+    def test_short_body_is_parsed_whole(self, monkeypatch):
+        data = json.dumps({
+            'homeworks': [{
+                'homework_name': 'hw', 'status': 'approved', 'id': 1}],
+            'current_date': 1,
+        }).encode()
+
+        def short_get(**kwargs):
+            response = streamed_response(Body(data))
+            response.headers['Content-Length'] = str(len(data))
+            return response
+
+        def streaming(*args):
+            raise AssertionError('короткий ответ разобран потоково')
+
+        monkeypatch.setattr(homework.requests, 'get', short_get)
+        monkeypatch.setattr(homework, 'parse_homework_statuses', streaming)
+        assert homework.get_api_answer(1)['homeworks'] == [
+            {'homework_name': 'hw', 'status': 'approved'}], (
+            'Короткий ответ должен разбираться целиком с теми же полями'
+        )
+
+    def test_slow_body_is_limited_by_budget(self, monkeypatch):
+        clock = Clock()
+        body = SlowBody(json.dumps({
+            'homeworks': [{'homework_name': 'x' * homework.CHUNK_SIZE}] * 5,
+            'current_date': 1,
+        }).encode(), clock)
+        monkeypatch.setattr(
+            homework.requests, 'get',
+            lambda **kwargs: streamed_response(body))
+        with pytest.raises(BudgetExceeded):
+            homework.fetch_homework_statuses(
+                1, homework.HEADERS, budget=LatencyBudget(3, clock=clock))
+        assert clock.now < 5, (
+            'Чтение тела ответа должно прерываться по бюджету цикла'
+        )
+        assert body.closed or body.released
+
+    def test_timeout_cut_by_budget_is_not_upstream_failure(
+            self, monkeypatch):
+        def healthy_but_late_get(**kwargs):
+            raise requests.ReadTimeout('read timed out')
+
+        monkeypatch.setattr(homework.requests, 'get', healthy_but_late_get)
+        breaker = homework.PRACTICUM_BREAKER
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises(BudgetExceeded):
+                homework.fetch_homework_statuses(
+                    1, homework.HEADERS, budget=LatencyBudget(1))
+        assert breaker.state == 'closed' and breaker._failures == 0, (
+            'Таймаут, урезанный бюджетом цикла, не должен считаться сбоем API'
+        )
+        subscription = tenants.Subscription('token', 7)
+        scheduler = tenants.PollScheduler(600)
+        scheduler.add(subscription, now=0)
+        sent = []
+        bot = type('Bot', (), {
+            'send_message': lambda self, *args, **kwargs: sent.append(args)})()
+        tenants.run_once(bot, scheduler, budget=LatencyBudget(1))
+        assert not sent, 'Студент не должен получать оповещение о сбое'
+        assert subscription.backoff.failures == 0
+        assert scheduler.next_due() == scheduler.offset(7), (
+            'Опрос должен быть отложен до следующего цикла'
+        )
+
+    def test_zero_budget_is_unlimited(self):
+        budget = LatencyBudget(0)
+        assert budget.remaining() is None and not budget.exceeded()
+        assert Timeouts(read=10).practicum(budget)[1] == 10
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv('HTTP_CONNECT_TIMEOUT', '1.5')
+        monkeypatch.setenv('HTTP_READ_TIMEOUT', '4')
+        monkeypatch.setenv('TELEGRAM_TIMEOUT', '6')
+        monkeypatch.setenv('CYCLE_BUDGET', '20')
+        timeouts = Timeouts.from_env()
+        assert timeouts.practicum() == (1.5, 4.0)
+        assert timeouts.telegram == 6.0 and timeouts.cycle == 20.0
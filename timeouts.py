@@ -0,0 +1,118 @@
+"""Таймауты внешних вызовов и бюджет времени на цикл опроса.
+
+Без таймаута одно зависшее соединение с API Практикума или Telegram
+останавливает бота навсегда. Каждый запрос получает таймауты на
+соединение и на чтение, а цикл опроса — общий бюджет: таймауты
+запросов урезаются до остатка бюджета, а когда он исчерпан, новые
+запросы в этом цикле не начинаются (BudgetExceeded). Так худшее время
+цикла ограничено бюджетом плюс одним таймаутом соединения.
+
+Переменные окружения (секунды): HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+TELEGRAM_TIMEOUT, CYCLE_BUDGET (0 отключает бюджет).
+"""
+import os
+import time
+
+from exceptions import BudgetExceeded
+from metrics import CYCLE_BUDGET_EXCEEDED
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_TELEGRAM_TIMEOUT = 10
+DEFAULT_CYCLE_BUDGET = 30
+MIN_TIMEOUT = 0.1
+
+
+class Timeouts:
+    """Таймауты запросов к API Практикума и Telegram.
+
+    connect — ожидание соединения, read — ожидание очередной порции
+    ответа Практикума, telegram — ожидание ответа Telegram, cycle —
+    бюджет времени на один цикл опроса.
+    """
+
+    def __init__(self, connect=DEFAULT_CONNECT_TIMEOUT,
+                 read=DEFAULT_READ_TIMEOUT, telegram=DEFAULT_TELEGRAM_TIMEOUT,
+                 cycle=DEFAULT_CYCLE_BUDGET):
+        self.connect = connect
+        self.read = read
+        self.telegram = telegram
+        self.cycle = cycle
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """создаёт таймауты по переменным окружения."""
+        options = {
+            'connect': float(os.getenv(
+                'HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+            'read': float(os.getenv(
+                'HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+            'telegram': float(os.getenv(
+                'TELEGRAM_TIMEOUT', DEFAULT_TELEGRAM_TIMEOUT)),
+            'cycle': float(os.getenv('CYCLE_BUDGET', DEFAULT_CYCLE_BUDGET)),
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def budget(self):
+        """новый бюджет на цикл опроса."""
+        return LatencyBudget(self.cycle)
+
+    def practicum(self, budget=None):
+        """пара (connect, read) для requests с учётом бюджета."""
+        if budget is None:
+            return self.connect, self.read
+        return budget.limit(self.connect), budget.limit(self.read)
+
+    def telegram_timeout(self, budget=None):
+        """таймаут отправки в Telegram с учётом бюджета."""
+        if budget is None:
+            return self.telegram
+        return budget.limit(self.telegram)
+
+
+class LatencyBudget:
+    """Остаток времени на цикл опроса; seconds=0 — без ограничения."""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self.deadline = clock() + seconds if seconds else None
+
+    def remaining(self):
+        """секунды до конца бюджета; None — бюджет не ограничен."""
+        if self.deadline is None:
+            return None
+        return self.deadline - self._clock()
+
+    def exceeded(self):
+        """вышел ли цикл за бюджет."""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self):
+        """BudgetExceeded, если бюджет уже исчерпан."""
+        if self.exceeded():
+            CYCLE_BUDGET_EXCEEDED.inc()
+            raise BudgetExceeded(
+                f'бюджет цикла {self.seconds} с исчерпан, '
+                'запрос отложен до следующего цикла')
+
+    def limit(self, timeout):
+        """урезает таймаут вызова до остатка бюджета.
+        BudgetExceeded, если бюджет уже исчерпан.
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return max(min(timeout, remaining), MIN_TIMEOUT)
+
+    def guard(self, chunks):
+        """отдаёт куски тела ответа, пока не исчерпан бюджет.
+        Таймаут чтения ограничивает одно чтение из сокета, а бюджет —
+        чтение всего медленно приходящего тела.
+        """
+        for chunk in chunks:
+            self.check()
+            yield chunk